@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Date-keyed archive of published dashboards with content-addressed blob dedup.
+
+Every hashed output under public/data (meta.json manifest entries and the
+scanner pages they reference), and meta.json itself, is stored once as
+``blobs/<sha[:2]>/<sha>.json.gz``; ``index.json`` maps each trade date to
+{file name: sha}. Files that did not change since the previous snapshot cost
+one index entry. Top-level and nested scalar fields of every output blob are kept in ``scalars.json`` so a time series
+across all snapshots reads two files instead of one blob per date.
+
+    python scripts/archive.py add public/data/history/2025-01-*/
+    python scripts/archive.py dates
+    python scripts/archive.py series market-regime.json composite
+    python scripts/archive.py show themes.json 2025-01-15
+"""
+import argparse, gzip, hashlib, json, os, re, sys
+from jsonout import COLUMNS, HASH_LEN, META, write_json
+
+ARCHIVE_DIR = os.getenv('DASHBOARD_ARCHIVE_DIR', os.path.join(os.path.dirname(__file__), '.cache', 'archive'))
+HASHED = re.compile(r'(.+)\.[0-9a-f]{%d}\.json' % HASH_LEN)
+
+
+def scalars(data, prefix=''):
+    """{dotted path: value} for every scalar reachable through dicts (lists and columnar tables skipped)."""
+    out = {}
+    if isinstance(data, dict) and COLUMNS not in data:
+        for key, value in data.items():
+            path = f'{prefix}{key}'
+            if isinstance(value, dict):
+                out.update(scalars(value, path + '.'))
+            elif not isinstance(value, list):
+                out[path] = value
+    return out
+
+
+class Archive:
+    """Reader/writer over an archive directory; snapshots are keyed by ISO trade date."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self._index = self._scalars = None
+
+    def _load(self, name):
+        try:
+            with open(os.path.join(self.root, name), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = self._load('index.json')
+        return self._index
+
+    @property
+    def scalar_index(self):
+        if self._scalars is None:
+            self._scalars = self._load('scalars.json')
+        return self._scalars
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, 'blobs', digest[:2], f'{digest}.json.gz')
+
+    # ─── write ───
+    def _put(self, digest, raw):
+        """Store ``raw`` as blob ``digest`` unless present; True when written."""
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(gzip.compress(raw, 9, mtime=0))
+        os.replace(tmp, path)
+        return True
+
+    def add(self, out_dir, day=None):
+        """Snapshot the outputs currently published in ``out_dir``; returns (date, files, new blobs).
+
+        ``day`` (a date or ISO string) defaults to meta.json's ``dataDate``.
+        """
+        try:
+            with open(os.path.join(out_dir, META), encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {}
+        if day is None and 'dataDate' not in meta:
+            raise ValueError(f"{out_dir}: no trade date given and no dataDate in {META}")
+        day = str(day or meta['dataDate'])
+        files, written = {}, 0
+        for fname in sorted(os.listdir(out_dir)):
+            m = HASHED.fullmatch(fname)
+            if fname != META and not m:
+                continue
+            with open(os.path.join(out_dir, fname), 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            files[f'{m.group(1)}.json' if m else META] = digest
+            if not self._put(digest, raw):
+                continue
+            written += 1
+            values = scalars(json.loads(raw)) if m else {}  # the manifest's scalars are its file list
+            if values:
+                self.scalar_index[digest] = values
+        self.index[day] = {'buildTime': meta.get('buildTime'), 'files': files}
+        self._index = dict(sorted(self.index.items()))
+        write_json(os.path.join(self.root, 'scalars.json'), self.scalar_index)
+        write_json(os.path.join(self.root, 'index.json'), self.index)  # last: a snapshot is visible once complete
+        return day, len(files), written
+
+    # ─── read ───
+    def dates(self):
+        """Archived trade dates, ascending (ISO strings)."""
+        return list(self.index)
+
+    def snapshot(self, day):
+        """{file name: sha} for the snapshot on or before ``day``, or None."""
+        day = str(day)
+        past = [d for d in self.index if d <= day]
+        return self.index[past[-1]]['files'] if past else None
+
+    def blob(self, digest):
+        with gzip.open(self._blob_path(digest), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, name, day):
+        """Contents of ``name`` as published on ``day`` (or the last snapshot before it); None if absent."""
+        files = self.snapshot(day)
+        return self.blob(files[name]) if files and name in files else None
+
+    def series(self, name, path):
+        """[(date, value)] of the scalar ``path`` (dotted, e.g. ``components.adr``) across all snapshots."""
+        out = []
+        for day, snap in self.index.items():
+            digest = snap['files'].get(name)
+            values = self.scalar_index.get(digest, {})
+            if path in values:
+                out.append((day, values[path]))
+        return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=ARCHIVE_DIR, help='archive directory')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('add', help='snapshot output directories (e.g. backfilled history/<date>/)')
+    p.add_argument('dirs', nargs='+')
+    sub.add_parser('dates', help='list archived trade dates')
+    p = sub.add_parser('series', help='scalar field across all snapshots')
+    p.add_argument('name')
+    p.add_argument('path')
+    p = sub.add_parser('show', help='a file as of a date')
+    p.add_argument('name')
+    p.add_argument('date')
+    args = parser.parse_args(argv)
+
+    archive = Archive(args.root)
+    if args.cmd == 'add':
+        for d in args.dirs:
+            day, files, written = archive.add(d)
+            print(f"  🗄 {day}: {files} files, {written} new blobs")
+    elif args.cmd == 'dates':
+        print('\n'.join(archive.dates()))
+    elif args.cmd == 'series':
+        for day, value in archive.series(args.name, args.path):
+            print(f"{day}\t{value}")
+    else:
+        data = archive.load(args.name, args.date)
+        if data is None:
+            print(f"⚠️ {args.name} not archived on or before {args.date}", file=sys.stderr)
+            return 1
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=1)
+        print()
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
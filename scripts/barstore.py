@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""Local memory-mapped bar store: market.daily_bars + market.market_caps history on disk.
+
+Each field is one raw float64 file laid out date × ticker slot (one row per
+trade date), so a new trade date is an append. ``store.json`` holds the ticker
+dictionary (slot order, append-only), the date axis, the slot capacity, the
+file generation and each date's close/market-cap counts and sums; it is
+replaced last, so a crash mid-append leaves the previous state readable.
+Growing the slot capacity writes a new generation of files next to the old
+ones and switches to it through store.json. ``update`` compares the counts and
+sums of the last REVISION_DAYS dates with the DB and rewrites the dates whose
+bars were revised. Files are opened with ``np.memmap``: only the dates a panel
+asks for are paged in.
+
+    python scripts/barstore.py            # create (STORE_DAYS of history) or sync new/revised dates
+    python scripts/barstore.py --rebuild
+"""
+import argparse, json, math, os, re, time
+import numpy as np
+from copyload import copy_columns
+from jsonout import write_json
+from panel import PANEL_COLUMNS, PANEL_DAYS, Panel
+
+STORE_DIR = os.getenv('BAR_STORE_DIR', os.path.join(os.path.dirname(__file__), '.cache', 'bars'))
+STORE_VERSION = 2
+STORE_DAYS = 1260  # ~5 years of trade dates on first build
+FIELDS = Panel.FIELDS + ('market_cap',)
+CAP_COLUMNS = [('ticker', 'S12'), ('trade_date', 'date'), ('market_cap', 'f8')]
+SLOT_BLOCK = 256  # ticker capacity grows in multiples of this
+REVISION_DAYS = 60  # trade dates re-checked against the DB each run; a revision among them widens the check
+DATA_FILE = re.compile(r'(%s)(\.\d+)?\.f8' % '|'.join(FIELDS))
+
+
+def _same(check, db):
+    """Stored [count, sum, count, sum] against the DB's: counts equal, sums within catch_up's tolerance."""
+    return (all(a == b for a, b in zip(check[::2], db[::2]))
+            and all(math.isclose(a, b, rel_tol=1e-9) for a, b in zip(check[1::2], db[1::2])))
+
+
+class BarStore:
+    """Reader/appender over ``root``; see the module docstring for the layout."""
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        try:
+            with open(os.path.join(root, 'store.json'), encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = None
+        if not state or state.get('version') != STORE_VERSION:
+            state = {'version': STORE_VERSION, 'capacity': 0, 'tickers': [], 'dates': [], 'checks': []}
+        self.capacity = state['capacity']
+        self.generation = state.get('generation', 0)  # data file set; bumped by _grow
+        self.tickers = np.array(state['tickers'], dtype=str)
+        self.dates = np.array(state['dates'], dtype='datetime64[D]')
+        self.checks = state['checks']  # per date: [close count, close sum, cap count, cap sum]
+        self.slot = {t: i for i, t in enumerate(state['tickers'])}
+
+    @property
+    def latest(self):
+        return self.dates[-1].astype(object) if len(self.dates) else None
+
+    def _path(self, field, generation=None):
+        g = self.generation if generation is None else generation
+        return os.path.join(self.root, f'{field}.{g}.f8' if g else f'{field}.f8')
+
+    def matrix(self, field):
+        """Read-only date × slot memmap of ``field`` (empty before the first append)."""
+        shape = (len(self.dates), self.capacity)
+        if not shape[0] or not shape[1]:
+            return np.full(shape, np.nan)
+        return np.memmap(self._path(field), dtype=np.float64, mode='r', shape=shape)
+
+    # ─── read ───
+    def panel(self, n_days=PANEL_DAYS, end=None):
+        """Panel of the last ``n_days`` trade dates up to ``end`` (None: every date).
+
+        Tickers without a bar in the window are left out, as in ``load_panel``.
+        """
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), 'right'))
+        lo = 0 if n_days is None else max(hi - n_days, 0)
+        slots = np.argsort(self.tickers)  # Panel rows are sorted by ticker
+        mats = [np.ascontiguousarray(self.matrix(f)[lo:hi, :len(self.tickers)].T[slots]) for f in Panel.FIELDS]
+        present = np.zeros(len(slots), dtype=bool)
+        for m in mats:
+            present |= ~np.isnan(m).all(axis=1)
+        return Panel(self.tickers[slots][present], self.dates[lo:hi].astype(object), *(m[present] for m in mats))
+
+    def field(self, name, panel):
+        """``name`` (e.g. ``market_cap``) as a ticker×date matrix aligned to ``panel``."""
+        out = np.full((len(panel.tickers), len(panel.dates)), np.nan)
+        if not len(self.dates):
+            return out
+        cols = np.searchsorted(self.dates, panel.days)
+        ok_c = (cols < len(self.dates)) & (self.dates[np.minimum(cols, len(self.dates) - 1)] == panel.days)
+        rows = np.array([self.slot.get(t, -1) for t in panel.tickers], dtype=int)
+        ok_r = rows >= 0
+        if ok_c.any() and ok_r.any():
+            m = self.matrix(name)
+            out[np.ix_(ok_r, ok_c)] = m[np.ix_(cols[ok_c], rows[ok_r])].T
+        return out
+
+    # ─── write ───
+    def _grow(self, needed):
+        """Re-lay every file out with room for ``needed`` ticker slots.
+
+        The copies are the next generation's files; store.json switches to them
+        (a crash before that leaves the old files and capacity in use), then the
+        old generation is removed.
+        """
+        capacity = -(-needed // SLOT_BLOCK) * SLOT_BLOCK
+        generation = self.generation + 1
+        for f in FIELDS if len(self.dates) else ():
+            new = np.memmap(self._path(f, generation), dtype=np.float64, mode='w+', shape=(len(self.dates), capacity))
+            new[:, self.capacity:] = np.nan
+            new[:, :self.capacity] = self.matrix(f)
+            new.flush()
+            del new
+        self.capacity, self.generation = capacity, generation
+        self._save()
+        self._sweep()
+
+    def _sweep(self):
+        """Remove data files of other generations (left by a grow, or by one that crashed)."""
+        for name in os.listdir(self.root):
+            m = DATA_FILE.fullmatch(name)
+            if m and int((m.group(2) or '.0')[1:]) != self.generation:
+                os.remove(os.path.join(self.root, name))
+
+    def _block(self, bars, caps, days):
+        """FIELDS × ``days`` × slot values from ``bars`` (PANEL_COLUMNS) and ``caps`` (CAP_COLUMNS).
+
+        New tickers get slots first; rows on other dates are ignored.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        for t in np.unique(np.concatenate([bars['ticker'], caps['ticker']])):
+            self.slot.setdefault(t.decode('utf-8'), len(self.slot))
+        if len(self.slot) > self.capacity:
+            self._grow(len(self.slot))
+        block = np.full((len(FIELDS), len(days), self.capacity), np.nan)
+        for cols, names in ((bars, Panel.FIELDS), (caps, ('market_cap',))):
+            keep = np.isin(cols['trade_date'], days)
+            r = np.searchsorted(days, cols['trade_date'][keep])
+            s = np.array([self.slot[t.decode('utf-8')] for t in cols['ticker'][keep]], dtype=int)
+            for name in names:
+                block[FIELDS.index(name), r, s] = cols[name][keep]
+        return block
+
+    @staticmethod
+    def _check(block):
+        """Per-date [close count, close sum, cap count, cap sum] of a :meth:`_block`."""
+        out = []
+        for name in ('close', 'market_cap'):
+            m = block[FIELDS.index(name)]
+            out += [np.count_nonzero(~np.isnan(m), axis=1), np.nansum(m, axis=1)]
+        return [[int(a), float(b), int(c), float(d)] for a, b, c, d in zip(*out)]
+
+    def _save(self):
+        self.tickers = np.array(list(self.slot), dtype=str)
+        write_json(os.path.join(self.root, 'store.json'), {
+            'version': STORE_VERSION, 'capacity': self.capacity, 'generation': self.generation,
+            'tickers': list(self.slot), 'dates': [str(d) for d in self.dates], 'checks': self.checks,
+        })
+
+    def append(self, bars, caps):
+        """Append the trade dates in ``bars`` (PANEL_COLUMNS arrays) with ``caps`` (CAP_COLUMNS).
+
+        Dates must be newer than the store's latest; returns the number appended.
+        """
+        days = np.unique(bars['trade_date'])
+        if self.latest is not None:
+            days = days[days > self.dates[-1]]
+        if not len(days):
+            return 0
+        block = self._block(bars, caps, days)
+        size = len(self.dates) * self.capacity * 8
+        for k, f in enumerate(FIELDS):
+            with open(self._path(f), 'ab') as out:
+                out.truncate(size)  # drop bytes from an append that never reached store.json
+                out.write(block[k].tobytes())
+        self.dates = np.concatenate([self.dates, days.astype('datetime64[D]')])
+        self.checks += self._check(block)
+        self._save()
+        return len(days)
+
+    def rewrite(self, bars, caps, days):
+        """Replace every bar and cap on the stored ``days`` with ``bars``/``caps``; returns the number rewritten.
+
+        A crash midway leaves store.json's checks on the old values, so the next
+        :meth:`update` finds the same dates revised and rewrites them again.
+        """
+        days = np.intersect1d(np.asarray(days, dtype='datetime64[D]'), self.dates)
+        if not len(days):
+            return 0
+        block = self._block(bars, caps, days.astype(bars['trade_date'].dtype))
+        rows = np.searchsorted(self.dates, days)
+        for k, f in enumerate(FIELDS):
+            m = np.memmap(self._path(f), dtype=np.float64, mode='r+', shape=(len(self.dates), self.capacity))
+            m[rows] = block[k]
+            m.flush()
+            del m
+        for r, check in zip(rows, self._check(block)):
+            self.checks[r] = check
+        self._save()
+        return len(days)
+
+    def clear(self):
+        """Drop every stored date (the next :meth:`update` reloads from the DB)."""
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if name == 'store.json' or DATA_FILE.fullmatch(name):
+                    os.remove(os.path.join(self.root, name))
+        self.__init__(self.root)
+
+    # ─── sync ───
+    def revised(self, cur, n_days=REVISION_DAYS):
+        """Stored dates whose close or market-cap count/sum differs from the DB (as checkpoint.catch_up
+        checks), or None when a compared date disappeared from the DB or one was added between them.
+
+        Only the last ``n_days`` stored dates are compared; when one of them was
+        revised (e.g. a split adjustment) every stored date is.
+        """
+        if self.latest is None:
+            return []
+        lo = max(len(self.dates) - n_days, 0)
+        changed = self._revised(cur, lo)
+        if changed and lo:
+            changed = self._revised(cur, 0)
+        return changed
+
+    def _revised(self, cur, lo):
+        """:meth:`revised` over the stored dates from index ``lo``."""
+        db = {}
+        for table, column in (('daily_bars', 'close'), ('market_caps', 'market_cap')):
+            cur.execute(f"""
+                SELECT trade_date,
+                    COUNT({column}) FILTER (WHERE {column} <> 'NaN'),
+                    COALESCE(SUM({column}) FILTER (WHERE {column} <> 'NaN'), 0)::float8
+                FROM market.{table} WHERE trade_date >= %s AND trade_date <= %s
+                GROUP BY trade_date
+            """, (self.dates[lo].astype(object), self.latest))
+            db[column] = {r[0]: (r[1], r[2]) for r in cur.fetchall()}
+        stored = self.dates[lo:].astype(object).tolist()
+        if sorted(db['close']) != stored:
+            return None
+        return [day for day, check in zip(stored, self.checks[lo:])
+                if not _same(check, db['close'][day] + db['market_cap'].get(day, (0, 0.0)))]
+
+    def _load(self, cur, where, params):
+        bars = copy_columns(cur, f"""
+            SELECT ticker, trade_date, open, high, low, close, volume
+            FROM market.daily_bars WHERE {where}
+        """, params, PANEL_COLUMNS)
+        caps = copy_columns(cur, f"""
+            SELECT ticker, trade_date, market_cap FROM market.market_caps WHERE {where}
+        """, params, CAP_COLUMNS)
+        return bars, caps
+
+    def update(self, cur, n_days=STORE_DAYS):
+        """Rewrite revised dates and append newer ones from the DB (first run: the last ``n_days``).
+
+        Returns the number of dates appended. When the stored date axis no longer
+        matches the DB the store is rebuilt.
+        """
+        changed = self.revised(cur)
+        if changed is None:
+            print("  ⚠️ Bar store dates no longer match the DB, rebuilding")
+            self.clear()
+        elif changed:
+            print(f"  ⚠️ Bars for {len(changed)} stored dates were revised, rewriting")
+            self.rewrite(*self._load(cur, "trade_date = ANY(%s)", (changed,)), changed)
+        if self.latest is None:
+            where, params = """trade_date >= (SELECT MIN(trade_date) FROM (
+                SELECT DISTINCT trade_date FROM market.daily_bars ORDER BY trade_date DESC LIMIT %s) d)""", (n_days,)
+        else:
+            where, params = "trade_date > %s", (self.latest,)
+        return self.append(*self._load(cur, where, params))
+
+
+def main(argv=None):
+    import psycopg2
+    from extract_data import _conn_params
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default=STORE_DIR)
+    parser.add_argument('--days', type=int, default=STORE_DAYS, help='trade dates loaded when creating the store')
+    parser.add_argument('--rebuild', action='store_true', help='discard the store and reload from the DB')
+    args = parser.parse_args(argv)
+
+    store = BarStore(args.root)
+    if args.rebuild:
+        store.clear()
+    started = time.perf_counter()
+    conn = psycopg2.connect(**_conn_params())
+    try:
+        with conn.cursor() as cur:
+            added = store.update(cur, args.days)
+    finally:
+        conn.close()
+    print(f"  🗃 {added} trade dates appended → {len(store.dates)} dates × {len(store.tickers)} tickers "
+          f"({time.perf_counter() - started:.1f}s)")
+
+if __name__ == '__main__':
+    main()
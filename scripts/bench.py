@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Extractor benchmark on synthetic databases (see synthetic.py).
+
+Times each extractor of extract_data.py, plus the root script's WICS heatmap,
+at every requested scale with yfinance/pykrx/WICS served from the generated
+stubs. Exits non-zero when a timing regresses past the stored baseline.
+
+    python scripts/synthetic.py --dsn "dbname=bench_small" --scale small
+    python scripts/bench.py --dsn "dbname=bench_{scale}" --scale small --update-baseline
+    python scripts/bench.py --dsn "dbname=bench_{scale}" --scale small
+"""
+import argparse, contextlib, importlib.util, io, json, os, platform, statistics, tempfile, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+import psycopg2
+import extract_data as ed
+import daily_stats, sources
+from barstore import BarStore
+from jsonout import write_json
+from panel import load_panel
+from source_cache import SourceCache
+from synthetic import OUT_ROOT, SCALES
+from wics import WicsClient
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'bench_baseline.json')
+ROOT_SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'extract_data.py')
+TOLERANCE = 0.25  # fraction slower than baseline that fails the run
+MIN_DELTA = 0.05  # seconds; smaller slowdowns are noise
+
+
+class Collector:
+    """Stands in for Scheduler so ``extract_data.schedule`` tasks can be timed one by one."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def add(self, name, fn, *args, deps=()):
+        self.tasks.append((name, fn, args, deps))
+
+
+def stub_fetchers(stubs):
+    """FETCHERS replacements serving sources.json rows as the DataFrames yfinance/pykrx return."""
+    def frame(rows, columns):
+        return pd.DataFrame([r[1:] for r in rows], columns=columns,
+                            index=pd.DatetimeIndex([r[0] for r in rows]))
+    yf = {t: frame(rows, ['Open', 'High', 'Low', 'Close', 'Volume']) for t, rows in stubs['yfinance'].items()}
+    krx = {m: frame(rows, ['외국인합계', '기관합계', '개인', '기타법인']) for m, rows in stubs['pykrx'].items()}
+    return {
+        'yfinance': lambda cache, key, start, end, trade_date: yf[key].loc[start.isoformat():end.isoformat()],
+        'pykrx': lambda cache, key, start, end, trade_date: krx[key].loc[start.isoformat():end.isoformat()],
+    }
+
+
+def wics_server(payloads):
+    """Local GetIndexComponets stand-in on an ephemeral port."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            code = parse_qs(urlsplit(self.path).query).get('sec_cd', [''])[0]
+            body = json.dumps(payloads.get(code, {'list': []}), ensure_ascii=False).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_root_script(out_dir):
+    spec = importlib.util.spec_from_file_location('root_extract_data', ROOT_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.OUT = out_dir
+    return module
+
+
+def bench_scale(dsn, data_dir, repeat):
+    """{task: median seconds} for one synthetic database."""
+    with open(os.path.join(data_dir, 'sources.json'), encoding='utf-8') as f:
+        stubs = json.load(f)
+    sources.FETCHERS.update(stub_fetchers(stubs))
+    ed.THEMES_PATH = os.path.join(data_dir, 'themes.json')
+    ed.CLASSIFICATIONS_PATH = os.path.join(data_dir, 'classifications.json')
+    out = tempfile.mkdtemp(prefix='bench-')
+    output = ed.Output(out)
+    root = load_root_script(out)
+    server = wics_server(stubs['wics'])
+    client = WicsClient(base_url=f'http://127.0.0.1:{server.server_port}/wics', rate=1000, burst=1000)
+
+    timings = {}
+    def timed(name, fn, *args, **kwargs):
+        runs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = fn(*args, **kwargs)
+            runs.append(time.perf_counter() - started)
+        timings[name] = round(statistics.median(runs), 4)
+        return result
+
+    conn = psycopg2.connect(dsn)
+    try:
+        with conn.cursor() as cur:
+            panel = timed('load_panel', load_panel, cur)
+            store = BarStore(os.path.join(out, 'bars'))
+            store.update(cur)
+            timed('bar_store_panel', store.panel)
+            timed('daily_stats', lambda: (daily_stats.sync(cur, panel), conn.rollback()))
+            daily_stats.sync(cur, panel)
+            conn.commit()
+
+            src = sources.DataSources(SourceCache(offline=True), panel.latest)
+            for market in ('KOSPI', 'KOSDAQ'):
+                src.register('pykrx', market, panel.trade_dates(ed.FLOW_DAYS)[0], panel.latest)
+            tasks = Collector()
+            ed.schedule(tasks, output, store, panel, src, {})
+            results = {}
+            for name, fn, args, deps in tasks.tasks:
+                results[name] = timed(name, fn, cur, *args, **{d: results[d] for d in deps})
+            timed('meta', ed.extract_meta, output, panel)
+            timed('wics_heatmap', root.extract_wics_heatmap, cur, panel.latest, client)
+    finally:
+        conn.close()
+        server.shutdown()
+    return timings
+
+
+def machine():
+    return {'platform': platform.platform(), 'python': platform.python_version(),
+            'cpus': os.cpu_count(), 'processor': platform.processor()}
+
+
+def compare(results, baseline, tolerance):
+    """[(scale, task, baseline, now)] for timings slower than the baseline allows."""
+    out = []
+    for scale, tasks in results.items():
+        for name, secs in tasks.items():
+            base = baseline.get('scales', {}).get(scale, {}).get(name)
+            if base is not None and secs > base * (1 + tolerance) and secs - base > MIN_DELTA:
+                out.append((scale, name, base, secs))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', required=True, help='libpq connection string; {scale} is substituted')
+    parser.add_argument('--scale', action='append', choices=SCALES,
+                        help='scale to run (repeatable; default: every scale)')
+    parser.add_argument('--data-dir', default=os.path.join(OUT_ROOT, '{scale}'),
+                        help='synthetic.py --out directory; {scale} is substituted')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per task; the median is kept')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='store these timings as the baseline instead of comparing')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scale in args.scale or list(SCALES):
+        print(f"⏱ {scale} ({SCALES[scale][0]:,} tickers × {SCALES[scale][1]:,} days)")
+        results[scale] = bench_scale(args.dsn.format(scale=scale), args.data_dir.format(scale=scale), args.repeat)
+        for name, secs in results[scale].items():
+            print(f"  {name:<16} {secs:8.3f}s")
+
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = None
+
+    if args.update_baseline:
+        merged = {**(baseline or {}).get('scales', {}), **results}
+        write_json(args.baseline, {'machine': machine(), 'repeat': args.repeat, 'scales': merged})
+        print(f"📝 Baseline → {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+    if baseline.get('machine') != machine():
+        print("⚠️ Baseline was recorded on a different machine; comparisons are indicative only")
+
+    regressions = compare(results, baseline, args.tolerance)
+    for scale, name, base, secs in regressions:
+        print(f"❌ {scale}/{name}: {base:.3f}s → {secs:.3f}s (+{(secs / base - 1) * 100:.0f}%)")
+    if regressions:
+        return 1
+    print(f"✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,42 @@
+"""Rolling-MA breadth engine: % of traded tickers above their MA20/MA50/MA200."""
+import numpy as np
+from rolling import sma
+
+MA_WINDOWS = (20, 50, 200)
+MIN_OBS_RATIO = 0.75  # MA50/MA200: 75% of the window's bars observed
+# MA20 keeps the old per-day self-join: closes in the trailing 30 calendar days, at least 15 of them
+CALENDAR_MA = {20: (30, 15)}
+
+
+def _calendar_ma(panel, days, min_obs, start):
+    """Mean close over ``end - days < trade_date <= end`` for every column from ``start``."""
+    first = np.searchsorted(panel.days, panel.days[start:] - np.timedelta64(days, 'D'), 'right')
+    lo = int(first[0]) if len(first) else start
+    close = panel.close[:, lo:]
+    valid = ~np.isnan(close)
+    zero = np.zeros((close.shape[0], 1))
+    s, n = (np.concatenate([zero, np.cumsum(x, axis=1)], axis=1) for x in (np.where(valid, close, 0), valid))
+    a, b = first - lo, np.arange(start, len(panel.dates)) - lo + 1
+    win_s, win_n = s[:, b] - s[:, a], n[:, b] - n[:, a]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(win_n >= min_obs, win_s / win_n, np.nan)
+
+
+def ma_breadth(panel, windows=MA_WINDOWS, start=0):
+    """{window: per-date % of traded tickers closing above their MA} for panel dates from ``start``.
+
+    Only the history the window needs before ``start`` is read.
+    """
+    out = {}
+    for w in windows:
+        if w in CALENDAR_MA:
+            ma = _calendar_ma(panel, *CALENDAR_MA[w], start)
+        else:
+            lo = max(start - w + 1, 0)
+            ma = sma(panel.close[:, lo:], w, int(np.ceil(w * MIN_OBS_RATIO)))[:, start - lo:]
+        close, traded = panel.close[:, start:], panel.traded[:, start:]
+        eligible = traded & ~np.isnan(ma)
+        with np.errstate(invalid='ignore'):
+            above = eligible & (close > ma)
+        out[w] = 100 * above.sum(axis=0) / np.maximum(eligible.sum(axis=0), 1)
+    return out
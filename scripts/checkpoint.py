@@ -0,0 +1,72 @@
+"""Checkpoint for --incremental runs: the bar panel plus the per-date rows already emitted."""
+import json, math, os
+import numpy as np
+from panel import Panel, concat, load_since
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '.cache')
+STATE_PATH = os.path.join(CACHE_DIR, 'checkpoint.npz')
+STATE_VERSION = 2  # 2: panels widened to PANEL_DAYS = 330
+MAX_GAP = 10  # more new trade dates than this → full rebuild
+
+
+def load_checkpoint():
+    """(panel, rows) from the last run, or None when there is no usable checkpoint."""
+    if not os.path.exists(STATE_PATH):
+        return None
+    with np.load(STATE_PATH) as z:
+        rows = json.loads(str(z['rows']))
+        if rows.get('version') != STATE_VERSION:
+            return None
+        panel = Panel(z['tickers'], z['dates'].astype(object),
+                      *(z[f] for f in Panel.FIELDS))
+    return panel, rows
+
+
+def save_checkpoint(panel, rows):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = STATE_PATH + '.tmp.npz'
+    np.savez_compressed(tmp, tickers=panel.tickers, dates=panel.days,
+                        rows=np.array(json.dumps({**rows, 'version': STATE_VERSION}, ensure_ascii=False)),
+                        **{f: getattr(panel, f) for f in Panel.FIELDS})
+    os.replace(tmp, STATE_PATH)
+
+
+def catch_up(cur, panel):
+    """Append trade dates newer than the checkpoint, or None if a full rebuild is needed.
+
+    The checkpoint is rejected when any of its dates disappeared from the DB or
+    their close count/sum changed (history revised), or when too many dates
+    arrived since (stale).
+    """
+    cur.execute("""
+        SELECT trade_date,
+            COUNT(close) FILTER (WHERE close <> 'NaN'),
+            COALESCE(SUM(close) FILTER (WHERE close <> 'NaN'), 0)::float8
+        FROM market.daily_bars WHERE trade_date >= %s
+        GROUP BY trade_date ORDER BY trade_date
+    """, (panel.dates[0],))
+    db = cur.fetchall()
+    known = [r for r in db if r[0] <= panel.latest]
+    new_dates = [r[0] for r in db if r[0] > panel.latest]
+    if [r[0] for r in known] != panel.dates:
+        print("  ⚠️ Checkpoint dates no longer match the DB, rebuilding")
+        return None
+    counts = np.count_nonzero(~np.isnan(panel.close), axis=0)
+    sums = np.nansum(panel.close, axis=0)
+    for j, (td, n, total) in enumerate(known):
+        if n != counts[j] or not math.isclose(total, sums[j], rel_tol=1e-9):
+            print(f"  ⚠️ Bars for {td} were revised, rebuilding")
+            return None
+    if len(new_dates) > MAX_GAP:
+        print(f"  ⚠️ Checkpoint is {len(new_dates)} trade dates behind, rebuilding")
+        return None
+    if not new_dates:
+        return panel
+    return concat(panel, load_since(cur, panel.latest))
+
+
+def splice(prior, fresh, n, key='date'):
+    """Prior rows older than the first fresh row, then the fresh rows; last ``n`` kept."""
+    if fresh:
+        prior = [r for r in prior if r[key] < fresh[0][key]]
+    return (prior + fresh)[-n:]
@@ -0,0 +1,89 @@
+"""market.daily_stats: one rollup row per trade date, owned and maintained by the extractor.
+
+Advance/decline counts, trading value, 52-week extreme counts and MA20
+breadth are derived from the panel and upserted only for dates that are
+missing or whose aggregates changed.
+Extractors read sparklines and trailing averages back from the rollup.
+"""
+import math
+import numpy as np
+from breadth import ma_breadth
+from extremes import WINDOW
+
+DDL = """
+    CREATE TABLE IF NOT EXISTS market.daily_stats (
+        trade_date     date PRIMARY KEY,
+        up             integer NOT NULL,
+        down           integer NOT NULL,
+        flat           integer NOT NULL,
+        trading_value  float8  NOT NULL,  -- Σ close×volume (KRW), traded bars with close > 0
+        new_highs      integer NOT NULL,
+        new_lows       integer NOT NULL,
+        above_ma20_pct float8  NOT NULL,
+        updated_at     timestamptz NOT NULL DEFAULT now()
+    )
+"""
+COLUMNS = ('up', 'down', 'flat', 'trading_value', 'new_highs', 'new_lows', 'above_ma20_pct')
+HISTORY = WINDOW - 1  # panel columns needed before a date for its 52-week extremes to be complete
+
+
+def compute(panel):
+    """{trade_date: aggregates} for every panel date.
+
+    The first HISTORY dates lack a full 52-week look-back: their extreme
+    counts are 0 (extremes.detect never flags them).
+    """
+    highs = panel.extremes.high.sum(axis=0)
+    lows = panel.extremes.low.sum(axis=0)
+    up, down, flat = panel.advance_decline
+    tv = panel.trading_value() * 1e12
+    above = ma_breadth(panel, windows=(20,))[20]
+    out = {}
+    for j, td in enumerate(panel.dates):
+        out[td] = {'up': int(up[j]), 'down': int(down[j]), 'flat': int(flat[j]),
+                   'trading_value': float(tv[j]), 'new_highs': int(highs[j]), 'new_lows': int(lows[j]),
+                   'above_ma20_pct': round(float(above[j]), 4)}
+    return out
+
+
+def _same(a, b):
+    return all(math.isclose(a[c], b[c], rel_tol=1e-9, abs_tol=1e-9) for c in COLUMNS)
+
+
+def sync(cur, panel):
+    """Create the rollup if needed and upsert missing/changed dates; returns the number written.
+
+    Dates without a full look-back in ``panel`` are only inserted when
+    missing, so a stored row computed from a longer history is kept.
+    The caller commits.
+    """
+    from psycopg2.extras import execute_values
+    cur.execute(DDL)
+    fresh = compute(panel)
+    if not fresh:
+        return 0
+    partial = set(panel.dates[:HISTORY])
+    have = read(cur, min(fresh), max(fresh))
+    rows = [(td, *(v[c] for c in COLUMNS)) for td, v in fresh.items()
+            if td not in have or (td not in partial and not _same(have[td], v))]
+    if rows:
+        execute_values(cur, f"""
+            INSERT INTO market.daily_stats (trade_date, {', '.join(COLUMNS)}) VALUES %s
+            ON CONFLICT (trade_date) DO UPDATE SET
+                {', '.join(f'{c} = EXCLUDED.{c}' for c in COLUMNS)}, updated_at = now()
+        """, rows)
+    return len(rows)
+
+
+def read(cur, start, end):
+    """Rollup rows for ``start``–``end`` as {trade_date: {column: value}}, ascending."""
+    cur.execute(f"""
+        SELECT trade_date, {', '.join(COLUMNS)} FROM market.daily_stats
+        WHERE trade_date >= %s AND trade_date <= %s ORDER BY trade_date
+    """, (start, end))
+    return {r[0]: dict(zip(COLUMNS, r[1:])) for r in cur.fetchall()}
+
+
+def trailing(stats, column, n):
+    """Last ``n`` values of ``column`` as an array (oldest first)."""
+    return np.array([row[column] for row in list(stats.values())[-n:]], dtype=float)
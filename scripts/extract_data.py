@@ -1,180 +1,208 @@
 #!/usr/bin/env python3
 """Extract market data from PostgreSQL → static JSON for Chloe's Market Daily v2."""
-import json, os, sys
+import json, os, re, time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date, timedelta
-from decimal import Decimal
-import math
+import numpy as np
 import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
-import yfinance as yf
-from pykrx import stock as pykrx_stock
-
-load_dotenv('/Users/home_mac_mini/.openclaw/workspace/kospi200_etl/.env')
+from panel import load_panel, load_range
+from copyload import copy_columns
+from jsonout import columnar, publish, unpublish, update_meta
+from archive import Archive
+from barstore import BarStore
+from breadth import ma_breadth
+from indexcalc import BASE, UNIVERSES, IndexBars, load_universes, reconstruct
+from rolling import sma
+from screens import SCREENS, evaluate, rank, sorts
+import daily_stats
+import regime
+from membership import build_membership, group_returns
+from checkpoint import load_checkpoint, save_checkpoint, catch_up, splice
+from scheduler import Scheduler
+from source_cache import SourceCache, CacheMiss
+from sources import DataSources
+import profiler
+
+ETL_DIR = '/Users/home_mac_mini/.openclaw/workspace/kospi200_etl'
+load_dotenv(os.path.join(ETL_DIR, '.env'))
 
 OUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'public', 'data')
-os.makedirs(OUT_DIR, exist_ok=True)
-
-def get_conn():
-    return psycopg2.connect(
+HISTORY_DIR = os.path.join(OUT_DIR, 'history')  # --from/--to backfill: history/<date>/*.json
+source_cache = SourceCache()
+FLOW_DAYS = 20         # investor-flow.json window
+REGIME_FLOW_DAYS = regime.FLOW_DAYS  # regime foreign-flow window
+REGIME_HISTORY = 60    # market-regime.json history (trade dates)
+THEMES_PATH = os.getenv('NAVER_THEMES_PATH', os.path.join(ETL_DIR, 'naver_theme_stocks.json'))
+CLASSIFICATIONS_PATH = os.getenv('STOCK_CLASSIFICATIONS_PATH', os.path.join(ETL_DIR, 'stock_classifications.json'))
+PROFILE_PATH = os.path.join(os.path.dirname(__file__), '.cache', 'profile.json')
+
+def _conn_params():
+    return dict(
         host=os.getenv('PGHOST'), port=os.getenv('PGPORT'),
         dbname=os.getenv('PGDATABASE'), user=os.getenv('PGUSER'),
         password=os.getenv('PGPASSWORD')
     )
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, o):
-        if isinstance(o, Decimal):
-            f = float(o)
-            return None if (math.isnan(f) or math.isinf(f)) else f
-        if isinstance(o, (date, datetime)):
-            return o.isoformat()
-        if isinstance(o, float) and (math.isnan(o) or math.isinf(o)):
-            return None
-        return super().default(o)
-
-def _sanitize(obj):
-    """Replace NaN/Infinity with None recursively."""
-    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
-        return None
-    if isinstance(obj, dict):
-        return {k: _sanitize(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [_sanitize(v) for v in obj]
-    return obj
-
-def save(name, data):
-    data = _sanitize(data)
-    path = os.path.join(OUT_DIR, name)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, cls=DecimalEncoder, ensure_ascii=False)
-    print(f"  ✅ {name} ({os.path.getsize(path):,} bytes)")
-
-def get_latest_trade_date(cur):
-    cur.execute("SELECT MAX(trade_date) FROM market.daily_bars")
-    return cur.fetchone()[0]
-
-def get_trade_dates(cur, n=60):
-    cur.execute(f"SELECT DISTINCT trade_date FROM market.daily_bars ORDER BY trade_date DESC LIMIT {n}")
-    return sorted([r[0] for r in cur.fetchall()])
+def get_conn():
+    return psycopg2.connect(**_conn_params())
+
+def get_pool(size, **kwargs):
+    return ThreadedConnectionPool(1, size, **_conn_params(), **kwargs)
+
+COLUMNAR = True  # --row-json keeps tables as lists of objects
+
+def table(rows, precision=None, shared=()):
+    """``rows`` in the columnar encoding (jsonout.columnar) unless --row-json."""
+    return columnar(rows, precision, shared) if COLUMNAR else rows
+
+class Output:
+    """One output directory and the manifest of files written to it this run (meta.json "files").
+
+    Extractors receive it from ``schedule``; a backfill date gets its own.
+    """
+
+    def __init__(self, out_dir=OUT_DIR):
+        self.dir = out_dir
+        self.files = {}  # file name → hashed copy
+        os.makedirs(out_dir, exist_ok=True)
+
+    def save(self, name, data):
+        entry = self.files[name] = publish(self.dir, name, data)
+        print(f"  ✅ {name} → {entry['file']} ({entry['size']:,} bytes{'' if entry['changed'] else ', unchanged'})")
 
 # ─── META ───
-def extract_meta(cur, latest):
-    save('meta.json', {
-        'dataDate': latest.isoformat(),
-        'buildTime': datetime.now().isoformat(),
-    })
+def extract_meta(out, panel):
+    """Write meta.json last: its ``files`` manifest points at this run's hashed outputs."""
+    _, size, _ = update_meta(out.dir, out.files,
+                             dataDate=panel.latest.isoformat(),
+                             buildTime=datetime.now().isoformat())
+    print(f"  ✅ meta.json ({size:,} bytes, {len(out.files)} files)")
 
-# ─── INDEX CHART DATA (real index via yfinance) ───
-def extract_index(cur, universe, latest, trade_dates):
-    """Fetch real KOSPI/KOSDAQ index data from Yahoo Finance."""
-    yahoo_ticker = '^KS11' if universe == 'KOSPI' else '^KQ11'
-    
-    # Fetch ~4 months to ensure 60 trading days
-    start_date = (latest - timedelta(days=120)).isoformat()
-    end_date = (latest + timedelta(days=1)).isoformat()
-    
-    print(f"  Fetching {yahoo_ticker} from Yahoo Finance ({start_date} ~ {end_date})...")
-    df = yf.download(yahoo_ticker, start=start_date, end=end_date, progress=False)
-    
-    if df.empty:
-        print(f"  ⚠️ No data from Yahoo Finance for {universe}, skipping")
-        return
-    
-    # Flatten MultiIndex columns if present
-    if hasattr(df.columns, 'levels') and df.columns.nlevels > 1:
-        df.columns = df.columns.get_level_values(0)
-    
+# ─── INDEX CHART DATA (reconstructed from constituents; yfinance as a cross-check) ───
+CANDLE_PRECISION = {'o': 2, 'h': 2, 'l': 2, 'c': 2, 'v': 1}
+INDEX_DAYS = 60
+
+def reconstruct_indices(cur, bars, panel):
+    """Cap-weighted KOSPI/KOSDAQ from constituents (indexcalc.py), weighted by the bar store's market caps.
+
+    Returns {universe: IndexBars row} for extract_index.
+    """
+    markets = reconstruct(panel, bars.field('market_cap', panel), load_universes(cur, panel))
+    return {u: IndexBars(*(f[g] for f in markets)) for g, u in enumerate(UNIVERSES)}
+
+def _yahoo_bars(sources, ticker, start, end):
+    """Yahoo Finance bars as [{'date', 'o', 'h', 'l', 'c', 'vol'}]; [] when unavailable."""
+    print(f"  Fetching {ticker} from Yahoo Finance ({start} ~ {end})...")
+    try:
+        df = sources.index_bars(ticker, start, end)
+    except CacheMiss as e:
+        print(f"  ⚠️ {e}")
+        return []
+    if df is None or df.empty:
+        return []
     # Filter out rows where OHLC are all 0 (incomplete data)
     df = df[(df['Open'] > 0) & (df['High'] > 0) & (df['Low'] > 0) & (df['Close'] > 0)]
-    
-    # Take last 60 trading days
-    df = df.tail(60)
-    
-    # Collect raw volumes first, then normalize to 0-1 scale
-    raw_rows = []
+    out = []
     for idx, row in df.iterrows():
         td = idx.date() if hasattr(idx, 'date') else idx
-        raw_rows.append((td, row))
+        out.append({'date': td.isoformat(), 'o': float(row['Open']), 'h': float(row['High']),
+                    'l': float(row['Low']), 'c': float(row['Close']), 'vol': float(row['Volume'])})
+    return out
+
+def extract_index(cur, out, universe, panel, sources, prior, indices):
+    """KOSPI/KOSDAQ candles from the cap-weighted reconstruction.
+
+    The level is anchored to the latest close known for an overlapping date:
+    Yahoo Finance (``^KS11``/``^KQ11``, also reported as tracking error) or,
+    offline, ``prior`` — the bars from the last checkpoint (None for a full run).
+    ``indices`` is the reconstruct_indices result. Returns the bars
+    for the next checkpoint.
+    """
+    latest = panel.latest
+    rec = indices[universe]
+    yahoo_ticker = '^KS11' if universe == 'KOSPI' else '^KQ11'
+    start = date.fromisoformat(prior[-1]['date']) + timedelta(days=1) if prior else latest - timedelta(days=120)
+    yahoo = _yahoo_bars(sources, yahoo_ticker, start, latest) if start <= latest else []
+
+    dates = [d.isoformat() for d in panel.dates]
+    reference = {b['date']: b['c'] for b in (prior or []) + yahoo}
+    anchor = [j for j, d in enumerate(dates) if d in reference and rec.count[j] > 0]
+    scale = reference[dates[anchor[-1]]] / rec.close[anchor[-1]] if anchor else 1.0
+    if not anchor:
+        print(f"  ⚠️ No {yahoo_ticker} close to anchor {universe}, using base {BASE:g} at {dates[0]}")
+
+    quoted = {b['date']: b['c'] for b in yahoo}
+    checked = [j for j in range(1, len(dates)) if dates[j] in quoted and dates[j - 1] in quoted]
+    if checked:
+        ours = rec.close[checked] / rec.close[[j - 1 for j in checked]] - 1
+        theirs = np.array([quoted[dates[j]] / quoted[dates[j - 1]] - 1 for j in checked])
+        print(f"  🔎 {universe} vs {yahoo_ticker}: tracking error {np.std(ours - theirs) * 1e4:.1f}bp/day "
+              f"over {len(checked)} days")
+
+    bars = [{'date': dates[j], 'o': float(rec.open[j] * scale), 'h': float(rec.high[j] * scale),
+             'l': float(rec.low[j] * scale), 'c': float(rec.close[j] * scale), 'vol': float(rec.volume[j])}
+            for j in range(len(dates)) if rec.count[j] > 0][-INDEX_DAYS:]
+    if not bars:
+        print(f"  ⚠️ No constituents priced for {universe}, skipping")
+        return prior
     
-    raw_volumes = sorted([float(r[1]['Volume']) for r in raw_rows if r[1]['Volume'] > 0])
+    # Collect raw volumes first, then normalize to 0-1 scale
+    raw_volumes = sorted([b['vol'] for b in bars if b['vol'] > 0])
     # Use 90th percentile as reference to avoid outlier distortion
     max_vol = raw_volumes[int(len(raw_volumes) * 0.9)] if raw_volumes else 1
     max_vol = max(max_vol, 1)
     
     candles = []
-    for td, row in raw_rows:
-        vol = float(row['Volume'])
+    for b in bars:
+        td = date.fromisoformat(b['date'])
+        vol = b['vol']
         candles.append({
             'd': td.strftime('%m%d'),
-            'date': td.isoformat(),
-            'o': round(float(row['Open']), 2),
-            'h': round(float(row['High']), 2),
-            'l': round(float(row['Low']), 2),
-            'c': round(float(row['Close']), 2),
+            'date': b['date'],
+            'o': round(b['o'], 2),
+            'h': round(b['h'], 2),
+            'l': round(b['l'], 2),
+            'c': round(b['c'], 2),
             'v': round(min(vol / max_vol, 3.0), 1) if vol > 0 else None,
         })
     
-    # Compute MA20 / MA60
+    # Compute MA20 / MA60 (leading windows are truncated)
     closes = [c['c'] for c in candles]
-    ma20 = []
-    ma60 = []
-    for i in range(len(closes)):
-        ma20.append(round(sum(closes[max(0,i-19):i+1]) / min(20, i+1), 2))
-        ma60.append(round(sum(closes[max(0,i-59):i+1]) / min(60, i+1), 2))
+    ma20 = [round(float(v), 2) for v in sma(closes, 20)]
+    ma60 = [round(float(v), 2) for v in sma(closes, 60)]
     
     fname = f"index-{'kospi' if universe == 'KOSPI' else 'kosdaq'}.json"
-    save(fname, {'candles': candles, 'ma20': ma20, 'ma60': ma60})
+    out.save(fname, {'candles': table(candles, CANDLE_PRECISION), 'ma20': ma20, 'ma60': ma60})
+    return bars
+
+# ─── DAILY STATS ROLLUP ───
+def load_stats(cur, panel):
+    """market.daily_stats rows over the panel's dates (synced before the run)."""
+    return daily_stats.read(cur, panel.dates[0], panel.latest)
 
 # ─── MARKET SUMMARY (Level 1) ───
-def extract_market_summary(cur, latest, trade_dates):
-    recent_7 = trade_dates[-7:]
+def extract_market_summary(cur, out, panel, stats):
+    latest = panel.latest
     
-    # 상승/하락/보합 for latest + sparkline
+    # 상승/하락/보합 for latest + sparkline (from the daily_stats rollup)
     summary_spark = []
-    for td in recent_7:
-        cur.execute("""
-            SELECT 
-                COUNT(*) FILTER (WHERE b.close > prev.close) as up,
-                COUNT(*) FILTER (WHERE b.close < prev.close) as down,
-                COUNT(*) FILTER (WHERE b.close = prev.close) as flat
-            FROM market.daily_bars b
-            JOIN LATERAL (
-                SELECT close FROM market.daily_bars p 
-                WHERE p.ticker = b.ticker AND p.trade_date < %s 
-                ORDER BY p.trade_date DESC LIMIT 1
-            ) prev ON true
-            WHERE b.trade_date = %s AND b.volume > 0 AND b.volume IS NOT NULL
-        """, (td, td))
-        row = cur.fetchone()
-        # Compute trading value separately (no LATERAL needed)
-        cur.execute("""
-            SELECT COALESCE(SUM(close * volume) / 1e12, 0)
-            FROM market.daily_bars
-            WHERE trade_date = %s AND volume > 0 AND close > 0
-        """, (td,))
-        tv_row = cur.fetchone()
-        if row:
-            up, down, flat = int(row[0] or 0), int(row[1] or 0), int(row[2] or 0)
-            tv = round(float(tv_row[0] if tv_row and tv_row[0] else 0), 1)
-            adr = round(up / max(down, 1), 2)
-            summary_spark.append({
-                'date': td.isoformat(),
-                'up': up, 'down': down, 'flat': flat,
-                'adr': adr, 'tradingValue': tv,
-            })
+    for td, s in list(stats.items())[-7:]:
+        summary_spark.append({
+            'date': td.isoformat(),
+            'up': s['up'], 'down': s['down'], 'flat': s['flat'],
+            'adr': round(s['up'] / max(s['down'], 1), 2),
+            'tradingValue': round(s['trading_value'] / 1e12, 1),
+        })
     
     latest_data = summary_spark[-1] if summary_spark else {}
     
     # 20일 평균 거래대금
-    cur.execute("""
-        SELECT AVG(daily_tv) FROM (
-            SELECT trade_date, SUM(close * volume) / 1e12 as daily_tv
-            FROM market.daily_bars 
-            WHERE trade_date >= %s - interval '40 days' AND volume > 0
-            GROUP BY trade_date ORDER BY trade_date DESC LIMIT 20
-        ) sub
-    """, (latest,))
-    avg_tv_20 = float(cur.fetchone()[0] or 0)
+    recent = [s['trading_value'] / 1e12 for td, s in stats.items() if td > latest - timedelta(days=40)][-20:]
+    avg_tv_20 = float(np.mean(recent)) if recent else 0
     tv_ratio = round(latest_data.get('tradingValue', 0) / max(avg_tv_20, 0.01), 2)
     
     # Signal logic
@@ -182,7 +210,7 @@ def extract_market_summary(cur, latest, trade_dates):
     adr_signal = 'green' if adr >= 1.2 else ('red' if adr < 0.8 else 'yellow')
     tv_signal = 'green' if tv_ratio >= 1.2 else ('red' if tv_ratio < 0.8 else 'yellow')
     
-    save('market-summary.json', {
+    out.save('market-summary.json', {
         'date': latest.isoformat(),
         'latest': latest_data,
         'sparkline': summary_spark,
@@ -193,64 +221,51 @@ def extract_market_summary(cur, latest, trade_dates):
             'tradingValue': tv_signal,
         }
     })
+    return summary_spark
 
 # ─── BREADTH (Level 2) ───
-def extract_breadth(cur, latest, trade_dates):
-    recent_30 = trade_dates[-30:]
+BREADTH_PRECISION = {'aboveMa20Pct': 1, 'aboveMa50Pct': 1, 'aboveMa200Pct': 1,
+                     'newHighs': 0, 'newLows': 0, 'spread': 0}
+
+def extract_breadth(cur, out, panel, prior, stats):
+    after = prior[-1]['date'] if prior else ''
+    recent_30 = [td for td in panel.trade_dates(30) if td.isoformat() > after]
+    if not recent_30:
+        out.save('breadth.json', table(prior, BREADTH_PRECISION))
+        return prior
+    
+    # 50/200일선 위 종목 비율 (20일선, 신고가/신저가 수는 daily_stats)
+    above = ma_breadth(panel, windows=(50, 200), start=panel.col[recent_30[0]])
     
     breadth_data = []
     for td in recent_30:
-        # 20일선 위 종목 비율
-        cur.execute("""
-            WITH stock_ma AS (
-                SELECT b.ticker, b.close,
-                    AVG(b2.close) as ma20
-                FROM market.daily_bars b
-                JOIN market.daily_bars b2 ON b2.ticker = b.ticker 
-                    AND b2.trade_date <= %s 
-                    AND b2.trade_date > %s - interval '30 days'
-                WHERE b.trade_date = %s AND b.volume > 0
-                GROUP BY b.ticker, b.close
-                HAVING COUNT(b2.*) >= 15
-            )
-            SELECT 
-                COUNT(*) FILTER (WHERE close > ma20) as above,
-                COUNT(*) as total
-            FROM stock_ma
-        """, (td, td, td))
-        row = cur.fetchone()
-        above_pct = round(100 * int(row[0] or 0) / max(int(row[1] or 1), 1), 1) if row else 0
-        
-        # 신고가/신저가 수
-        cur.execute("""
-            SELECT 
-                COUNT(*) FILTER (WHERE extreme_type = 'high') as highs,
-                COUNT(*) FILTER (WHERE extreme_type = 'low') as lows
-            FROM market.weekly_52_extremes WHERE trade_date = %s
-        """, (td,))
-        hl_row = cur.fetchone()
-        highs = int(hl_row[0] or 0) if hl_row else 0
-        lows = int(hl_row[1] or 0) if hl_row else 0
-        
+        if td not in stats:  # rollup row not synced yet
+            continue
+        j = panel.col[td] - panel.col[recent_30[0]]
+        s = stats[td]
+        highs, lows = s['new_highs'], s['new_lows']
         breadth_data.append({
             'date': td.isoformat(),
-            'aboveMa20Pct': above_pct,
+            'aboveMa20Pct': round(float(s['above_ma20_pct']), 1),
+            'aboveMa50Pct': round(float(above[50][j]), 1),
+            'aboveMa200Pct': round(float(above[200][j]), 1),
             'newHighs': highs,
             'newLows': lows,
             'spread': highs - lows,
         })
+    breadth_data = splice(prior or [], breadth_data, 30)
     
-    save('breadth.json', breadth_data)
+    out.save('breadth.json', table(breadth_data, BREADTH_PRECISION))
+    return breadth_data
 
 # ─── THEMES (Level 2) ───
-def extract_themes(cur, latest):
+def extract_themes(cur, out, panel, prior=None):
+    """Theme/sector performance. ``prior`` maps trade dates to checkpointed theme ranks."""
+    latest = panel.latest
     # Load naver themes
-    themes_path = '/Users/home_mac_mini/.openclaw/workspace/kospi200_etl/naver_theme_stocks.json'
-    classifications_path = '/Users/home_mac_mini/.openclaw/workspace/kospi200_etl/stock_classifications.json'
-    
-    with open(themes_path, 'r') as f:
+    with open(THEMES_PATH, 'r') as f:
         naver_themes = json.load(f)
-    with open(classifications_path, 'r') as f:
+    with open(CLASSIFICATIONS_PATH, 'r') as f:
         stock_cls = json.load(f)
     
     # Build theme→tickers mapping
@@ -272,117 +287,64 @@ def extract_themes(cur, latest):
                 theme_tickers[name] = tickers
     
     # Get prev trade date
-    cur.execute("SELECT DISTINCT trade_date FROM market.daily_bars WHERE trade_date < %s ORDER BY trade_date DESC LIMIT 1", (latest,))
-    prev_date = cur.fetchone()[0]
+    prev_date = panel.dates[-2]
     
-    # Calculate theme performance
-    theme_scores = []
-    for theme_name, tickers in theme_tickers.items():
-        if len(tickers) < 3:
-            continue
-        placeholders = ','.join(['%s'] * len(tickers))
-        cur.execute(f"""
-            SELECT 
-                AVG(CASE WHEN b.close > 0 AND p.close > 0 THEN (b.close - p.close) / p.close * 100 END) as avg_return,
-                COUNT(*) FILTER (WHERE b.close > p.close) as up_count,
-                COUNT(*) as total
-            FROM market.daily_bars b
-            JOIN market.daily_bars p ON p.ticker = b.ticker AND p.trade_date = %s
-            WHERE b.trade_date = %s AND b.ticker IN ({placeholders})
-            AND b.volume > 0 AND b.volume IS NOT NULL
-        """, [prev_date, latest] + tickers)
-        row = cur.fetchone()
-        if row and row[0] is not None:
-            avg_ret = round(float(row[0]), 2)
-            up_count = int(row[1] or 0)
-            total = int(row[2] or 1)
-            sync_rate = round(100 * up_count / max(total, 1), 0)
-            
-            # Get top 3 stocks by return
-            cur.execute(f"""
-                SELECT u.name, round((b.close - p.close) / p.close * 100, 1) as ret
-                FROM market.daily_bars b
-                JOIN market.daily_bars p ON p.ticker = b.ticker AND p.trade_date = %s
-                LEFT JOIN market.universe_members u ON u.ticker = b.ticker 
-                    AND u.as_of_date = (SELECT MAX(as_of_date) FROM market.universe_members)
-                WHERE b.trade_date = %s AND b.ticker IN ({placeholders})
-                AND b.volume > 0
-                ORDER BY ret DESC LIMIT 3
-            """, [prev_date, latest] + tickers)
-            top_stocks = [r[0] or '' for r in cur.fetchall()]
-            
-            theme_scores.append({
-                'name': theme_name,
-                'changePercent': avg_ret,
-                'syncRate': sync_rate,
-                'stockCount': total,
-                'topStocks': top_stocks,
-            })
+    # Compile theme→ticker membership (3+ stocks) against the panel's tickers
+    members = build_membership({n: t for n, t in theme_tickers.items() if len(t) >= 3}, panel.row)
     
-    # Phase 2: 거래대금 집중도 계산 (테마별 거래대금 / 전체 거래대금)
+    cur.execute("SELECT ticker, market_cap::float8 FROM market.market_caps WHERE trade_date = %s", (latest,))
+    market_cap = np.full(len(panel.tickers), np.nan)
+    for ticker, cap in cur.fetchall():
+        if ticker in panel.row:
+            market_cap[panel.row[ticker]] = cap
     cur.execute("""
-        SELECT COALESCE(SUM(close * volume), 0) FROM market.daily_bars
-        WHERE trade_date = %s AND volume > 0 AND close > 0
-    """, (latest,))
-    total_trade_val = float(cur.fetchone()[0] or 1)
-    
-    for ts in theme_scores:
-        tickers = theme_tickers.get(ts['name'], [])
-        if tickers:
-            placeholders = ','.join(['%s'] * len(tickers))
-            cur.execute(f"""
-                SELECT COALESCE(SUM(close * volume), 0)
-                FROM market.daily_bars
-                WHERE trade_date = %s AND ticker IN ({placeholders}) AND volume > 0
-            """, [latest] + tickers)
-            theme_tv = float(cur.fetchone()[0] or 0)
-            ts['tradingValueConc'] = round(theme_tv / total_trade_val * 100, 2)
-        else:
-            ts['tradingValueConc'] = 0
+        SELECT ticker, name FROM market.universe_members
+        WHERE as_of_date = (SELECT MAX(as_of_date) FROM market.universe_members)
+    """)
+    names = dict(cur.fetchall())
     
+    def theme_returns(j, k):
+        """Per-theme avg return, up count, joined count of column j vs. column k."""
+        return group_returns(members, panel.close[:, j], panel.close[:, k], panel.traded[:, j])
+    
+    # Calculate theme performance
+    ret, joined, avg_ret, up_count, total = theme_returns(-1, -2)
+    top3 = members.top_k(ret, 3, joined)
+    
+    # Phase 2: 거래대금 집중도 계산 (테마별 거래대금 / 전체 거래대금)
+    theme_tv = members.sum(panel.close[:, -1] * panel.volume[:, -1], panel.traded[:, -1])
+    total_trade_val = float(panel.trading_value()[-1] * 1e12) or 1
     # Phase 2: 테마별 시총 합계 (히트맵 size용)
-    for ts in theme_scores:
-        tickers = theme_tickers.get(ts['name'], [])
-        if tickers:
-            placeholders = ','.join(['%s'] * len(tickers))
-            cur.execute(f"""
-                SELECT COALESCE(SUM(market_cap), 0)
-                FROM market.market_caps
-                WHERE trade_date = %s AND ticker IN ({placeholders})
-            """, [latest] + tickers)
-            ts['totalMarketCap'] = round(float(cur.fetchone()[0] or 0), 0)
-        else:
-            ts['totalMarketCap'] = 0
+    theme_cap = members.sum(market_cap)
+    
+    theme_scores = []
+    for g, theme_name in enumerate(members.names):
+        if np.isnan(avg_ret[g]):
+            continue
+        theme_scores.append({
+            'name': theme_name,
+            'changePercent': round(float(avg_ret[g]), 2),
+            'syncRate': round(100 * int(up_count[g]) / max(int(total[g]), 1), 0),
+            'stockCount': int(total[g]),
+            'topStocks': [names.get(panel.tickers[i]) or '' for i in top3[g]],
+            'tradingValueConc': round(float(theme_tv[g]) / total_trade_val * 100, 2),
+            'totalMarketCap': round(float(theme_cap[g]), 0),
+        })
+    
+    def rank_themes(avg):
+        theme_rets = [(members.names[g], float(avg[g])) for g in range(len(members)) if not np.isnan(avg[g])]
+        theme_rets.sort(key=lambda x: x[1], reverse=True)
+        return {name: i + 1 for i, (name, _) in enumerate(theme_rets)}
     
     # Phase 2: prevRank 계산 (전일 기준 테마 순위)
-    prev_ranks = {}
-    cur.execute("SELECT DISTINCT trade_date FROM market.daily_bars WHERE trade_date < %s ORDER BY trade_date DESC LIMIT 1", (latest,))
-    prev2_row = cur.fetchone()
-    if prev2_row:
-        prev2_date = prev2_row[0]
-        # 전일 이전 거래일
-        cur.execute("SELECT DISTINCT trade_date FROM market.daily_bars WHERE trade_date < %s ORDER BY trade_date DESC LIMIT 1", (prev2_date,))
-        prev3_row = cur.fetchone()
-        if prev3_row:
-            prev3_date = prev3_row[0]
-            # 전일 테마 등락률 계산
-            prev_theme_rets = []
-            for theme_name, tickers in theme_tickers.items():
-                if len(tickers) < 3:
-                    continue
-                placeholders = ','.join(['%s'] * len(tickers))
-                cur.execute(f"""
-                    SELECT AVG(CASE WHEN b.close > 0 AND p.close > 0 THEN (b.close - p.close) / p.close * 100 END)
-                    FROM market.daily_bars b
-                    JOIN market.daily_bars p ON p.ticker = b.ticker AND p.trade_date = %s
-                    WHERE b.trade_date = %s AND b.ticker IN ({placeholders}) AND b.volume > 0
-                """, [prev3_date, prev2_date] + tickers)
-                row = cur.fetchone()
-                if row and row[0] is not None:
-                    prev_theme_rets.append((theme_name, float(row[0])))
-            prev_theme_rets.sort(key=lambda x: x[1], reverse=True)
-            for i, (name, _) in enumerate(prev_theme_rets):
-                prev_ranks[name] = i + 1
+    prev_key = prev_date.isoformat()
+    if prior and prev_key in prior:
+        prev_ranks = prior[prev_key]
+    elif len(panel.dates) >= 3:
+        # 전일 테마 등락률 계산
+        prev_ranks = rank_themes(theme_returns(-2, -3)[2])
+    else:
+        prev_ranks = {}
     
     # Sort by avg return
     theme_scores.sort(key=lambda x: x['changePercent'], reverse=True)
@@ -428,92 +390,110 @@ def extract_themes(cur, latest):
     # Bottom 10 (worst performing)
     bottom10 = theme_scores[-10:][::-1] if len(theme_scores) >= 10 else []
     
-    save('themes.json', {
+    out.save('themes.json', {
         'top10': theme_scores[:10],
         'bottom10': bottom10,
         'heatmap': heatmap,
         'total': len(theme_scores),
         'sectorPerformance': sector_performance,  # Phase 2: 섹터별 등락률
     })
+    return {prev_key: prev_ranks, latest.isoformat(): rank_themes(avg_ret)}
+
+# ─── SCANNERS (Level 3) ───
+SCANNER_PAGE = 50  # rows per page file and in the index's top list
+SCANNER_PRECISION = {'close': 0, 'changePct': 1, 'volume': 0, 'marketCap': 0}
+SCANNER_COLUMNS = [('ticker', 'S12'), ('name', 'S120'), ('market_cap', 'f8'), ('sector_name', 'S120')]
+
+def _scanner_info(cur, panel, rows):
+    """{ticker: (name, market cap, sector)} for panel ``rows`` in one lookup."""
+    cols = copy_columns(cur, """
+        SELECT t.ticker,
+            (SELECT um.name FROM market.universe_members um
+             WHERE um.ticker = t.ticker ORDER BY um.as_of_date DESC LIMIT 1) AS name,
+            mc.market_cap, mc.sector_name
+        FROM unnest(%s::text[]) AS t(ticker)
+        LEFT JOIN market.market_caps mc ON mc.ticker = t.ticker AND mc.trade_date = %s
+    """, ([str(t) for t in panel.tickers[rows]], panel.latest), SCANNER_COLUMNS)
+    return {t.decode('utf-8', 'ignore'): (n.decode('utf-8', 'ignore'), cap, sec.decode('utf-8', 'ignore'))
+            for t, n, cap, sec in zip(cols['ticker'], cols['name'], cols['market_cap'], cols['sector_name'])}
+
+def _num(v, digits=None):
+    if np.isnan(v):
+        return None
+    return round(float(v), digits) if digits is not None else float(v)
 
-# ─── SCANNER: 52-WEEK NEW HIGHS (Level 3) ───
-def extract_scanner_newhigh(cur, latest):
-    cur.execute("""
-        SELECT w.ticker, w.name, w.close, w.change_pct, w.volume,
-            mc.market_cap, mc.sector_name,
-            COALESCE(avg20.avg_vol, 0) as avg_vol_20d
-        FROM market.weekly_52_extremes w
-        LEFT JOIN market.market_caps mc ON mc.ticker = w.ticker AND mc.trade_date = %s
-        LEFT JOIN LATERAL (
-            SELECT AVG(sub.volume) as avg_vol FROM (
-                SELECT volume FROM market.daily_bars d
-                WHERE d.ticker = w.ticker AND d.trade_date < %s AND d.volume > 0
-                ORDER BY d.trade_date DESC LIMIT 20
-            ) sub
-        ) avg20 ON true
-        WHERE w.trade_date = %s AND w.extreme_type = 'high'
-        AND w.volume > 0 AND w.volume IS NOT NULL
-        ORDER BY mc.market_cap DESC NULLS LAST
-    """, (latest, latest, latest))
-    
-    rows = []
-    for r in cur.fetchall():
-        vol = float(r[4] or 0)
-        avg_vol = float(r[7] or 0)
-        vol_ratio = round(vol / avg_vol, 1) if avg_vol > 0 else None
-        rows.append({
-            'ticker': r[0],
-            'name': r[1] or '',
-            'close': float(r[2] or 0),
-            'changePct': round(float(r[3] or 0), 1),
-            'volume': vol,
-            'marketCap': round(float(r[5] or 0), 0) if r[5] else 0,
-            'sector': r[6] or '',
-            'volRatio': vol_ratio,  # Phase 2: 거래량 대비 20일 평균
-        })
-    
-    save('scanner-newhigh.json', rows)
+def _scanner_pages(out, name, rows, orders, precision):
+    """Publish ``rows`` in SCANNER_PAGE chunks per sort order; returns {sort key: [hashed page files]}.
 
-# ─── SCANNER: 52-WEEK NEW LOWS (Level 3) ───
-def extract_scanner_newlow(cur, latest):
-    cur.execute("""
-        SELECT w.ticker, w.name, w.close, w.change_pct, w.volume,
-            mc.market_cap, mc.sector_name
-        FROM market.weekly_52_extremes w
-        LEFT JOIN market.market_caps mc ON mc.ticker = w.ticker AND mc.trade_date = %s
-        WHERE w.trade_date = %s AND w.extreme_type = 'low'
-        AND w.volume > 0 AND w.volume IS NOT NULL
-        ORDER BY mc.market_cap DESC NULLS LAST
-    """, (latest, latest))
-    
-    rows = []
-    for r in cur.fetchall():
-        rows.append({
-            'ticker': r[0],
-            'name': r[1] or '',
-            'close': float(r[2] or 0),
-            'changePct': round(float(r[3] or 0), 1),
-            'volume': float(r[4] or 0),
-            'marketCap': round(float(r[5] or 0), 0) if r[5] else 0,
-            'sector': r[6] or '',
+    Pages left over from a day with more hits are removed.
+    """
+    pages, written = {}, set()
+    for key, order in orders.items():
+        pages[key] = []
+        for n, start in enumerate(range(0, len(order), SCANNER_PAGE), 1):
+            page = f'scanner-{name}.{key}.{n}.json'
+            chunk = [rows[i] for i in order[start:start + SCANNER_PAGE]]
+            pages[key].append(publish(out.dir, page, table(chunk, precision, ('sector',)))['file'])
+            written.add(page)
+    stale = re.compile(rf'scanner-{re.escape(name)}\.\w+\.\d+\.json')
+    for f in os.listdir(out.dir):
+        if stale.fullmatch(f) and f not in written:
+            unpublish(out.dir, f)
+    return pages
+
+def extract_scanners(cur, out, panel):
+    """Every registered screen (screens.py) in one pass.
+
+    Each writes a small index, scanner-<name>.json (count, sector histogram,
+    top SCANNER_PAGE by market cap, page files per sort), plus the pages.
+    """
+    latest, hits = evaluate(panel)
+    union = np.unique(np.concatenate([np.zeros(0, dtype=int), *hits.values()]))
+    info = _scanner_info(cur, panel, union)
+    for i in union:
+        latest.market_cap[i] = info.get(str(panel.tickers[i]), ('', np.nan, ''))[1]
+
+    for screen in SCREENS:
+        rows = {}
+        for i in hits[screen.name]:
+            ticker = str(panel.tickers[i])
+            name, cap, sector = info.get(ticker, ('', np.nan, ''))
+            row = {
+                'ticker': ticker,
+                'name': name,
+                'close': float(np.nan_to_num(latest.close[i])),
+                'changePct': round(float(np.nan_to_num(latest.change_pct[i])), 1),
+                'volume': float(np.nan_to_num(latest.volume[i])),
+                'marketCap': round(float(cap), 0) if cap > 0 else 0,
+                'sector': sector,
+            }
+            for key, (column, digits) in screen.fields.items():
+                row[key] = _num(getattr(latest, column)[i], digits)
+            rows[i] = row
+        orders = {key: rank(latest, hits[screen.name], column, desc) for key, (column, desc) in sorts(screen).items()}
+        precision = {**SCANNER_PRECISION, **{k: d for k, (_, d) in screen.fields.items() if d is not None}}
+        pages = _scanner_pages(out, screen.name, rows, orders, precision)
+        sectors = Counter(row['sector'] or '기타' for row in rows.values())
+        out.save(f'scanner-{screen.name}.json', {
+            'count': len(rows),
+            'pageSize': SCANNER_PAGE,
+            'sectors': dict(sectors.most_common()),
+            'top': table([rows[i] for i in orders['marketCap'][:SCANNER_PAGE]], precision, ('sector',)),
+            'order': {key: 'desc' if desc else 'asc' for key, (_, desc) in sorts(screen).items()},
+            'pages': pages,
         })
-    
-    save('scanner-newlow.json', rows)
+    return {name: len(rows) for name, rows in hits.items()}
 
 # ─── INVESTOR FLOW (Phase 3) ───
-def extract_investor_flow(cur, latest, trade_dates):
+def extract_investor_flow(cur, out, panel, sources):
     """외국인/기관 수급 데이터 수집 (pykrx)."""
-    recent_20 = trade_dates[-20:]
-    fmt = lambda d: d.strftime('%Y%m%d')
-
-    start_str = fmt(recent_20[0])
-    end_str = fmt(recent_20[-1])
+    recent_20 = panel.trade_dates(FLOW_DAYS)
 
     result = {'kospi': [], 'kosdaq': []}
 
     for market, key in [('KOSPI', 'kospi'), ('KOSDAQ', 'kosdaq')]:
         try:
-            df_val = pykrx_stock.get_market_trading_value_by_date(start_str, end_str, market)
+            df_val = sources.trading_value(market, recent_20[0], recent_20[-1])
             if df_val.empty:
                 continue
             for idx, row in df_val.iterrows():
@@ -528,179 +508,238 @@ def extract_investor_flow(cur, latest, trade_dates):
         except Exception as e:
             print(f"  ⚠️ Investor flow {market} error: {e}")
 
-    save('investor-flow.json', result)
+    out.save('investor-flow.json', result)
+    return result
 
 
 # ─── MARKET REGIME (Phase 3) ───
-def extract_market_regime(cur, latest, trade_dates, breadth_data=None):
-    """시장 체온 종합 점수 계산.
-    Components (0-100 each, weighted):
-      - ADR (20%): advance/decline ratio
-      - Breadth (20%): % above MA20
-      - New High/Low spread (15%)
-      - Trading value vs 20d avg (15%)
-      - Foreign flow (15%): 5-day cumulative
-      - Volatility (15%): inverse of recent volatility
+REGIME_PRECISION = dict.fromkeys(('composite',) + regime.COMPONENTS, 1)
+
+def extract_market_regime(cur, out, panel, sources, stats):
+    """시장 체온 종합 점수 (regime.py) for the last REGIME_HISTORY trade dates in one pass.
+
+    ``stats`` is the daily_stats rollup; foreign flow is one KOSPI pykrx pull
+    covering every date's 5-day window. The latest date's scores stay at the
+    top level; ``history`` holds every date's.
     """
-    # Get latest summary data
-    cur.execute("""
-        SELECT 
-            COUNT(*) FILTER (WHERE b.close > prev.close),
-            COUNT(*) FILTER (WHERE b.close < prev.close)
-        FROM market.daily_bars b
-        JOIN LATERAL (
-            SELECT close FROM market.daily_bars p 
-            WHERE p.ticker = b.ticker AND p.trade_date < %s 
-            ORDER BY p.trade_date DESC LIMIT 1
-        ) prev ON true
-        WHERE b.trade_date = %s AND b.volume > 0
-    """, (latest, latest))
-    row = cur.fetchone()
-    up, down = int(row[0] or 0), int(row[1] or 0)
-    adr = up / max(down, 1)
-
-    # ADR score: 0.5→0, 1.0→50, 2.0→100
-    adr_score = min(max((adr - 0.5) / 1.5 * 100, 0), 100)
-
-    # Breadth: % above MA20
-    cur.execute("""
-        WITH stock_ma AS (
-            SELECT b.ticker, b.close, AVG(b2.close) as ma20
-            FROM market.daily_bars b
-            JOIN market.daily_bars b2 ON b2.ticker = b.ticker 
-                AND b2.trade_date <= %s AND b2.trade_date > %s - interval '30 days'
-            WHERE b.trade_date = %s AND b.volume > 0
-            GROUP BY b.ticker, b.close HAVING COUNT(b2.*) >= 15
-        )
-        SELECT COUNT(*) FILTER (WHERE close > ma20), COUNT(*) FROM stock_ma
-    """, (latest, latest, latest))
-    br = cur.fetchone()
-    breadth_pct = 100 * int(br[0] or 0) / max(int(br[1] or 1), 1)
-    breadth_score = min(max(breadth_pct, 0), 100)
-
-    # New High/Low spread score
-    cur.execute("""
-        SELECT 
-            COUNT(*) FILTER (WHERE extreme_type = 'high'),
-            COUNT(*) FILTER (WHERE extreme_type = 'low')
-        FROM market.weekly_52_extremes WHERE trade_date = %s
-    """, (latest,))
-    hl = cur.fetchone()
-    highs, lows = int(hl[0] or 0), int(hl[1] or 0)
-    hl_ratio = highs / max(highs + lows, 1)
-    hl_score = hl_ratio * 100
-
-    # Trading value ratio
-    cur.execute("""
-        SELECT SUM(close * volume) / 1e12 FROM market.daily_bars
-        WHERE trade_date = %s AND volume > 0
-    """, (latest,))
-    tv_today = float(cur.fetchone()[0] or 0)
-    cur.execute("""
-        SELECT AVG(daily_tv) FROM (
-            SELECT trade_date, SUM(close * volume) / 1e12 as daily_tv
-            FROM market.daily_bars WHERE trade_date <= %s AND volume > 0 
-              AND volume IS NOT NULL AND volume != 'NaN' AND close > 0
-            GROUP BY trade_date ORDER BY trade_date DESC LIMIT 20
-        ) sub WHERE daily_tv IS NOT NULL AND daily_tv != 'NaN'
-    """, (latest,))
-    tv_avg_row = cur.fetchone()
-    tv_avg = float(tv_avg_row[0]) if tv_avg_row and tv_avg_row[0] and not math.isnan(float(tv_avg_row[0])) else 0
-    tv_ratio = tv_today / max(tv_avg, 0.01) if tv_today and tv_avg else 1.0
-    # 0.5→0, 1.0→50, 1.5→100
-    tv_score = min(max((tv_ratio - 0.5) * 100, 0), 100)
-
-    # Foreign flow: 5-day cumulative (pykrx)
-    recent_5 = trade_dates[-5:]
-    foreign_score = 50  # default neutral
+    dates = panel.trade_dates(REGIME_HISTORY + REGIME_FLOW_DAYS - 1)
+    foreign = None
     try:
-        df = pykrx_stock.get_market_trading_value_by_date(
-            recent_5[0].strftime('%Y%m%d'), recent_5[-1].strftime('%Y%m%d'), 'KOSPI')
+        df = sources.trading_value('KOSPI', dates[0], dates[-1])
         if not df.empty:
-            cum_foreign = float(df['외국인합계'].sum()) / 1e8  # 억원
-            # Normalize: -5000억→0, 0→50, +5000억→100
-            foreign_score = min(max((cum_foreign / 5000 + 1) * 50, 0), 100)
-    except:
+            foreign = {ts.date(): float(v) / 1e8 for ts, v in df['외국인합계'].items()}  # 억원
+    except Exception:
         pass
 
-    # Volatility (inverse): low vol = bullish
-    cur.execute("""
-        SELECT STDDEV(daily_ret) FROM (
-            SELECT (close - prev_c) / NULLIF(prev_c, 0) * 100 as daily_ret FROM (
-                SELECT close, LAG(close) OVER (ORDER BY trade_date) as prev_c
-                FROM (SELECT trade_date, AVG(close) as close FROM market.daily_bars 
-                      WHERE trade_date >= %s - interval '20 days' AND trade_date <= %s AND volume > 0
-                      GROUP BY trade_date ORDER BY trade_date) sub
-            ) sub2 WHERE prev_c IS NOT NULL
-        ) sub3
-    """, (latest, latest))
-    vol_row = cur.fetchone()
-    volatility = float(vol_row[0] or 1) if vol_row and vol_row[0] else 1
-    # Low vol (0.5) → 100, High vol (3.0) → 0
-    vol_score = min(max((3.0 - volatility) / 2.5 * 100, 0), 100)
-
-    # Weighted composite
-    weights = {'adr': 0.20, 'breadth': 0.20, 'hlSpread': 0.15, 'tradingValue': 0.15, 'foreignFlow': 0.15, 'volatility': 0.15}
-    components = {
-        'adr': round(adr_score, 1),
-        'breadth': round(breadth_score, 1),
-        'hlSpread': round(hl_score, 1),
-        'tradingValue': round(tv_score, 1),
-        'foreignFlow': round(foreign_score, 1),
-        'volatility': round(vol_score, 1),
-    }
-    composite = sum((components[k] or 50) * weights[k] for k in weights)
-
-    # Regime label
-    if composite >= 70:
-        regime = 'risk-on'
-        label = '🟢 Risk-On (강세)'
-    elif composite >= 55:
-        regime = 'neutral-bullish'
-        label = '🟡 중립-강세'
-    elif composite >= 45:
-        regime = 'neutral'
-        label = '⚪ 중립'
-    elif composite >= 30:
-        regime = 'neutral-bearish'
-        label = '🟠 중립-약세'
-    else:
-        regime = 'risk-off'
-        label = '🔴 Risk-Off (약세)'
+    days, comp = regime.components(panel, stats, foreign)
+    days, scores = days[-REGIME_HISTORY:], regime.matrix(comp)[-REGIME_HISTORY:]
+    composite = regime.composite(scores)
+    labels = regime.classify(composite)
+    rows = [{
+        'date': d.isoformat(),
+        'composite': round(float(c), 1),
+        'regime': regime.REGIMES[k][0],
+        'label': regime.REGIMES[k][1],
+        **dict(zip(regime.COMPONENTS, map(float, s))),
+    } for d, c, k, s in zip(days, composite, labels, scores)]
+    if not rows:  # no daily_stats rows for the panel's dates
+        return
 
-    save('market-regime.json', {
-        'date': latest.isoformat(),
-        'composite': round(composite, 1),
-        'regime': regime,
-        'label': label,
-        'components': components,
-        'weights': weights,
+    latest = rows[-1]
+    out.save('market-regime.json', {
+        'date': latest['date'],
+        'composite': latest['composite'],
+        'regime': latest['regime'],
+        'label': latest['label'],
+        'components': {k: latest[k] for k in regime.COMPONENTS},
+        'weights': regime.WEIGHTS,
+        'history': table(rows, REGIME_PRECISION, shared=('regime', 'label')),
     })
 
 
 # ─── MAIN ───
-def main():
-    print("📊 Extracting market data...")
+def schedule(sched, out, bars, panel, sources, prior):
+    """Register every extractor writing to ``out`` (an Output); ``bars`` is the synced BarStore,
+    ``prior`` holds checkpointed rows ({} for a full run)."""
+    prior_index = prior.get('index', {})
+    sched.add('stats', load_stats, panel)
+    sched.add('indices', reconstruct_indices, bars, panel)
+    sched.add('index_kospi', extract_index, out, 'KOSPI', panel, sources, prior_index.get('KOSPI'), deps=('indices',))
+    sched.add('index_kosdaq', extract_index, out, 'KOSDAQ', panel, sources, prior_index.get('KOSDAQ'), deps=('indices',))
+    sched.add('summary', extract_market_summary, out, panel, deps=('stats',))
+    sched.add('breadth', extract_breadth, out, panel, prior.get('breadth'), deps=('stats',))
+    sched.add('themes', extract_themes, out, panel, prior.get('themeRanks'))
+    sched.add('scanners', extract_scanners, out, panel)
+    sched.add('flow', extract_investor_flow, out, panel, sources)
+    sched.add('regime', extract_market_regime, out, panel, sources, deps=('stats',))
+
+# ─── BACKFILL ───
+_backfill = {}  # per worker process: panel, connection pool, source windows
+
+def _init_backfill(panel, windows, end, offline, columnar):
+    global COLUMNAR
+    _backfill.update(panel=panel, bars=BarStore(), pool=get_pool(1), windows=windows, end=end)
+    source_cache.offline = offline
+    COLUMNAR = columnar
+
+def _backfill_date(day):
+    """Full output set for one trade date under history/<date>/ (runs in a worker process)."""
+    started = time.perf_counter()
+    out = Output(os.path.join(HISTORY_DIR, day.isoformat()))
+    panel = _backfill['panel'].as_of(day)
+    sources = DataSources(source_cache, _backfill['end'], _backfill['windows'])
+    sched = Scheduler(_backfill['pool'], 1)
+    schedule(sched, out, _backfill['bars'], panel, sources, {})
+    sched.run()
+    extract_meta(out, panel)
+    return day, time.perf_counter() - started
+
+def backfill(start, end, workers):
+    """Rebuild history/<date>/ for every trade date in ``start``–``end`` on a process pool.
+
+    The bars are loaded once and shipped to each worker, which slices the
+    panel a live run on that date would have seen. External series are
+    fetched here once for the whole range so workers only hit the disk cache.
+    """
     conn = get_conn()
+    with conn.cursor() as cur:
+        panel = load_range(cur, start, end)
+        written = daily_stats.sync(cur, panel)
+        bars = BarStore()
+        bars.update(cur)  # index weights (market caps) are read from the store by each worker
+    conn.commit()
+    conn.close()
+    days = [d for d in panel.dates if start <= d <= end]
+    if not days:
+        print(f"  ⚠️ No trade dates between {start} and {end}")
+        return
+    if bars.latest is None or days[0] < bars.dates[0].astype(object):
+        print(f"  ⚠️ Bar store starts after {days[0]}: earlier index candles have no market caps to weight by")
+    print(f"  Backfill: {len(days)} trade dates ({days[0]} ~ {days[-1]}), "
+          f"panel: {len(panel.tickers)} tickers × {len(panel.dates)} dates, "
+          f"daily_stats: {written} rows upserted")
+
+    first = panel.col[days[0]]
+    sources = DataSources(source_cache, days[-1])
+    for ticker in ('^KS11', '^KQ11'):
+        sources.register('yfinance', ticker, days[0] - timedelta(days=120), days[-1])
+    for market in ('KOSPI', 'KOSDAQ'):
+        sources.register('pykrx', market, panel.dates[max(first - FLOW_DAYS + 1, 0)], days[-1])
+    sources.register('pykrx', 'KOSPI', panel.dates[max(first - REGIME_HISTORY - REGIME_FLOW_DAYS + 2, 0)], days[-1])
+    for (source, key), e in sources.prefetch().items():
+        print(f"  ⚠️ {source} {key}: {e}")
+
+    with ProcessPoolExecutor(workers, initializer=_init_backfill,
+                             initargs=(panel, sources.windows, days[-1], source_cache.offline, COLUMNAR)) as ex:
+        for day, secs in ex.map(_backfill_date, days):
+            print(f"  📅 {day} ({secs:.1f}s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--incremental', action='store_true',
+                        help='compute only trade dates newer than the last checkpoint')
+    parser.add_argument('--offline', action='store_true',
+                        help='serve yfinance/pykrx responses from the local cache only')
+    parser.add_argument('--workers', type=int, default=6,
+                        help='extractors run concurrently (one DB connection each)')
+    parser.add_argument('--profile', nargs='?', const=PROFILE_PATH, metavar='PATH',
+                        help=f'time every SQL statement and write a ranking (default {PROFILE_PATH})')
+    parser.add_argument('--explain-over', type=float, metavar='MS',
+                        help='with --profile, capture EXPLAIN (ANALYZE, BUFFERS) for statements slower than MS')
+    parser.add_argument('--from', dest='start', type=date.fromisoformat,
+                        help='backfill history/<date>/ for trade dates from this date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='end', type=date.fromisoformat,
+                        help='last backfill date (default: --from)')
+    parser.add_argument('--row-json', action='store_true',
+                        help='write tables as lists of objects instead of the columnar encoding')
+    parser.add_argument('--from-db', action='store_true',
+                        help='load the bar panel from market.daily_bars instead of the local bar store (barstore.py); '
+                             'market caps still come from the store')
+    parser.add_argument('--no-archive', action='store_true',
+                        help='do not snapshot the outputs into the dated archive (archive.py)')
+    args = parser.parse_args(argv)
+    if args.end and not args.start:
+        parser.error('--to requires --from')
+    if args.start and args.incremental:
+        parser.error('--from cannot be combined with --incremental')
+    if args.start and args.profile:
+        parser.error('--profile is not supported for backfills')
+    if args.explain_over is not None and not args.profile:
+        parser.error('--explain-over requires --profile')
+    source_cache.offline = args.offline
+    global COLUMNAR
+    COLUMNAR = not args.row_json
+
+    if args.start:
+        print("📊 Backfilling market data...")
+        started = time.perf_counter()
+        backfill(args.start, args.end or args.start, args.workers)
+        print(f"✅ Backfill done! ({time.perf_counter() - started:.1f}s)")
+        return
+
+    print("📊 Extracting market data...")
+    started = time.perf_counter()
+    if args.profile:
+        profiler.log.explain_over = args.explain_over / 1000 if args.explain_over is not None else None
+        pool = get_pool(args.workers, cursor_factory=profiler.ProfilingCursor)
+    else:
+        pool = get_pool(args.workers)
+    conn = pool.getconn()
     cur = conn.cursor()
     
-    latest = get_latest_trade_date(cur)
-    trade_dates = get_trade_dates(cur, 60)
-    print(f"  Latest: {latest}, dates: {len(trade_dates)}")
-    
-    extract_meta(cur, latest)
-    extract_index(cur, 'KOSPI', latest, trade_dates)
-    extract_index(cur, 'KOSDAQ', latest, trade_dates)
-    extract_market_summary(cur, latest, trade_dates)
-    extract_breadth(cur, latest, trade_dates)
-    extract_themes(cur, latest)
-    extract_scanner_newhigh(cur, latest)
-    extract_scanner_newlow(cur, latest)
-    extract_investor_flow(cur, latest, trade_dates)
-    extract_market_regime(cur, latest, trade_dates)
+    bars = BarStore()
+    added = bars.update(cur)
+    print(f"  Bar store: {added} trade dates appended ({len(bars.dates)} stored)")
+    panel, prior = None, {}
+    state = load_checkpoint() if args.incremental else None
+    if state:
+        panel = catch_up(cur, state[0])
+        if panel is not None:
+            prior = state[1]
+            print(f"  Checkpoint: {state[0].latest} → {panel.latest}")
+    elif args.incremental:
+        print("  ⚠️ No usable checkpoint, running a full rebuild")
+    if panel is None and args.from_db:
+        panel = load_panel(cur)
+    elif panel is None:
+        panel = bars.panel()
+    written = daily_stats.sync(cur, panel)
+    conn.commit()
+    cur.close()
+    pool.putconn(conn)
+    print(f"  Latest: {panel.latest}, panel: {len(panel.tickers)} tickers × {len(panel.dates)} dates")
+    print(f"  daily_stats: {written} rows upserted")
+    
+    # One pykrx pull per market covers both investor flow and the regime score
+    sources = DataSources(source_cache, panel.latest)
+    for market in ('KOSPI', 'KOSDAQ'):
+        sources.register('pykrx', market, panel.trade_dates(FLOW_DAYS)[0], panel.latest)
+    sources.register('pykrx', 'KOSPI', panel.trade_dates(REGIME_HISTORY + REGIME_FLOW_DAYS - 1)[0], panel.latest)
+    
+    out = Output(OUT_DIR)
+    sched = Scheduler(pool, args.workers)
+    schedule(sched, out, bars, panel, sources, prior)
+    results = sched.run()
+    extract_meta(out, panel)
+    if not args.no_archive:
+        day, files, blobs = Archive().add(out.dir, panel.latest)
+        print(f"  🗄 Archived {day}: {files} files, {blobs} new blobs")
+    
+    save_checkpoint(panel, {
+        'index': {'KOSPI': results['index_kospi'], 'KOSDAQ': results['index_kosdaq']},
+        'breadth': results['breadth'],
+        'themeRanks': results['themes'],
+    })
     
-    conn.close()
-    print("✅ All data extracted!")
+    pool.closeall()
+    sched.report()
+    print(f"  🔌 External sources: {sources.fetches} fetched, {sources.saved} served from memory")
+    if args.profile:
+        os.makedirs(os.path.dirname(args.profile) or '.', exist_ok=True)
+        profiler.log.write(args.profile)
+        profiler.log.print_top()
+        print(f"  📝 SQL profile → {args.profile}")
+    print(f"✅ All data extracted! ({time.perf_counter() - started:.1f}s)")
 
 if __name__ == '__main__':
     main()
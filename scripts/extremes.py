@@ -0,0 +1,30 @@
+"""52-week new high/low detector over the bar panel (replaces reading market.weekly_52_extremes)."""
+from collections import namedtuple
+import numpy as np
+from rolling import count, rolling_max, rolling_min
+
+WINDOW = 252       # trading days in 52 weeks, the current bar included
+MIN_HISTORY = 20   # prior bars a ticker needs before it can print an extreme
+
+Extremes = namedtuple('Extremes', 'high low prior_high prior_low')
+Extremes.__doc__ = """ticker×date new-high/new-low flags and the prior 52-week high/low they broke."""
+
+
+def _shift(m):
+    return np.concatenate([np.full((m.shape[0], 1), np.nan), m[:, :-1]], axis=1)
+
+
+def detect(panel):
+    """Flags for every panel date in one pass.
+
+    A traded bar whose high (low) beats the highest high (lowest low) of the
+    previous ``WINDOW - 1`` bars is a new high (low). Dates without a full
+    window of panel history before them are never flagged.
+    """
+    prior = WINDOW - 1
+    prior_high = _shift(rolling_max(panel.high, prior))
+    prior_low = _shift(rolling_min(panel.low, prior))
+    ok = panel.traded & (_shift(count(panel.close, prior)) >= MIN_HISTORY)
+    ok &= np.arange(len(panel.dates)) >= prior
+    with np.errstate(invalid='ignore'):
+        return Extremes(ok & (panel.high > prior_high), ok & (panel.low < prior_low), prior_high, prior_low)
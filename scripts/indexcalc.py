@@ -0,0 +1,83 @@
+"""Cap-weighted index reconstruction from constituent bars and market caps.
+
+Each group (e.g. a market universe) is a chain-linked index: on every
+date, the members that traded on both days are weighted by their previous-day
+market cap, and each OHLC level is the previous close times the weighted mean
+of open/high/low/close over previous close. All groups come out of one pass of
+(group × ticker) · (ticker × date) products.
+
+Intraday highs/lows of constituents are not simultaneous, so the reconstructed
+high/low bound the true ones from outside; they are clipped to contain open
+and close.
+"""
+from collections import namedtuple
+import numpy as np
+from copyload import copy_columns
+
+BASE = 1000.0  # level on the panel's first date
+UNIVERSES = ('KOSPI', 'KOSDAQ')
+
+IndexBars = namedtuple('IndexBars', 'open high low close volume count')
+IndexBars.__doc__ = """group×date index levels, member volume (shares) and the number of constituents priced."""
+
+MEMBER_COLUMNS = [('ticker', 'S12'), ('universe', 'S16'), ('as_of_date', 'date')]
+
+
+def _group_sum(members, x):
+    """Per-group Σ over tickers of ``x`` (ticker×date); ``members`` is group×ticker or group×ticker×date."""
+    if members.ndim == 2:
+        return members.astype(float) @ x
+    return np.einsum('gtd,td->gd', members, x)
+
+
+def _shift(m):
+    return np.concatenate([np.full((m.shape[0], 1), np.nan), m[:, :-1]], axis=1)
+
+
+def reconstruct(panel, caps, members, base=BASE):
+    """:class:`IndexBars` for every group in ``members`` over the panel's dates.
+
+    ``caps`` is a ticker×date market cap matrix aligned to ``panel``; a missing
+    previous-day cap drops the ticker for that date.
+    """
+    prev = panel.prev_close
+    w = _shift(caps)
+    with np.errstate(invalid='ignore'):
+        ok = panel.traded & (prev > 0) & (panel.close > 0) & (w > 0)
+    w = np.where(ok, w, 0)
+    den = _group_sum(members, w)
+    ratio = {}
+    for f in ('open', 'high', 'low', 'close'):
+        px = getattr(panel, f)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = np.where(ok, np.where(px > 0, px, panel.close) / prev, 0)
+            ratio[f] = np.where(den > 0, _group_sum(members, w * r) / den, 1.0)
+
+    close = base * np.cumprod(ratio['close'], axis=1)
+    level = np.concatenate([np.full((close.shape[0], 1), base), close[:, :-1]], axis=1)
+    open_ = level * ratio['open']
+    high = np.maximum.reduce([level * ratio['high'], open_, close])
+    low = np.minimum.reduce([level * ratio['low'], open_, close])
+    volume = _group_sum(members, np.where(panel.traded, panel.volume, 0))
+    count = np.rint(_group_sum(members, ok.astype(float))).astype(int)
+    return IndexBars(open_, high, low, close, volume, count)
+
+
+def load_universes(cur, panel, universes=UNIVERSES):
+    """universe×ticker×date membership: each date uses the latest universe_members snapshot on or before it
+    (the first snapshot for earlier dates)."""
+    cols = copy_columns(cur, """
+        SELECT ticker, universe, as_of_date FROM market.universe_members WHERE universe = ANY(%s)
+    """, (list(universes),), MEMBER_COLUMNS)
+    out = np.zeros((len(universes), len(panel.tickers), len(panel.dates)), dtype=bool)
+    rows = np.array([panel.row.get(t.decode('utf-8'), -1) for t in cols['ticker']], dtype=int)
+    for g, name in enumerate(universes):
+        sel = (cols['universe'] == name.encode()) & (rows >= 0)
+        snaps, s = np.unique(cols['as_of_date'][sel], return_inverse=True)
+        if not len(snaps):
+            continue
+        held = np.zeros((len(panel.tickers), len(snaps)), dtype=bool)
+        held[rows[sel], s] = True
+        idx = np.maximum(np.searchsorted(snaps, panel.days, 'right') - 1, 0)
+        out[g] = held[:, idx]
+    return out
@@ -0,0 +1,233 @@
+"""Output writer shared by both extract scripts.
+
+The encoder writes NaN/Infinity as null and resolves Decimal, date/datetime
+and NumPy values as it goes; its chunks stream into a temp file (hashed on
+the way) that is renamed over the target only when its content hash differs.
+
+:func:`publish` also keeps an immutable ``<stem>.<hash>.json`` copy of each
+file; ``meta.json`` maps plain names to those copies so the frontend can
+cache them forever and only revalidate ``meta.json``. Served copies get
+precompressed ``.gz`` (and, with the optional ``brotli`` module, ``.br``)
+siblings; a missing ``brotli`` is reported once per run.
+
+:func:`columnar` turns a list of row dicts into one array per field, which
+the frontend's loader expands back into rows.
+"""
+import gzip, hashlib, json, math, os, re, shutil, sys, tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import brotli
+except ImportError:  # .br siblings are skipped (warned once by compress)
+    brotli = None
+_warned_brotli = False
+
+WRITE_CHUNK = 1 << 16  # characters buffered before a write
+
+
+def _floatstr(o):
+    return float.__repr__(o) if math.isfinite(o) else 'null'
+
+
+class _Encoder(json.JSONEncoder):
+    """``json.dump`` output with non-ASCII kept, NaN/±inf → null, Decimal → float,
+    dates → ISO and NumPy → Python, encoded lazily in one pass."""
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o) if o.is_finite() else None
+        if isinstance(o, (date, datetime)):
+            return o.isoformat()
+        if hasattr(o, 'tolist'):  # NumPy scalar or array
+            return o.tolist()
+        return super().default(o)
+
+    def iterencode(self, o, _one_shot=False):
+        # the pure-Python generator: the C one cannot write non-finite floats as null
+        return json.encoder._make_iterencode(
+            None, self.default, json.encoder.encode_basestring, None, _floatstr,
+            self.key_separator, self.item_separator, False, False, False)(o, 0)
+
+
+_ENCODER = _Encoder(ensure_ascii=False, check_circular=False)
+
+
+def dumps(data):
+    """JSON text for ``data`` (``json.dump`` separators, non-ASCII kept)."""
+    return ''.join(_ENCODER.iterencode(data))
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _batches(chunks):
+    """Encoder chunks joined into strings of about WRITE_CHUNK characters."""
+    buf, n = [], 0
+    for chunk in chunks:
+        buf.append(chunk)
+        n += len(chunk)
+        if n >= WRITE_CHUNK:
+            yield ''.join(buf)
+            buf, n = [], 0
+    if buf:
+        yield ''.join(buf)
+
+
+def write_json(path, data):
+    """Atomically write ``data`` to ``path``; returns (sha256 hex, size, changed).
+
+    When the existing file already has the same content it is left untouched.
+    """
+    h, size = hashlib.sha256(), 0
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                               prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for text in _batches(_ENCODER.iterencode(data)):
+                raw = text.encode('utf-8')
+                h.update(raw)
+                f.write(raw)
+                size += len(raw)
+        digest = h.hexdigest()
+        if os.path.exists(path) and _file_hash(path) == digest:
+            os.remove(tmp)
+            return digest, size, False
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+        return digest, size, True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+HASH_LEN = 12
+META = 'meta.json'
+COLUMNS = '$cols'  # marks a columnar table: {"$cols": {field: [...]}, "$dict": {field: [strings]}}
+DICT = '$dict'
+SIBLING = r'(\.gz|\.br)?'
+
+
+def columnar(rows, precision=None, shared=()):
+    """Struct-of-arrays form of ``rows`` (a list of flat dicts).
+
+    ``precision`` maps fields to fixed decimals (0 → integers); fields in
+    ``shared`` store indices into a per-field dictionary of distinct values.
+    A key missing from a row, or a NaN/±inf in a ``precision`` field, comes back as null.
+    """
+    precision = precision or {}
+    cols, dicts = {}, {}
+    for field in dict.fromkeys(k for row in rows for k in row):
+        values = [row.get(field) for row in rows]
+        if field in shared:
+            index = {}
+            values = [None if v is None else index.setdefault(v, len(index)) for v in values]
+            dicts[field] = list(index)
+        elif field in precision:
+            digits = precision[field]
+            values = [None if v is None or not math.isfinite(v) else round(float(v), digits) if digits else int(round(v))
+                      for v in values]
+        cols[field] = values
+    return {COLUMNS: cols, DICT: dicts} if dicts else {COLUMNS: cols}
+
+
+def expand(data):
+    """Rows of a :func:`columnar` table; anything else (e.g. --row-json lists) is returned as-is."""
+    if not (isinstance(data, dict) and COLUMNS in data):
+        return data
+    dicts = data.get(DICT, {})
+    cols = {f: [None if v is None else dicts[f][v] for v in values] if f in dicts else values
+            for f, values in data[COLUMNS].items()}
+    return [dict(zip(cols, row)) for row in zip(*cols.values())]
+
+
+def compress(path):
+    """Write ``path.gz`` and, when brotli is installed, ``path.br`` next to ``path``."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    global _warned_brotli
+    encoded = [('.gz', lambda b: gzip.compress(b, 9, mtime=0))]
+    if brotli is not None:
+        encoded.append(('.br', lambda b: brotli.compress(b, quality=11)))
+    elif not _warned_brotli:
+        print("⚠️ brotli not installed: writing .gz siblings only (pip install brotli)", file=sys.stderr)
+        _warned_brotli = True
+    for ext, encode in encoded:
+        tmp = f"{path}{ext}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(encode(raw))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path + ext)
+
+
+def _rows(data):
+    """Row count for the manifest: list length, a dict's own ``count`` (paged scanner indexes),
+    or the longest list in a dict."""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict) and COLUMNS in data:
+        return max((len(v) for v in data[COLUMNS].values()), default=0)
+    if isinstance(data, dict) and isinstance(data.get('count'), int):
+        return data['count']
+    if isinstance(data, dict):
+        return max((len(v) for v in data.values() if isinstance(v, list)), default=1)
+    return 1
+
+
+def publish(out_dir, name, data):
+    """Write ``name`` and its hashed copy under ``out_dir``; returns the manifest entry.
+
+    Older hashed copies of the same file (and their siblings) are removed.
+    """
+    path = os.path.join(out_dir, name)
+    digest, size, changed = write_json(path, data)
+    stem = name[:-len('.json')]
+    hashed = f"{stem}.{digest[:HASH_LEN]}.json"
+    target = os.path.join(out_dir, hashed)
+    if not os.path.exists(target):
+        tmp = f"{target}.{os.getpid()}.tmp"
+        shutil.copyfile(path, tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, target)
+    if not os.path.exists(target + '.gz') or (brotli is not None and not os.path.exists(target + '.br')):
+        compress(target)
+    stale = re.compile(re.escape(stem) + r'\.[0-9a-f]{%d}\.json' % HASH_LEN + SIBLING)
+    for f in os.listdir(out_dir):
+        if not f.startswith(hashed) and stale.fullmatch(f):
+            os.remove(os.path.join(out_dir, f))
+    return {'file': hashed, 'hash': digest, 'size': size, 'rows': _rows(data), 'changed': changed}
+
+
+def unpublish(out_dir, name):
+    """Remove ``name`` and its hashed copies from ``out_dir`` (e.g. a page that no longer exists)."""
+    stem = name[:-len('.json')]
+    pattern = re.compile(re.escape(stem) + r'(\.[0-9a-f]{%d})?\.json' % HASH_LEN + SIBLING)
+    for f in os.listdir(out_dir):
+        if pattern.fullmatch(f):
+            os.remove(os.path.join(out_dir, f))
+
+
+def update_meta(out_dir, files, **fields):
+    """Merge manifest ``files`` ({name: entry}) and top-level ``fields`` into ``meta.json``.
+
+    Entries for files this run did not write (e.g. the other script's) are kept.
+    """
+    path = os.path.join(out_dir, META)
+    try:
+        with open(path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+    meta.update(fields)
+    entries = {k: {f: v for f, v in e.items() if f != 'changed'} for k, e in files.items()}
+    meta['files'] = dict(sorted({**meta.get('files', {}), **entries}.items()))
+    digest, size, changed = write_json(path, meta)
+    if changed or not os.path.exists(path + '.gz'):
+        compress(path)
+    return digest, size, changed
@@ -0,0 +1,71 @@
+"""Sparse group×ticker membership matrix (themes, sectors) for per-group aggregates."""
+import numpy as np
+
+
+class Membership:
+    """0/1 group×ticker matrix stored as (group, ticker) coordinate pairs.
+
+    Every reduction is one ``bincount`` over the non-zero entries, i.e. a sparse
+    matrix × vector product against a per-ticker vector.
+    """
+
+    def __init__(self, names, group_idx, ticker_idx):
+        self.names = names
+        self.group_idx = group_idx
+        self.ticker_idx = ticker_idx
+
+    def __len__(self):
+        return len(self.names)
+
+    def sum(self, vec, mask=None):
+        """Per-group sum of ``vec`` over members where ``mask`` holds; NaN counts as 0."""
+        v = vec[self.ticker_idx]
+        keep = ~np.isnan(v) if mask is None else mask[self.ticker_idx] & ~np.isnan(v)
+        return np.bincount(self.group_idx, weights=np.where(keep, v, 0), minlength=len(self))
+
+    def count(self, mask):
+        """Per-group number of members where ``mask`` holds."""
+        return np.bincount(self.group_idx, weights=mask[self.ticker_idx], minlength=len(self)).astype(int)
+
+    def top_k(self, vec, k, mask):
+        """Per-group ticker indices of the ``k`` largest ``vec`` values among ``mask`` members."""
+        sel = mask[self.ticker_idx]
+        g, t = self.group_idx[sel], self.ticker_idx[sel]
+        order = np.lexsort((-np.nan_to_num(vec[t], nan=-np.inf), g))
+        g, t = g[order], t[order]
+        starts = np.searchsorted(g, np.arange(len(self)))
+        pos = np.arange(len(g)) - starts[g]
+        keep = pos < k
+        out = [[] for _ in range(len(self))]
+        for gi, ti in zip(g[keep], t[keep]):
+            out[gi].append(ti)
+        return out
+
+
+def group_returns(members, close, base, traded):
+    """Per-group % return of ``close`` vs. ``base`` over member tickers, as the per-theme SQL joined them.
+
+    A member joins when it traded and has a base bar; its return counts only
+    when both prices are positive. Returns (ret, joined, avg, up, total):
+    per-ticker return and join mask, then per-group average return (NaN
+    without valid returns), up count and joined count.
+    """
+    joined = traded & ~np.isnan(base)
+    valid = joined & (close > 0) & (base > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ret = np.where(valid, (close - base) / base * 100, np.nan)
+    n_valid = members.count(valid)
+    with np.errstate(invalid='ignore'):
+        avg = np.where(n_valid > 0, members.sum(ret, valid) / np.maximum(n_valid, 1), np.nan)
+    return ret, joined, avg, members.count(joined & (close > base)), members.count(joined)
+
+
+def build_membership(groups, row):
+    """Compile ``{name: [ticker, ...]}`` against a ticker→row map; unknown tickers drop out."""
+    names, gi, ti = [], [], []
+    for name, tickers in groups.items():
+        rows = sorted({row[t] for t in tickers if t in row})
+        gi.extend([len(names)] * len(rows))
+        ti.extend(rows)
+        names.append(name)
+    return Membership(names, np.array(gi, dtype=np.intp), np.array(ti, dtype=np.intp))
@@ -0,0 +1,153 @@
+"""Ticker×date bar panel, loaded from market.daily_bars once per run."""
+from datetime import timedelta
+from functools import cached_property
+import numpy as np
+from copyload import copy_columns
+from extremes import WINDOW, detect
+
+# Trading days: daily_stats rows are complete (52-week extremes) from WINDOW - 1 columns in; the
+# regime then needs 60 history dates plus the 19 before them for its 20-day trading-value average
+PANEL_DAYS = (WINDOW - 1) + 60 + 19
+PANEL_COLUMNS = [('ticker', 'S12'), ('trade_date', 'date'), ('open', 'f8'), ('high', 'f8'),
+                 ('low', 'f8'), ('close', 'f8'), ('volume', 'f8')]
+
+
+class Panel:
+    """OHLCV for every ticker over the trailing window as ticker×date matrices.
+
+    Rows follow ``tickers``, columns follow ``dates`` (ascending). A missing bar
+    is NaN in every field.
+    """
+
+    FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, tickers, dates, open, high, low, close, volume):
+        self.tickers = tickers
+        self.dates = list(dates)
+        self.days = np.array(self.dates, dtype='datetime64[D]')
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.row = {t: i for i, t in enumerate(tickers)}
+        self.col = {d: j for j, d in enumerate(self.dates)}
+
+    @property
+    def latest(self):
+        return self.dates[-1]
+
+    def trade_dates(self, n):
+        return self.dates[-n:]
+
+    def as_of(self, day, n_days=PANEL_DAYS):
+        """View of the last ``n_days`` columns up to and including ``day`` — the panel a run on ``day`` would load."""
+        hi = self.col[day] + 1
+        lo = max(hi - n_days, 0)
+        return Panel(self.tickers, self.dates[lo:hi], *(getattr(self, f)[:, lo:hi] for f in self.FIELDS))
+
+    def window(self, end, days):
+        """Column mask for ``end - days < trade_date <= end`` (calendar days)."""
+        lo = np.datetime64(end - timedelta(days=days), 'D')
+        return (self.days > lo) & (self.days <= np.datetime64(end, 'D'))
+
+    @cached_property
+    def traded(self):
+        return self.volume > 0
+
+    @cached_property
+    def prev_close(self):
+        """Each ticker's last close before the column's date (NaN if none in window)."""
+        valid = ~np.isnan(self.close)
+        idx = np.where(valid, np.arange(self.close.shape[1]), -1)
+        np.maximum.accumulate(idx, axis=1, out=idx)
+        filled = np.take_along_axis(self.close, np.maximum(idx, 0), axis=1)
+        filled[idx < 0] = np.nan
+        prev = np.full_like(filled, np.nan)
+        prev[:, 1:] = filled[:, :-1]
+        return prev
+
+    @cached_property
+    def advance_decline(self):
+        """Per-date (up, down, flat) counts of traded tickers vs. previous close."""
+        close, prev = self.close, self.prev_close
+        with np.errstate(invalid='ignore'):
+            up = (self.traded & (close > prev)).sum(axis=0)
+            down = (self.traded & (close < prev)).sum(axis=0)
+            flat = (self.traded & (close == prev)).sum(axis=0)
+        return up, down, flat
+
+    @cached_property
+    def extremes(self):
+        """52-week new-high/new-low flags and prior extremes for every date (see extremes.detect)."""
+        return detect(self)
+
+    def trading_value(self, require_close=True):
+        """Per-date Σ close×volume in 조원 over traded tickers."""
+        mask = self.traded & (self.close > 0) if require_close else self.traded
+        return np.where(mask, self.close * self.volume, 0).sum(axis=0) / 1e12
+
+    def avg_volume(self, n=20):
+        """Mean of each ticker's last ``n`` traded volumes before the latest date (0 if none)."""
+        vol = self.volume[:, :-1]
+        ok = vol > 0
+        from_end = np.cumsum(ok[:, ::-1], axis=1)[:, ::-1]
+        sel = ok & (from_end <= n)
+        return np.where(sel, vol, 0).sum(axis=1) / np.maximum(sel.sum(axis=1), 1)
+
+
+def from_columns(cols):
+    """Build a Panel from ``PANEL_COLUMNS`` arrays (one element per bar)."""
+    tickers, ti = np.unique(cols['ticker'], return_inverse=True)
+    dates, di = np.unique(cols['trade_date'], return_inverse=True)
+    mats = np.full((5, len(tickers), len(dates)), np.nan)
+    for k, f in enumerate(Panel.FIELDS):
+        mats[k, ti, di] = cols[f]
+    return Panel(np.char.decode(tickers, 'utf-8'), dates.astype(object), *mats)
+
+
+def concat(old, new, n_days=PANEL_DAYS):
+    """Append ``new``'s dates to ``old`` (tickers unioned), keeping the last ``n_days``."""
+    tickers = np.union1d(old.tickers, new.tickers)
+    dates = (old.dates + new.dates)[-n_days:]
+    skip = len(old.dates) + len(new.dates) - len(dates)
+    mats = np.full((5, len(tickers), len(old.dates) + len(new.dates)), np.nan)
+    for p, cols in ((old, slice(0, len(old.dates))), (new, slice(len(old.dates), None))):
+        rows = np.searchsorted(tickers, p.tickers)
+        for k, f in enumerate(Panel.FIELDS):
+            mats[k, rows, cols] = getattr(p, f)
+    return Panel(tickers, dates, *mats[:, :, skip:])
+
+
+def load_panel(cur, n_days=PANEL_DAYS):
+    """One scan of market.daily_bars for the trailing ``n_days`` trade dates."""
+    return from_columns(copy_columns(cur, """
+        WITH d AS (
+            SELECT DISTINCT trade_date FROM market.daily_bars
+            ORDER BY trade_date DESC LIMIT %s
+        )
+        SELECT ticker, trade_date, open, high, low, close, volume
+        FROM market.daily_bars
+        WHERE trade_date >= (SELECT MIN(trade_date) FROM d)
+    """, (n_days,), PANEL_COLUMNS))
+
+
+def load_range(cur, start, end, n_days=PANEL_DAYS):
+    """Bars for trade dates ``start``–``end`` plus the ``n_days - 1`` trade dates before ``start``."""
+    return from_columns(copy_columns(cur, """
+        WITH d AS (
+            SELECT DISTINCT trade_date FROM market.daily_bars
+            WHERE trade_date < %s ORDER BY trade_date DESC LIMIT %s
+        )
+        SELECT ticker, trade_date, open, high, low, close, volume
+        FROM market.daily_bars
+        WHERE trade_date >= COALESCE((SELECT MIN(trade_date) FROM d), %s) AND trade_date <= %s
+    """, (start, n_days - 1, start, end), PANEL_COLUMNS))
+
+
+def load_since(cur, after):
+    """Bars for trade dates strictly after ``after``."""
+    return from_columns(copy_columns(cur, """
+        SELECT ticker, trade_date, open, high, low, close, volume
+        FROM market.daily_bars WHERE trade_date > %s
+    """, (after,), PANEL_COLUMNS))
@@ -0,0 +1,149 @@
+"""Per-statement SQL profile: timings, row counts and optional EXPLAIN (ANALYZE, BUFFERS) plans.
+
+Pass ``cursor_factory=ProfilingCursor`` when connecting; every ``execute``
+and ``copy_expert`` is then recorded in the module's :data:`log`.
+"""
+import hashlib, re, threading, time
+from collections import defaultdict
+from datetime import datetime
+import psycopg2.extensions
+from jsonout import write_json
+
+PARAMS_REPR = 200  # max characters of parameters kept per statement
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+_COPY = re.compile(r"^\s*COPY\s*\((.*)\)\s*TO\s+STDOUT", re.S | re.I)
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+
+
+def normalize(sql):
+    """Statement text with whitespace collapsed and literals/placeholders replaced by ``?``."""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    return ' '.join(_LITERAL.sub('?', sql).split())
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode('utf-8')).hexdigest()[:12]
+
+
+def _plan_stats(node, acc):
+    """Accumulate seq scans over a JSON plan tree; buffers come from the root (inclusive)."""
+    if node.get('Node Type') == 'Seq Scan':
+        acc['seqScans'] += 1
+        acc['seqScanTables'].add(node.get('Relation Name'))
+    for child in node.get('Plans', ()):
+        _plan_stats(child, acc)
+    return acc
+
+
+class QueryLog:
+    """Thread-safe record of executed statements; ``explain_over`` (seconds) enables plan capture."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        self.explain_over = None
+        self.started = time.perf_counter()
+
+    def record(self, sql, params, seconds, rows, plan=None):
+        entry = {'fingerprint': fingerprint(sql), 'sql': normalize(sql), 'seconds': seconds,
+                 'rows': rows, 'params': repr(params)[:PARAMS_REPR] if params is not None else None,
+                 'plan': plan}
+        with self.lock:
+            self.entries.append(entry)
+
+    def summary(self):
+        """Statements grouped by fingerprint, most total time first."""
+        groups = defaultdict(list)
+        for e in self.entries:
+            groups[e['fingerprint']].append(e)
+        out = []
+        for fp, runs in groups.items():
+            slowest = max(runs, key=lambda e: e['seconds'])
+            planned = [e['plan'] for e in runs if e['plan']]
+            out.append({
+                'fingerprint': fp,
+                'sql': slowest['sql'],
+                'calls': len(runs),
+                'totalSeconds': round(sum(e['seconds'] for e in runs), 4),
+                'maxSeconds': round(slowest['seconds'], 4),
+                'rows': sum(e['rows'] or 0 for e in runs),
+                'slowestParams': slowest['params'],
+                'seqScans': sum(p['seqScans'] for p in planned),
+                'seqScanTables': sorted({t for p in planned for t in p['seqScanTables'] if t}),
+                'sharedReadBlocks': sum(p['sharedReadBlocks'] for p in planned),
+                'sharedHitBlocks': sum(p['sharedHitBlocks'] for p in planned),
+                'plan': max(planned, key=lambda p: p['executionMs'])['plan'] if planned else None,
+            })
+        out.sort(key=lambda s: -s['totalSeconds'])
+        return out
+
+    def write(self, path):
+        """Write ``profile.json``: statements by total time plus seq-scan and buffer-read rankings."""
+        stats = self.summary()
+        rank = lambda key: [s['fingerprint'] for s in sorted(stats, key=lambda s: -s[key]) if s[key]]
+        return write_json(path, {
+            'runAt': datetime.now().isoformat(),
+            'wallSeconds': round(time.perf_counter() - self.started, 2),
+            'sqlSeconds': round(sum(s['totalSeconds'] for s in stats), 2),
+            'statementCount': len(self.entries),
+            'explainOverSeconds': self.explain_over,
+            'bySeqScans': rank('seqScans'),
+            'byBufferReads': rank('sharedReadBlocks'),
+            'statements': stats,
+        })
+
+    def print_top(self, n=5):
+        for s in self.summary()[:n]:
+            print(f"  🐢 {s['fingerprint']} {s['totalSeconds']:7.2f}s ×{s['calls']:<3} {s['sql'][:70]}")
+
+
+log = QueryLog()
+
+
+class ProfilingCursor(psycopg2.extensions.cursor):
+    """psycopg2 cursor that times every statement into :data:`log`."""
+
+    def _explain(self, sql, params):
+        """EXPLAIN (ANALYZE, BUFFERS) on a side cursor, so this cursor's result set survives.
+
+        Runs inside a savepoint so a failing EXPLAIN does not abort the transaction.
+        """
+        with self.connection.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+            cur.execute('SAVEPOINT profiler_explain')
+            try:
+                cur.execute(b'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + self.mogrify(sql, params))
+                doc = cur.fetchone()[0][0]
+            except psycopg2.Error:
+                cur.execute('ROLLBACK TO SAVEPOINT profiler_explain')
+                raise
+            cur.execute('RELEASE SAVEPOINT profiler_explain')
+        root = doc['Plan']
+        acc = _plan_stats(root, {'seqScans': 0, 'seqScanTables': set()})
+        return {**acc, 'sharedReadBlocks': root.get('Shared Read Blocks', 0),
+                'sharedHitBlocks': root.get('Shared Hit Blocks', 0),
+                'executionMs': doc.get('Execution Time', 0), 'plan': doc}
+
+    def _finish(self, sql, params, started):
+        seconds = time.perf_counter() - started
+        plan = None
+        text = sql.decode('utf-8', 'replace') if isinstance(sql, bytes) else sql
+        if log.explain_over is not None and seconds >= log.explain_over and _EXPLAINABLE.match(text):
+            try:
+                plan = self._explain(sql, params)
+            except psycopg2.Error as e:
+                print(f"  ⚠️ EXPLAIN failed for {fingerprint(sql)}: {e}")
+        log.record(sql, params, seconds, self.rowcount if self.rowcount >= 0 else None, plan)
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        self._finish(query, vars, started)
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        result = super().copy_expert(sql, file, size)
+        m = _COPY.match(sql)
+        self._finish(m.group(1) if m else sql, None, started)
+        return result
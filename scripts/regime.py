@@ -0,0 +1,107 @@
+"""Market regime score (시장 체온) as vectorized functions over date-indexed component arrays.
+
+Components (0-100 each, weighted):
+  - ADR: advance/decline ratio, 0.5→0, 1.0→50, 2.0→100
+  - Breadth: % above MA20
+  - New High/Low spread: highs / (highs + lows)
+  - Trading value vs its 20-day average, 0.5→0, 1.0→50, 1.5→100
+  - Foreign flow: 5-day cumulative KOSPI net buying, -5000억→0, +5000억→100
+  - Volatility (inverse): std of the market's daily return over 21 calendar days, 3.0%→0, 0.5%→100
+
+:func:`composite` and :func:`classify` broadcast, so a stack of weight vectors
+or threshold sets scores a whole history at once.
+"""
+import numpy as np
+from rolling import sma
+
+COMPONENTS = ('adr', 'breadth', 'hlSpread', 'tradingValue', 'foreignFlow', 'volatility')
+WEIGHTS = {'adr': 0.20, 'breadth': 0.20, 'hlSpread': 0.15, 'tradingValue': 0.15, 'foreignFlow': 0.15, 'volatility': 0.15}
+THRESHOLDS = (70, 55, 45, 30)  # composite cut-offs, descending
+REGIMES = (
+    ('risk-on', '🟢 Risk-On (강세)'),
+    ('neutral-bullish', '🟡 중립-강세'),
+    ('neutral', '⚪ 중립'),
+    ('neutral-bearish', '🟠 중립-약세'),
+    ('risk-off', '🔴 Risk-Off (약세)'),
+)
+FLOW_DAYS = 5     # foreign-flow window (trade dates)
+TV_DAYS = 20      # trading-value average (trade dates, today included)
+VOL_DAYS = 21     # volatility window (calendar days)
+
+
+def _clip(x):
+    return np.clip(x, 0, 100)
+
+
+def _volatility(panel):
+    """Per panel date: std (%, ddof=1) of the cross-sectional mean close's daily returns within VOL_DAYS."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg = np.nanmean(np.where(panel.traded, panel.close, np.nan), axis=0)
+        ret = np.full(len(avg), np.nan)
+        ret[1:] = (avg[1:] - avg[:-1]) / np.where(avg[:-1] != 0, avg[:-1], np.nan) * 100
+    ok = ~np.isnan(ret)
+    r = np.where(ok, ret, 0)
+    # window ending at column j starts at the first date after d - VOL_DAYS; its returns are lo..j
+    lo = np.searchsorted(panel.days, panel.days - np.timedelta64(VOL_DAYS, 'D'), 'right') + 1
+    hi = np.arange(len(avg)) + 1
+    n, s1, s2 = (c[hi] - c[lo] for c in (np.concatenate([[0], np.cumsum(x)]) for x in (ok, r, r * r)))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(np.maximum(s2 - s1 * s1 / n, 0) / (n - 1))
+    std = np.where(n > 1, std, 1.0)
+    return np.where(std == 0, 1.0, std)
+
+
+def components(panel, stats, foreign=None):
+    """(dates, {component: array}) for every panel date in the daily_stats rollup ``stats``.
+
+    ``foreign`` maps trade dates to KOSPI foreign net buying (억원); without it
+    the flow component is neutral (50).
+    """
+    dates = [d for d in panel.dates if d in stats]
+    cols = np.array([panel.col[d] for d in dates], dtype=int)
+    col = {c: np.array([float(stats[d][c]) for d in dates]) for c in
+           ('up', 'down', 'above_ma20_pct', 'new_highs', 'new_lows', 'trading_value')}
+
+    adr = col['up'] / np.maximum(col['down'], 1)
+    hl = col['new_highs'] / np.maximum(col['new_highs'] + col['new_lows'], 1)
+    tv = col['trading_value'] / 1e12
+    tv_avg = sma(tv, TV_DAYS)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tv_ratio = np.where((tv != 0) & (tv_avg != 0), tv / np.maximum(tv_avg, 0.01), 1.0)
+
+    flow = np.full(len(dates), 50.0)
+    if foreign:
+        daily = np.array([foreign.get(d, 0.0) for d in panel.dates])
+        rows = np.array([d in foreign for d in panel.dates], dtype=float)
+        total, count = (np.concatenate([[0], np.cumsum(x)]) for x in (daily, rows))
+        lo = np.maximum(cols + 1 - FLOW_DAYS, 0)
+        cum, n = total[cols + 1] - total[lo], count[cols + 1] - count[lo]
+        flow = np.where(n > 0, _clip((cum / 5000 + 1) * 50), 50.0)
+
+    return dates, {
+        'adr': _clip((adr - 0.5) / 1.5 * 100),
+        'breadth': _clip(np.round(col['above_ma20_pct'], 1)),
+        'hlSpread': hl * 100,
+        'tradingValue': _clip((tv_ratio - 0.5) * 100),
+        'foreignFlow': flow,
+        'volatility': _clip((3.0 - _volatility(panel)[cols]) / 2.5 * 100),
+    }
+
+
+def matrix(comp):
+    """date × component array (COMPONENTS order), rounded as published."""
+    return np.round(np.column_stack([comp[k] for k in COMPONENTS]), 1)
+
+
+def composite(scores, weights=WEIGHTS):
+    """Weighted composite: date × component ``scores`` · component [× config] ``weights``.
+
+    A component scoring 0 (or missing) counts as neutral 50, as the scalar version did.
+    """
+    w = np.array([weights[k] for k in COMPONENTS]) if isinstance(weights, dict) else np.asarray(weights)
+    return np.where(np.isnan(scores) | (scores == 0), 50.0, scores) @ w
+
+
+def classify(score, thresholds=THRESHOLDS):
+    """Index into REGIMES for every composite: how many (descending) cut-offs it falls below."""
+    return (np.asarray(score)[..., None] < np.asarray(thresholds)).sum(axis=-1)
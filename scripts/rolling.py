@@ -0,0 +1,113 @@
+"""Trailing-window indicators in O(n) along the last axis of a 1-D series or a ticker×date matrix.
+
+NaN marks a missing value: it is skipped inside a window, and a window with
+fewer than ``min_obs`` values yields NaN. Windows at the start of a series
+are truncated rather than padded.
+"""
+import numpy as np
+
+
+def _2d(values):
+    values = np.asarray(values, dtype=float)
+    return values.reshape(1, -1) if values.ndim == 1 else values, values.ndim == 1
+
+
+def _out(result, flat):
+    return result[0] if flat else result
+
+
+def _window_sums(values, window, *powers):
+    """(count, Σx^p for each power) over each trailing window, via cumulative sums."""
+    valid = ~np.isnan(values)
+    lo = np.maximum(np.arange(1, values.shape[1] + 1) - window, 0)
+    zero = np.zeros((values.shape[0], 1))
+    out = []
+    for arr in (valid, *(np.where(valid, values, 0) ** p for p in powers)):
+        s = np.concatenate([zero, np.cumsum(arr, axis=1)], axis=1)
+        out.append(s[:, 1:] - s[:, lo])
+    return out
+
+
+def count(values, window):
+    """Non-NaN values per trailing window."""
+    values, flat = _2d(values)
+    return _out(_window_sums(values, window)[0], flat)
+
+
+def sma(values, window, min_obs=1):
+    """Trailing mean ignoring NaN."""
+    values, flat = _2d(values)
+    n, s = _window_sums(values, window, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return _out(np.where(n >= min_obs, s / n, np.nan), flat)
+
+
+def rolling_std(values, window, ddof=1, min_obs=2):
+    """Trailing standard deviation ignoring NaN (sums taken around each row's mean for stability)."""
+    values, flat = _2d(values)
+    valid = ~np.isnan(values)
+    center = np.where(valid, values, 0).sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+    n, s1, s2 = _window_sums(values - center, window, 1, 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (s2 - s1 * s1 / n) / (n - ddof)
+        return _out(np.where(n >= max(min_obs, ddof + 1), np.sqrt(np.maximum(var, 0)), np.nan), flat)
+
+
+def ema(values, span=None, alpha=None):
+    """Exponential moving average (``alpha = 2 / (span + 1)`` unless given), seeded with the first value.
+
+    A NaN leaves the average unchanged; output is NaN until a row's first value.
+    """
+    values, flat = _2d(values)
+    alpha = alpha if alpha is not None else 2 / (span + 1)
+    out = np.full_like(values, np.nan)
+    prev = np.full(values.shape[0], np.nan)
+    for j in range(values.shape[1]):
+        x = values[:, j]
+        prev = np.where(np.isnan(prev), x, np.where(np.isnan(x), prev, prev + alpha * (x - prev)))
+        out[:, j] = prev
+    return _out(out, flat)
+
+
+def true_range(high, low, close):
+    """max(high, prev close) − min(low, prev close); the first bar uses high − low."""
+    (high, flat), (low, _), (close, _) = _2d(high), _2d(low), _2d(close)
+    prev = np.concatenate([np.full((close.shape[0], 1), np.nan), close[:, :-1]], axis=1)
+    with np.errstate(invalid='ignore'):
+        tr = np.fmax(high, prev) - np.fmin(low, prev)
+    return _out(tr, flat)
+
+
+def atr(high, low, close, window=14):
+    """Average true range with Wilder's smoothing (``alpha = 1 / window``)."""
+    return ema(true_range(high, low, close), alpha=1 / window)
+
+
+def _rolling_extreme(values, window, ufunc, fill):
+    """van Herk/Gil-Werman: per-block prefix and suffix scans give each window's extreme in O(n)."""
+    values, flat = _2d(values)
+    k, n = values.shape
+    if n == 0:
+        return _out(values.copy(), flat)
+    blocks = -(-n // window)
+    x = np.full((k, blocks * window), fill)
+    x[:, :n] = np.where(np.isnan(values), fill, values)
+    x = x.reshape(k, blocks, window)
+    prefix = ufunc.accumulate(x, axis=2).reshape(k, -1)[:, :n]
+    suffix = ufunc.accumulate(x[:, :, ::-1], axis=2)[:, :, ::-1].reshape(k, -1)
+    out = prefix.copy()
+    if n >= window:
+        # window [i-w+1, i] = suffix of its first block ∪ prefix of its last block
+        out[:, window - 1:] = ufunc(suffix[:, :n - window + 1], prefix[:, window - 1:])
+    out[_window_sums(values, window)[0] == 0] = np.nan
+    return _out(out, flat)
+
+
+def rolling_max(values, window):
+    """Trailing maximum ignoring NaN."""
+    return _rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values, window):
+    """Trailing minimum ignoring NaN."""
+    return _rolling_extreme(values, window, np.minimum, np.inf)
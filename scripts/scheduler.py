@@ -0,0 +1,51 @@
+"""Dependency-aware runner for the extract_* tasks on a thread pool + connection pool."""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class Scheduler:
+    """Runs ``fn(cur, *args, **deps)`` tasks once their dependencies have finished.
+
+    Each task borrows its own connection from ``pool`` and receives the return
+    values of the tasks it depends on as keyword arguments named after them.
+    """
+
+    def __init__(self, pool, workers=4):
+        self.pool = pool
+        self.workers = workers
+        self.tasks = {}
+        self.timings = {}
+
+    def add(self, name, fn, *args, deps=()):
+        self.tasks[name] = (fn, args, tuple(deps))
+
+    def _run(self, name, fn, args, inputs):
+        start = time.perf_counter()
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                return fn(cur, *args, **inputs)
+        finally:
+            self.pool.putconn(conn)
+            self.timings[name] = time.perf_counter() - start
+
+    def run(self):
+        """Run every task; returns {name: result}. The first task error is re-raised."""
+        results, pending, running = {}, dict(self.tasks), {}
+        with ThreadPoolExecutor(self.workers) as ex:
+            while pending or running:
+                ready = [n for n, (_, _, deps) in pending.items() if all(d in results for d in deps)]
+                for name in ready:
+                    fn, args, deps = pending.pop(name)
+                    inputs = {d: results[d] for d in deps}
+                    running[ex.submit(self._run, name, fn, args, inputs)] = name
+                if not running:
+                    raise ValueError(f"Unsatisfiable dependencies: {sorted(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results[running.pop(fut)] = fut.result()
+        return results
+
+    def report(self):
+        for name, secs in sorted(self.timings.items(), key=lambda x: -x[1]):
+            print(f"  ⏱ {name:<16} {secs:7.2f}s")
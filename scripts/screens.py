@@ -0,0 +1,164 @@
+"""Stock screen registry: vectorized predicates over the shared panel, one scanner-<name>.json each.
+
+A screen is a function of :class:`Latest` returning a per-ticker bool array;
+:func:`register` adds it with its own metric and any extra output fields.
+All screens are evaluated together and share a single name/cap lookup, so
+adding one adds no query. Hits are paged per sortable column (:func:`sorts`).
+"""
+from collections import namedtuple
+from functools import cached_property
+import numpy as np
+from rolling import sma
+
+SURGE_RATIO = 2.0   # volume vs. 20-day average
+GAP_PCT = 2.0       # open vs. previous close, beyond the previous bar's range
+LIMIT_PCT = 29.5    # KRX daily limit is ±30%; allow for tick rounding
+
+Screen = namedtuple('Screen', 'name hits key falling fields')
+SCREENS = []
+
+# output key → Latest column every screen can be sorted by
+SORTS = {'marketCap': 'market_cap', 'changePct': 'change_pct', 'tradingValue': 'trading_value'}
+SIZE_COLUMNS = {'market_cap', 'trading_value'}  # always largest first
+
+
+def register(name, key='market_cap', falling=False, fields=None):
+    """Decorator: add ``fn(latest) → bool[tickers]`` as screen ``name``.
+
+    ``fields`` maps output keys to (column, decimals) added to each row; the
+    one whose column is ``key`` becomes an extra sort. ``falling`` screens list
+    the biggest decliners first when sorted by change.
+    """
+    def deco(fn):
+        SCREENS.append(Screen(name, fn, key, falling, fields or {}))
+        return fn
+    return deco
+
+
+class Latest:
+    """Per-ticker columns on the panel's latest date that screens test, rank and emit."""
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.market_cap = np.full(len(panel.tickers), np.nan)  # filled by the caller's lookup
+
+    def _ma(self, window):
+        """(previous, latest) simple moving average of close."""
+        close = self.panel.close[:, -(window + 1):]
+        ma = sma(close, window, window)
+        return ma[:, -2], ma[:, -1]
+
+    @cached_property
+    def traded(self):
+        return self.panel.traded[:, -1]
+
+    @cached_property
+    def close(self):
+        return self.panel.close[:, -1]
+
+    @cached_property
+    def volume(self):
+        return self.panel.volume[:, -1]
+
+    @cached_property
+    def change_pct(self):
+        prev = self.panel.prev_close[:, -1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(prev > 0, (self.close - prev) / prev * 100, np.nan)
+
+    @cached_property
+    def vol_ratio(self):
+        avg = self.panel.avg_volume(20)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(avg > 0, self.volume / avg, np.nan)
+
+    @cached_property
+    def gap_pct(self):
+        prev = self.panel.prev_close[:, -1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(prev > 0, (self.panel.open[:, -1] - prev) / prev * 100, np.nan)
+
+    @cached_property
+    def trading_value(self):
+        return self.close * self.volume
+
+    @cached_property
+    def ma20(self):
+        return self._ma(20)
+
+    @cached_property
+    def ma60(self):
+        return self._ma(60)
+
+    @property
+    def prior_high(self):
+        return self.panel.extremes.prior_high[:, -1]
+
+    @property
+    def prior_low(self):
+        return self.panel.extremes.prior_low[:, -1]
+
+
+def evaluate(panel, screens=None):
+    """(Latest, {screen name: panel row indices}) for every screen in one pass."""
+    latest = Latest(panel)
+    with np.errstate(invalid='ignore'):
+        return latest, {s.name: np.flatnonzero(s.hits(latest) & latest.traded) for s in screens or SCREENS}
+
+
+def sorts(screen):
+    """{output key: (Latest column, descending)} the screen's hits are paged by."""
+    out = dict(SORTS)
+    out.update({key: column for key, (column, _) in screen.fields.items() if column == screen.key})
+    return {key: (column, column in SIZE_COLUMNS or not screen.falling) for key, column in out.items()}
+
+
+def rank(latest, rows, column, descending=True):
+    """``rows`` ordered by the :class:`Latest` ``column``, NaN last, ticker as tie-break."""
+    key = getattr(latest, column)[rows]
+    key = np.where(np.isnan(key), -np.inf if descending else np.inf, key)
+    order = np.lexsort((latest.panel.tickers[rows], -key if descending else key))
+    return rows[order]
+
+
+# ─── SCREENS ───
+@register('newhigh', fields={'newHigh': ('prior_high', None), 'volRatio': ('vol_ratio', 1)})
+def _new_high(t):
+    return t.panel.extremes.high[:, -1]
+
+
+@register('newlow', falling=True, fields={'newLow': ('prior_low', None)})
+def _new_low(t):
+    return t.panel.extremes.low[:, -1]
+
+
+@register('volume-surge', key='vol_ratio', fields={'volRatio': ('vol_ratio', 1)})
+def _volume_surge(t):
+    return t.vol_ratio >= SURGE_RATIO
+
+
+@register('ma-cross-up')
+def _ma_cross_up(t):
+    (p20, c20), (p60, c60) = t.ma20, t.ma60
+    return (p20 <= p60) & (c20 > c60)
+
+
+@register('ma-cross-down', falling=True)
+def _ma_cross_down(t):
+    (p20, c20), (p60, c60) = t.ma20, t.ma60
+    return (p20 >= p60) & (c20 < c60)
+
+
+@register('gap-up', key='gap_pct', fields={'gapPct': ('gap_pct', 1)})
+def _gap_up(t):
+    return (t.gap_pct >= GAP_PCT) & (t.panel.open[:, -1] > t.panel.high[:, -2])
+
+
+@register('gap-down', key='gap_pct', falling=True, fields={'gapPct': ('gap_pct', 1)})
+def _gap_down(t):
+    return (t.gap_pct <= -GAP_PCT) & (t.panel.open[:, -1] < t.panel.low[:, -2])
+
+
+@register('limit-up')
+def _limit_up(t):
+    return t.change_pct >= LIMIT_PCT
@@ -0,0 +1,50 @@
+"""On-disk response cache for external sources (yfinance, pykrx, WICS) with offline replay."""
+import hashlib, json, os, pickle, threading, time
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '.cache', 'sources')
+TTL = {  # seconds a cached response stays fresh
+    'yfinance': 6 * 3600,
+    'pykrx': 6 * 3600,
+    'wics': 24 * 3600,
+}
+
+
+class CacheMiss(LookupError):
+    """Raised in offline mode when a response was never cached."""
+
+
+class SourceCache:
+    """Responses stored under sha256(source, arguments, trade date).
+
+    Online, a fresh entry is served and a stale or missing one is refetched.
+    With ``offline=True`` every call is served from disk regardless of age,
+    and a missing entry raises :class:`CacheMiss` instead of touching the network.
+    """
+
+    def __init__(self, root=CACHE_DIR, offline=False, ttl=TTL):
+        self.root = root
+        self.offline = offline
+        self.ttl = ttl
+
+    def key(self, source, args, kwargs, trade_date):
+        blob = json.dumps([source, args, kwargs, trade_date], sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def fetch(self, source, fn, *args, trade_date=None, **kwargs):
+        """``fn(*args, **kwargs)``, served from cache when possible."""
+        key = self.key(source, args, kwargs, trade_date)
+        path = os.path.join(self.root, source, key[:2], key + '.pickle')
+        if os.path.exists(path):
+            age = time.time() - os.path.getmtime(path)
+            if self.offline or age < self.ttl.get(source, 0):
+                with open(path, 'rb') as f:
+                    return pickle.load(f)
+        if self.offline:
+            raise CacheMiss(f"{source} {args} {kwargs} not cached")
+        value = fn(*args, **kwargs)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        return value
@@ -0,0 +1,88 @@
+"""Run-scoped, memoized access to external series (pykrx trading value, yfinance bars)."""
+import threading
+from datetime import timedelta
+import yfinance as yf
+from pykrx import stock as pykrx_stock
+
+
+def _pykrx_trading_value(cache, market, start, end, trade_date):
+    return cache.fetch('pykrx', pykrx_stock.get_market_trading_value_by_date,
+                       start.strftime('%Y%m%d'), end.strftime('%Y%m%d'), market, trade_date=trade_date)
+
+
+def _yf_download(cache, ticker, start, end, trade_date):
+    df = cache.fetch('yfinance', yf.download, ticker, start=start.isoformat(),
+                     end=(end + timedelta(days=1)).isoformat(), progress=False, trade_date=trade_date)
+    # Flatten MultiIndex columns if present
+    if hasattr(df.columns, 'levels') and df.columns.nlevels > 1:
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+
+FETCHERS = {
+    'pykrx': _pykrx_trading_value,
+    'yfinance': _yf_download,
+}
+
+
+class DataSources:
+    """Fetches each external series once per run and serves date sub-ranges from memory.
+
+    Extractors :meth:`register` the windows they need before the run so the
+    first request pulls the widest one; a request outside what was fetched
+    widens the window and refetches. ``saved`` counts requests that did not
+    go upstream.
+    """
+
+    def __init__(self, cache, trade_date, windows=None):
+        self.cache = cache
+        self.trade_date = trade_date
+        self.windows = dict(windows or {})  # (source, key) → (start, end) to fetch
+        self.frames = {}   # (source, key) → (start, end, frame) fetched
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.fetches = 0
+
+    @property
+    def saved(self):
+        return self.requests - self.fetches
+
+    def register(self, source, key, start, end):
+        with self.lock:
+            lo, hi = self.windows.get((source, key), (start, end))
+            self.windows[(source, key)] = (min(lo, start), max(hi, end))
+
+    def _get(self, source, key, start, end):
+        with self.lock:
+            self.requests += 1
+            lock = self.locks.setdefault((source, key), threading.Lock())
+        with lock:
+            have = self.frames.get((source, key))
+            if have is None or start < have[0] or end > have[1]:
+                self.register(source, key, start, end)
+                lo, hi = self.windows[(source, key)]
+                have = (lo, hi, FETCHERS[source](self.cache, key, lo, hi, self.trade_date))
+                self.frames[(source, key)] = have
+                with self.lock:
+                    self.fetches += 1
+        frame = have[2]
+        return frame if frame.empty else frame.loc[start.isoformat():end.isoformat()]
+
+    def prefetch(self):
+        """Fetch every registered window now; returns {(source, key): exception} for failures."""
+        errors = {}
+        for (source, key), (lo, hi) in list(self.windows.items()):
+            try:
+                self._get(source, key, lo, hi)
+            except Exception as e:
+                errors[(source, key)] = e
+        return errors
+
+    def trading_value(self, market, start, end):
+        """pykrx investor trading value by date for ``market`` (KRW), ``start``–``end`` inclusive."""
+        return self._get('pykrx', market, start, end)
+
+    def index_bars(self, ticker, start, end):
+        """Yahoo Finance daily OHLCV for ``ticker``, ``start``–``end`` inclusive."""
+        return self._get('yfinance', ticker, start, end)
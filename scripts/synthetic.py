@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Synthetic market database for benchmarks (see bench.py).
+
+Fills market.daily_bars, market_caps and universe_members in a scratch
+Postgres database at a chosen scale, and writes a matching
+Naver theme file plus stub yfinance/pykrx/WICS responses to ``--out``.
+"""
+import argparse, io, json, os, time
+from datetime import date
+import numpy as np
+import psycopg2
+from copyload import PG_EPOCH
+from wics import LVL2_CODES
+
+SCALES = {  # name → (tickers, trade days)
+    'small': (2500, 250),
+    'medium': (10000, 1000),
+    'large': (50000, 2500),
+}
+OUT_ROOT = os.path.join(os.path.dirname(__file__), '.cache', 'synthetic')
+END_DATE = date(2025, 12, 30)
+CHUNK = 1000        # tickers generated and copied per batch
+CAP_DAYS = 30       # trailing trade dates with market_caps rows
+N_THEMES = 300
+SECTORS = ['반도체', '자동차', '화학', '철강', '은행', '증권', '보험', '제약', '바이오', '건설',
+           '조선', '기계', '전기전자', '통신', '유통', '음식료', '섬유의복', '운수창고', '게임', '미디어']
+
+DDL = """
+    CREATE SCHEMA IF NOT EXISTS market;
+    DROP TABLE IF EXISTS market.daily_bars, market.market_caps, market.universe_members,
+        market.daily_stats;
+    CREATE TABLE market.daily_bars (ticker text, trade_date date, open float8, high float8,
+        low float8, close float8, volume bigint);
+    CREATE TABLE market.market_caps (ticker text, trade_date date, market_cap float8, sector_name text);
+    CREATE TABLE market.universe_members (ticker text, name text, universe text, as_of_date date);
+"""
+INDEXES = """
+    ALTER TABLE market.daily_bars ADD PRIMARY KEY (ticker, trade_date);
+    CREATE INDEX ON market.daily_bars (trade_date);
+    ALTER TABLE market.market_caps ADD PRIMARY KEY (ticker, trade_date);
+    ANALYZE market.daily_bars, market.market_caps, market.universe_members;
+"""
+
+
+def trade_days(n):
+    """The ``n`` business days ending at END_DATE."""
+    return np.busday_offset(np.datetime64(END_DATE, 'D'), -np.arange(n)[::-1], roll='backward')
+
+
+def ticker_codes(lo, hi):
+    return np.array([f"{i:06d}" for i in range(lo, hi)])
+
+
+def ticker_names(codes):
+    return np.array([f"종목{c}" for c in codes])
+
+
+def universe(i):
+    return np.where(i % 5 < 2, 'KOSPI', 'KOSDAQ')
+
+
+def simulate(rng, k, n):
+    """OHLCV matrices (k×n) plus the listed mask; prices are whole won."""
+    sigma = rng.uniform(0.01, 0.04, (k, 1))
+    close = rng.uniform(1_000, 200_000, (k, 1)) * np.exp(np.cumsum(rng.normal(0.0002, sigma, (k, n)), axis=1))
+    close = np.maximum(np.round(close), 1)
+    prev = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    open_ = np.maximum(np.round(prev * (1 + rng.normal(0, 0.005, (k, n)))), 1)
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, (k, n))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, (k, n))))
+    volume = np.round(rng.lognormal(11, 1.2, (k, n)))
+    volume[rng.random((k, n)) < 0.005] = 0  # trading halts
+    first = np.where(rng.random(k) < 0.1, rng.integers(0, n, k), 0)  # 10% list mid-window
+    listed = np.arange(n) >= first[:, None]
+    return open_, np.round(high), np.round(low), close, volume, listed
+
+
+def copy_bars(cur, codes, days, o, h, l, c, v, listed):
+    """Binary COPY of the listed bars (the same wire format copyload decodes)."""
+    ti, di = np.nonzero(listed)
+    fields = [('ticker', 'S6'), ('trade_date', '>i4'), ('open', '>f8'), ('high', '>f8'),
+              ('low', '>f8'), ('close', '>f8'), ('volume', '>i8')]
+    dtype = [('n', '>i2')]
+    for name, kind in fields:
+        dtype += [(f'{name}_len', '>i4'), (name, kind)]
+    rows = np.empty(len(ti), dtype=dtype)
+    rows['n'] = len(fields)
+    for name, kind in fields:
+        rows[f'{name}_len'] = np.dtype(kind).itemsize
+    rows['ticker'] = np.char.encode(codes[ti], 'ascii')
+    rows['trade_date'] = (days[di] - PG_EPOCH).astype(np.int32)
+    for name, m in (('open', o), ('high', h), ('low', l), ('close', c)):
+        rows[name] = m[ti, di]
+    rows['volume'] = v[ti, di].astype(np.int64)
+    buf = io.BytesIO()
+    buf.write(b'PGCOPY\n\xff\r\n\x00' + bytes(8))
+    buf.write(rows.tobytes())
+    buf.write(b'\xff\xff')
+    buf.seek(0)
+    cur.copy_expert("COPY market.daily_bars (ticker, trade_date, open, high, low, close, volume)"
+                    " FROM STDIN WITH (FORMAT binary)", buf)
+    return len(ti)
+
+
+def copy_text(cur, table, columns, rows):
+    """Tab-separated COPY for the small tables."""
+    buf = io.StringIO(''.join('\t'.join(map(str, r)) + '\n' for r in rows))
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+    return len(rows)
+
+
+def generate(conn, n_tickers, n_days, seed, out):
+    days = trade_days(n_days)
+    cap_from = max(n_days - CAP_DAYS, 0)
+    index_ret = {m: np.zeros(n_days) for m in ('KOSPI', 'KOSDAQ')}
+    index_n = {m: np.zeros(n_days) for m in ('KOSPI', 'KOSDAQ')}
+    index_vol = {m: np.zeros(n_days) for m in ('KOSPI', 'KOSDAQ')}
+    wics = {code: [] for code in LVL2_CODES}
+    counts = dict(bars=0, caps=0)
+    with conn.cursor() as cur:
+        cur.execute(DDL)
+        for lo in range(0, n_tickers, CHUNK):
+            hi = min(lo + CHUNK, n_tickers)
+            idx = np.arange(lo, hi)
+            codes, names, markets = ticker_codes(lo, hi), ticker_names(ticker_codes(lo, hi)), universe(idx)
+            rng = np.random.default_rng([seed, lo])
+            o, h, l, c, v, listed = simulate(rng, hi - lo, n_days)
+            counts['bars'] += copy_bars(cur, codes, days, o, h, l, c, v, listed)
+
+            shares = np.round(rng.lognormal(16, 1.5, hi - lo))
+            sector = [SECTORS[i % len(SECTORS)] for i in idx]
+            ci, cj = np.nonzero(listed[:, cap_from:])
+            caps = [(codes[i], days[j], float(c[i, j] * shares[i]), sector[i])
+                    for i, j in zip(ci, cj + cap_from)]
+            counts['caps'] += copy_text(cur, 'market.market_caps',
+                                        ('ticker', 'trade_date', 'market_cap', 'sector_name'), caps)
+
+            copy_text(cur, 'market.universe_members', ('ticker', 'name', 'universe', 'as_of_date'),
+                      [(codes[i], names[i], markets[i], END_DATE) for i in range(hi - lo)])
+
+            # Equal-weighted index inputs and WICS compositions on the last day
+            prev = np.concatenate([c[:, :1], c[:, :-1]], axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ret = np.where(listed & (np.arange(n_days) > 0), np.log(c / prev), 0)
+            for m in index_ret:
+                sel = markets == m
+                index_ret[m] += ret[sel].sum(axis=0)
+                index_n[m] += (listed[sel] & (np.arange(n_days) > 0)).sum(axis=0)
+                index_vol[m] += np.where(listed[sel], v[sel], 0).sum(axis=0)
+            for i in np.nonzero(listed[:, -1])[0]:
+                wics[LVL2_CODES[(lo + i) % len(LVL2_CODES)]].append(
+                    (codes[i], names[i], float(c[i, -1] * shares[i] / 1e6)))
+            print(f"  {hi:,}/{n_tickers:,} tickers")
+        cur.execute(INDEXES)
+    conn.commit()
+    write_stubs(out, days, index_ret, index_n, index_vol, wics, seed)
+    write_themes(out, n_tickers, seed)
+    return counts
+
+
+def write_stubs(out, days, index_ret, index_n, index_vol, wics, seed):
+    """sources.json: yfinance index bars, pykrx investor flow and WICS payloads keyed like the APIs."""
+    rng = np.random.default_rng([seed, 0, 1])
+    iso = [str(d) for d in days]
+    yf, krx = {}, {}
+    for market, ticker, base in (('KOSPI', '^KS11', 2500.0), ('KOSDAQ', '^KQ11', 800.0)):
+        close = base * np.exp(np.cumsum(index_ret[market] / np.maximum(index_n[market], 1)))
+        prev = np.concatenate([[close[0]], close[:-1]])
+        yf[ticker] = [[d, p, max(p, c) * 1.003, min(p, c) * 0.997, c, v]
+                      for d, p, c, v in zip(iso, prev.tolist(), close.tolist(), index_vol[market].tolist())]
+        flow = rng.normal(0, 1e11, (len(days), 3))
+        krx[market] = [[d, f, i, -(f + i + o), o] for d, (f, i, o) in zip(iso, flow.tolist())]
+    payloads = {}
+    for k, (code, members) in enumerate(wics.items()):
+        total = sum(m[2] for m in members) or 1
+        payloads[code] = {'list': [{'CMP_CD': t, 'CMP_KOR': n, 'IDX_NM_KOR': f'WICS 업종{k:02d}',
+                                    'MKT_VAL': round(cap, 0), 'WGT': round(cap / total * 100, 2)}
+                                   for t, n, cap in members]}
+    with open(os.path.join(out, 'sources.json'), 'w', encoding='utf-8') as f:
+        json.dump({'yfinance': yf, 'pykrx': krx, 'wics': payloads}, f, ensure_ascii=False)
+
+
+def write_themes(out, n_tickers, seed):
+    """Naver theme file in the {"themes": {id: {"name", "stocks": [...]}}} layout."""
+    rng = np.random.default_rng([seed, 0, 2])
+    themes = {}
+    for t in range(N_THEMES):
+        members = rng.choice(n_tickers, size=min(int(rng.integers(3, 40)), n_tickers), replace=False)
+        themes[str(t)] = {'name': f'테마{t:03d}',
+                          'stocks': [{'code': f"{i:06d}", 'name': f"종목{i:06d}"} for i in sorted(members)]}
+    with open(os.path.join(out, 'themes.json'), 'w', encoding='utf-8') as f:
+        json.dump({'themes': themes}, f, ensure_ascii=False)
+    with open(os.path.join(out, 'classifications.json'), 'w', encoding='utf-8') as f:
+        json.dump({}, f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dsn', required=True, help='libpq connection string of a scratch database')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--tickers', type=int, help='override the scale\'s ticker count')
+    parser.add_argument('--days', type=int, help='override the scale\'s trade-day count')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help=f'theme file and source stubs (default {OUT_ROOT}/<scale>)')
+    parser.add_argument('--replace', action='store_true', help='drop existing market.* tables')
+    args = parser.parse_args(argv)
+    n_tickers = args.tickers or SCALES[args.scale][0]
+    n_days = args.days or SCALES[args.scale][1]
+    out = args.out or os.path.join(OUT_ROOT, args.scale)
+    os.makedirs(out, exist_ok=True)
+
+    conn = psycopg2.connect(args.dsn)
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('market.daily_bars') IS NOT NULL")
+        if cur.fetchone()[0] and not args.replace:
+            parser.error('market.daily_bars already exists in this database; pass --replace to drop it')
+    print(f"🧪 Generating {n_tickers:,} tickers × {n_days:,} days (seed {args.seed})...")
+    started = time.perf_counter()
+    counts = generate(conn, n_tickers, n_days, args.seed, out)
+    conn.close()
+    print(f"✅ {counts['bars']:,} bars, {counts['caps']:,} market caps"
+          f" → {out} ({time.perf_counter() - started:.1f}s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""Batch what-if for the market regime: grids of weights × cut-offs scored over the stored history.
+
+The component history is read back from what was published: market-regime.json
+``history`` in the output directory plus every archived snapshot's components
+(archive.py scalars). KOSPI closes come from index-kospi.json candles the same
+way. For a weight grid W (config × component) and threshold sets T, the composite
+is one (date × component) · (component × config) product and every label one
+broadcast comparison against T. Per configuration this reports the regime
+sequence, the number of label flips, and the mean forward index return on the
+dates in each regime. ``edge`` is the bullish (risk-on, neutral-bullish) mean
+minus the bearish (neutral-bearish, risk-off) mean.
+
+    python scripts/whatif.py                       # every weight vector in steps of 0.1
+    python scripts/whatif.py --step 0.05 --shift -5 0 5 --horizon 5 20
+    python scripts/whatif.py --config grid.json --out scripts/.cache/whatif.json
+"""
+import argparse, json, os, time
+from collections import namedtuple
+from itertools import combinations, product
+import numpy as np
+import regime
+from archive import ARCHIVE_DIR, Archive
+from jsonout import expand, write_json
+
+OUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'public', 'data')
+HORIZONS = (5, 20)         # forward returns, trade dates
+CHUNK_BYTES = 1 << 27      # working set per weight chunk (labels, one-hot, forward products)
+BULL, BEAR = (0, 1), (3, 4)  # REGIMES indices
+
+Outcome = namedtuple('Outcome', 'flips days forward')
+Outcome.__doc__ = """weights × thresholds label flips, per-regime day counts and {horizon: (return sums, counts)}."""
+
+
+# ─── HISTORY ───
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_history(out_dir=OUT_DIR, archive=None):
+    """(ISO dates, date × component scores) in COMPONENTS order, oldest first.
+
+    Archived snapshots are taken as published that day; the current history
+    fills dates before the archive starts.
+    """
+    rows = {}
+    data = _read(os.path.join(out_dir, 'market-regime.json')) or {}
+    for row in expand(data.get('history') or []):
+        rows[row['date']] = [row[k] for k in regime.COMPONENTS]
+    if archive is not None:
+        series = [dict(archive.series('market-regime.json', f'components.{k}')) for k in regime.COMPONENTS]
+        for day in series[0]:
+            if all(day in s for s in series):
+                rows[day] = [s[day] for s in series]
+    dates = sorted(rows)
+    return dates, np.array([rows[d] for d in dates], dtype=float).reshape(len(dates), len(regime.COMPONENTS))
+
+
+def load_closes(dates, name='index-kospi.json', out_dir=OUT_DIR, archive=None):
+    """Index close on each of ``dates`` (NaN where no candle); newer files win."""
+    closes = {}
+    files = []
+    if archive is not None:
+        seen = set()
+        for snap in archive.index.values():
+            digest = snap['files'].get(name)
+            if digest and digest not in seen:
+                seen.add(digest)
+                files.append(archive.blob(digest))
+    files.append(_read(os.path.join(out_dir, name)))
+    for data in filter(None, files):
+        closes.update((c['date'], c['c']) for c in expand(data['candles']))
+    return np.array([closes.get(d, np.nan) for d in dates], dtype=float)
+
+
+def forward(closes, h):
+    """% return from each date to ``h`` dates later (NaN past the end or across a missing close)."""
+    out = np.full(len(closes), np.nan)
+    if h < len(closes):
+        out[:-h] = (closes[h:] / closes[:-h] - 1) * 100
+    return out
+
+
+# ─── GRIDS ───
+def weight_grid(step):
+    """Every weight vector (config × component) with entries in multiples of ``step`` summing to 1."""
+    n, k = int(round(1 / step)), len(regime.COMPONENTS)
+    bars = np.array(list(combinations(range(n + k - 1), k - 1))).reshape(-1, k - 1)
+    edges = np.column_stack([np.full(len(bars), -1), bars, np.full(len(bars), n + k - 1)])
+    return (np.diff(edges, axis=1) - 1) / n
+
+
+def threshold_grid(shifts, base=regime.THRESHOLDS):
+    """``base`` with each cut-off moved by every combination of ``shifts`` (strictly descending sets only)."""
+    sets = np.array([np.add(base, s) for s in product(shifts, repeat=len(base))], dtype=float)
+    return np.unique(sets[(np.diff(sets, axis=1) < 0).all(axis=1)], axis=0)[::-1]
+
+
+# ─── EVALUATE ───
+def labels(scores, weights, thresholds):
+    """date × weights × thresholds REGIMES indices."""
+    return regime.classify(regime.composite(scores, np.asarray(weights).T)[:, :, None], thresholds)
+
+
+def evaluate(scores, closes, weights, thresholds, horizons=HORIZONS):
+    """:class:`Outcome` of every (weight vector, threshold set) pair over the history."""
+    lab = labels(scores, weights, thresholds)
+    onehot = lab[..., None] == np.arange(len(regime.REGIMES))
+    fwd = {}
+    for h in horizons:
+        r = forward(closes, h)
+        ok = ~np.isnan(r)
+        fwd[h] = (np.tensordot(r[ok], onehot[ok], axes=1), onehot[ok].sum(axis=0))
+    return Outcome((lab[1:] != lab[:-1]).sum(axis=0), onehot.sum(axis=0), fwd)
+
+
+def edge(sums, counts):
+    """Bullish minus bearish mean forward return from per-regime (sums, counts)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bull = sums[..., BULL].sum(-1) / counts[..., BULL].sum(-1)
+        bear = sums[..., BEAR].sum(-1) / counts[..., BEAR].sum(-1)
+    return bull - bear
+
+
+def run(scores, closes, weights, thresholds, horizons=HORIZONS):
+    """:func:`evaluate` in weight chunks that keep the working set near CHUNK_BYTES."""
+    per_weight = max(len(scores) * len(thresholds) * len(regime.REGIMES) * 10, 1)
+    chunk = max(CHUNK_BYTES // per_weight, 1)
+    parts = [evaluate(scores, closes, weights[i:i + chunk], thresholds, horizons)
+             for i in range(0, len(weights), chunk)]
+    return Outcome(np.concatenate([p.flips for p in parts]), np.concatenate([p.days for p in parts]),
+                   {h: tuple(np.concatenate([p.forward[h][j] for p in parts]) for j in (0, 1)) for h in horizons})
+
+
+# ─── MAIN ───
+def _sequence(lab):
+    return ''.join(regime.REGIMES[k][1][0] for k in lab)
+
+
+def _describe(w, t, flips, days, edges):
+    weights = ' '.join(f'{k} {v:.2f}' for k, v in zip(regime.COMPONENTS, w))
+    cuts = '/'.join(f'{v:g}' for v in t)
+    return (f"{weights} | {cuts} | flips {flips} | days {'/'.join(map(str, days))} | "
+            + ' '.join(f'edge{h} {e:+.2f}' for h, e in edges.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out-dir', default=OUT_DIR, help='published outputs (market-regime.json, index-*.json)')
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help='snapshot archive extending the history')
+    parser.add_argument('--no-archive', action='store_true', help='only the published 60-date history')
+    parser.add_argument('--index', choices=('kospi', 'kosdaq'), default='kospi')
+    parser.add_argument('--step', type=float, default=0.1, help='weight grid step')
+    parser.add_argument('--shift', type=float, nargs='+', default=[0], help='offsets tried on each cut-off')
+    parser.add_argument('--config', help='JSON {"weights": [{component: w}], "thresholds": [[70, 55, 45, 30]]} '
+                                         'replacing either grid')
+    parser.add_argument('--horizon', type=int, nargs='+', default=list(HORIZONS), help='forward returns (trade dates)')
+    parser.add_argument('--top', type=int, default=10, help='configurations printed (by edge at the first horizon)')
+    parser.add_argument('--out', help='write every configuration\'s result here (sequences for the printed ones)')
+    args = parser.parse_args(argv)
+
+    archive = None if args.no_archive else Archive(args.archive)
+    dates, scores = load_history(args.out_dir, archive)
+    if len(dates) < 2:
+        print("  ⚠️ No regime history published yet")
+        return 1
+    closes = load_closes(dates, f'index-{args.index}.json', args.out_dir, archive)
+
+    config = {}
+    if args.config:
+        with open(args.config, encoding='utf-8') as f:
+            config = json.load(f)
+    weights = (np.array([[w[k] for k in regime.COMPONENTS] for w in config['weights']], dtype=float)
+               if 'weights' in config else weight_grid(args.step))
+    thresholds = (np.sort(np.array(config['thresholds'], dtype=float), axis=1)[:, ::-1]
+                  if 'thresholds' in config else threshold_grid(args.shift))
+    baseline = np.array([[regime.WEIGHTS[k] for k in regime.COMPONENTS]])
+    base_cuts = np.array([regime.THRESHOLDS], dtype=float)
+
+    started = time.perf_counter()
+    out = run(scores, closes, weights, thresholds, args.horizon)
+    elapsed = time.perf_counter() - started
+    base = evaluate(scores, closes, baseline, base_cuts, args.horizon)
+    edges = {h: edge(*out.forward[h]) for h in args.horizon}
+
+    print(f"  📐 {len(dates)} dates ({dates[0]} ~ {dates[-1]}), {np.isfinite(closes).sum()} {args.index} closes")
+    print(f"  {len(weights)} weight vectors × {len(thresholds)} threshold sets = "
+          f"{len(weights) * len(thresholds)} configs ({elapsed:.2f}s)")
+    print(f"  baseline: {_describe(baseline[0], base_cuts[0], base.flips[0, 0], base.days[0, 0], {h: edge(*base.forward[h])[0, 0] for h in args.horizon})}")
+    print(f"            {_sequence(labels(scores, baseline, base_cuts)[:, 0, 0])}")
+
+    key = np.where(np.isnan(edges[args.horizon[0]]), -np.inf, edges[args.horizon[0]]).ravel()
+    best = np.argsort(-key, kind='stable')[:args.top]
+    for rank, flat in enumerate(best, 1):
+        i, j = np.unravel_index(flat, out.flips.shape)
+        print(f"  {rank:>3}. {_describe(weights[i], thresholds[j], out.flips[i, j], out.days[i, j], {h: e[i, j] for h, e in edges.items()})}")
+        print(f"       {_sequence(labels(scores, weights[i:i + 1], thresholds[j:j + 1])[:, 0, 0])}")
+
+    if args.out:
+        shown = {(int(i), int(j)) for i, j in zip(*np.unravel_index(best, out.flips.shape))}
+        write_json(args.out, {
+            'dates': dates,
+            'regimes': [r for r, _ in regime.REGIMES],
+            'components': list(regime.COMPONENTS),
+            'configs': [{
+                'weights': weights[i].round(4).tolist(),
+                'thresholds': thresholds[j].tolist(),
+                'flips': int(out.flips[i, j]),
+                'days': out.days[i, j].tolist(),
+                'forward': {str(h): [None if n == 0 else round(float(s / n), 3) for s, n in
+                                     zip(out.forward[h][0][i, j], out.forward[h][1][i, j])] for h in args.horizon},
+                'edge': {str(h): None if np.isnan(e[i, j]) else round(float(e[i, j]), 3) for h, e in edges.items()},
+                **({'sequence': ''.join(map(str, labels(scores, weights[i:i + 1], thresholds[j:j + 1])[:, 0, 0]))}
+                   if (i, j) in shown else {}),
+            } for i in range(len(weights)) for j in range(len(thresholds))],
+        })
+        print(f"  💾 {args.out}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+"""Concurrent, rate-limited client for the WICS index composition API."""
+import http.client, json, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlencode
+
+WICS_API = 'https://www.wiseindex.com/Index/GetIndexComponets'
+RETRY_STATUS = {429, 500, 502, 503, 504}
+LVL2_CODES = [
+    'G1010', 'G1510', 'G2010', 'G2020', 'G2030',
+    'G2510', 'G2520', 'G2530', 'G2550', 'G2560',
+    'G3010', 'G3020', 'G3030', 'G3510', 'G3520',
+    'G4010', 'G4020', 'G4030', 'G4040', 'G4050',
+    'G4510', 'G4520', 'G4530', 'G4535', 'G4540',
+    'G5010', 'G5020', 'G5510',
+]
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second on average, bursting up to ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+            self.tokens -= 1
+        if wait:
+            time.sleep(wait)
+
+
+class WicsClient:
+    """Fetches ``GetIndexComponets`` payloads over keep-alive connections (one per worker).
+
+    ``base_url`` can point at a local stub server; failed requests are retried
+    with exponential backoff. With a ``cache`` (a ``SourceCache``) payloads are
+    served from and stored to disk.
+    """
+
+    def __init__(self, base_url=WICS_API, workers=4, rate=4.0, burst=4,
+                 retries=3, backoff=0.5, timeout=10, cache=None):
+        url = urlsplit(base_url)
+        self.scheme, self.netloc, self.path = url.scheme, url.netloc, url.path
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.local = threading.local()
+        self.cache = cache
+
+    def _conn(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            conn = self.local.conn = cls(self.netloc, timeout=self.timeout)
+        return conn
+
+    def _reset(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self.local.conn = None
+
+    def fetch(self, code, dt_str):
+        """Decoded payload for one sector code; raises after the last failed attempt."""
+        target = f"{self.path}?{urlencode({'ceil_yn': 0, 'dt': dt_str, 'sec_cd': code})}"
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                conn = self._conn()
+                conn.request('GET', target, headers={'User-Agent': 'Mozilla/5.0'})
+                resp = conn.getresponse()
+                body = resp.read()
+                if resp.status == 200:
+                    return json.loads(body.decode('utf-8'))
+                err = RuntimeError(f"HTTP {resp.status}")
+                if resp.status not in RETRY_STATUS:
+                    raise err
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                self._reset()
+                err = e
+            if attempt < self.retries:
+                time.sleep(self.backoff * 2 ** attempt)
+        raise err
+
+    def fetch_all(self, codes, dt_str):
+        """[(code, payload or exception)] in ``codes`` order."""
+        def one(code):
+            try:
+                if self.cache is not None:
+                    return code, self.cache.fetch('wics', self.fetch, code, dt_str, trade_date=dt_str)
+                return code, self.fetch(code, dt_str)
+            except Exception as e:
+                return code, e
+        with ThreadPoolExecutor(self.workers) as ex:
+            return list(ex.map(one, codes))
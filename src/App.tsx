@@ -8,7 +8,7 @@ import { PriceCharts } from './components/sections/PriceCharts'
 import { FlowSection } from './components/sections/FlowSection'
 import { ThemeSection } from './components/sections/ThemeSection'
 import { ScannerSection } from './components/sections/ScannerSection'
-import type { IndexChartData, MarketSummary, BreadthDay, ThemesData, ScannerStock, InvestorFlowData, MarketRegimeData, WicsHeatmapData } from './types/market'
+import type { IndexChartData, MarketSummary, BreadthDay, ThemesData, ScannerIndex, InvestorFlowData, MarketRegimeData, WicsHeatmapData } from './types/market'
 
 export default function App() {
   const meta = useData<{ dataDate: string }>('meta.json')
@@ -17,8 +17,8 @@ export default function App() {
   const summary = useData<MarketSummary>('market-summary.json')
   const breadth = useData<BreadthDay[]>('breadth.json')
   const themes = useData<ThemesData>('themes.json')
-  const newHighs = useData<ScannerStock[]>('scanner-newhigh.json')
-  const newLows = useData<ScannerStock[]>('scanner-newlow.json')
+  const newHighs = useData<ScannerIndex>('scanner-newhigh.json')
+  const newLows = useData<ScannerIndex>('scanner-newlow.json')
   const investorFlow = useData<InvestorFlowData>('investor-flow.json')
   const regime = useData<MarketRegimeData>('market-regime.json')
   const wicsHeatmap = useData<WicsHeatmapData>('wics-heatmap.json')
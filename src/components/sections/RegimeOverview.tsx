@@ -144,6 +144,7 @@ export function RegimeOverview({ regime, kospi, kosdaq, summary, breadth }: {
   const lastBreadth = breadth?.[breadth.length - 1]
   const adrSpark = summary?.sparkline.map(s => s.adr)
   const tvSpark = summary?.sparkline.map(s => s.tradingValue)
+  const trend = regime.history?.map(h => h.composite)
 
   return (
     <div className="space-y-4">
@@ -157,6 +158,12 @@ export function RegimeOverview({ regime, kospi, kosdaq, summary, breadth }: {
           {/* Left: Gauge */}
           <div className="flex flex-col items-center gap-3">
             <CircularGauge value={composite} color={config.color} />
+            {trend && trend.length > 1 && (
+              <div className="flex flex-col items-center gap-0.5">
+                <Sparkline data={trend} color={config.color} width={120} height={24} />
+                <span className="text-[var(--text-muted)] fs-micro">{trend.length}일 추이</span>
+              </div>
+            )}
             <div className="text-center">
               <div className="font-bold fs-headline" style={{ color: config.color }}>{regime.label}</div>
               <div className="mt-1.5 inline-flex items-center gap-1.5 px-3 py-1 rounded-full font-mono font-semibold tracking-wider fs-micro"
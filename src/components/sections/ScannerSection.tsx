@@ -1,49 +1,68 @@
-import { useState, useMemo } from 'react'
+import { useState } from 'react'
 import { Card } from '../ui/Card'
 import { SectionHeader } from '../ui/SectionHeader'
 import { fmtNum, fmtMarketCap, fmtTradingValue } from '../../lib/format'
-import type { ScannerStock } from '../../types/market'
+import { useHashedData } from '../../hooks/useMarketData'
+import type { ScannerIndex, ScannerStock } from '../../types/market'
 
-type SortKey = 'marketCap' | 'changePct' | 'volume'
-
-const sortLabels: Record<SortKey, string> = { marketCap: '시총', changePct: '등락률', volume: '거래금액' }
+const sortLabels: Record<string, string> = {
+  marketCap: '시총', changePct: '등락률', tradingValue: '거래금액', volRatio: '거래량비', gapPct: '갭',
+}
 
-function SortButton({ label, active, onClick }: { label: string; active: boolean; onClick: () => void }) {
+function SortButton({ label, active, ascending, onClick }: { label: string; active: boolean; ascending: boolean; onClick: () => void }) {
   return (
     <button onClick={onClick}
       className={`px-2 py-1 font-semibold tracking-wide rounded-[var(--radius-xs)] transition-all duration-200 fs-micro ${
         active ? 'bg-[var(--color-accent-soft)] text-[var(--color-accent)]' : 'text-[var(--text-tertiary)] hover:text-[var(--text-secondary)] hover:bg-[var(--bg-subtle)]'
       }`}>
-      {label}{active ? ' ▼' : ''}
+      {label}{active ? (ascending ? ' ▲' : ' ▼') : ''}
     </button>
   )
 }
 
-function StockTable({ data, isHigh, label, count }: { data: ScannerStock[]; isHigh: boolean; label: string; count: number }) {
-  const [sortBy, setSortBy] = useState<SortKey>('marketCap')
+function PageButton({ label, disabled, onClick }: { label: string; disabled: boolean; onClick: () => void }) {
+  return (
+    <button onClick={onClick} disabled={disabled}
+      className="px-2 py-1 rounded-[var(--radius-xs)] text-[var(--text-tertiary)] hover:text-[var(--text-secondary)] hover:bg-[var(--bg-subtle)] disabled:opacity-30 disabled:pointer-events-none fs-micro">
+      {label}
+    </button>
+  )
+}
+
+// 인덱스의 top(시총 1페이지)은 바로 렌더링하고, 다른 정렬·페이지는 해당 파일만 가져온다
+function StockTable({ index, label }: { index: ScannerIndex; label: string }) {
+  const [sortBy, setSortBy] = useState('marketCap')
+  const [page, setPage] = useState(0)
+  const files = index.pages[sortBy] ?? []
+  const file = sortBy === 'marketCap' && page === 0 ? null : files[page] ?? null
+  const fetched = useHashedData<ScannerStock[]>(file)
+  // 새 페이지가 도착할 때까지 직전 페이지 행을 흐리게 유지한다
+  const current = file ? fetched : index.top
+  const [rows, setRows] = useState(index.top)
+  if (current && current !== rows) setRows(current)
+  const loading = current === null
 
-  const sorted = useMemo(() => {
-    return [...data].sort((a, b) => {
-      if (sortBy === 'changePct') return isHigh ? b.changePct - a.changePct : a.changePct - b.changePct
-      if (sortBy === 'volume') return (b.close * b.volume) - (a.close * a.volume)
-      return b.marketCap - a.marketCap
-    })
-  }, [data, sortBy, isHigh])
+  const changeSort = (key: string) => {
+    setSortBy(key)
+    setPage(0)
+  }
 
   return (
     <Card noPad>
       <div className="flex items-center justify-between px-5 pt-4 pb-2 md:px-6">
         <h3 className="font-semibold text-[var(--text-secondary)] fs-body">
-          {label} <span className="text-[var(--text-muted)] font-mono fs-micro">({count})</span>
+          {label} <span className="text-[var(--text-muted)] font-mono fs-micro">({index.count})</span>
         </h3>
         <div className="flex items-center gap-1">
-          {(Object.keys(sortLabels) as SortKey[]).map(key => (
-            <SortButton key={key} label={sortLabels[key]} active={sortBy === key} onClick={() => setSortBy(key)} />
+          {Object.keys(index.pages).map(key => (
+            <SortButton key={key} label={sortLabels[key] ?? key} active={sortBy === key}
+              ascending={index.order[key] === 'asc'} onClick={() => changeSort(key)} />
           ))}
         </div>
       </div>
 
-      <div className="overflow-x-auto max-h-[420px] overflow-y-auto">
+      <div aria-busy={loading}
+        className={`overflow-x-auto max-h-[420px] overflow-y-auto transition-opacity ${loading ? 'opacity-40 pointer-events-none' : ''}`}>
         <table className="w-full">
           <thead className="sticky top-0 z-10">
             <tr className="font-semibold tracking-wider uppercase text-[var(--text-muted)] bg-[var(--bg-surface)] border-b border-[var(--border-default)] fs-micro">
@@ -55,7 +74,7 @@ function StockTable({ data, isHigh, label, count }: { data: ScannerStock[]; isHi
             </tr>
           </thead>
           <tbody>
-            {sorted.slice(0, 50).map((s, i) => (
+            {rows.map((s, i) => (
               <tr key={s.ticker}
                 className={`border-t border-[var(--border-default)]/30 hover:bg-[var(--bg-row-hover)] transition-colors group ${
                   i % 2 === 1 ? 'bg-[var(--bg-row-alt)]' : ''
@@ -81,13 +100,21 @@ function StockTable({ data, isHigh, label, count }: { data: ScannerStock[]; isHi
           </tbody>
         </table>
       </div>
+
+      {files.length > 1 && (
+        <div className="flex items-center justify-end gap-1 px-5 py-2 md:px-6 font-mono text-[var(--text-muted)] fs-micro">
+          <PageButton label="‹" disabled={page === 0} onClick={() => setPage(page - 1)} />
+          <span>{page + 1} / {files.length}</span>
+          <PageButton label="›" disabled={page >= files.length - 1} onClick={() => setPage(page + 1)} />
+        </div>
+      )}
     </Card>
   )
 }
 
 export function ScannerSection({ newHighs, newLows }: {
-  newHighs?: ScannerStock[]
-  newLows?: ScannerStock[]
+  newHighs?: ScannerIndex
+  newLows?: ScannerIndex
 }) {
   if (!newHighs && !newLows) return null
 
@@ -95,12 +122,8 @@ export function ScannerSection({ newHighs, newLows }: {
     <div>
       <SectionHeader title="52주 스캐너" subtitle="Scanner" />
       <div className="space-y-4">
-        {newHighs && newHighs.length > 0 && (
-          <StockTable data={newHighs} isHigh={true} label="신고가" count={newHighs.length} />
-        )}
-        {newLows && newLows.length > 0 && (
-          <StockTable data={newLows} isHigh={false} label="신저가" count={newLows.length} />
-        )}
+        {newHighs && newHighs.count > 0 && <StockTable index={newHighs} label="신고가" />}
+        {newLows && newLows.count > 0 && <StockTable index={newLows} label="신저가" />}
       </div>
     </div>
   )
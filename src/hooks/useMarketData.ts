@@ -1,29 +1,120 @@
-import metaJson from '../data/meta.json'
-import kospiJson from '../data/index-kospi.json'
-import kosdaqJson from '../data/index-kosdaq.json'
-import summaryJson from '../data/market-summary.json'
-import breadthJson from '../data/breadth.json'
-import themesJson from '../data/themes.json'
-import newHighJson from '../data/scanner-newhigh.json'
-import newLowJson from '../data/scanner-newlow.json'
-import investorFlowJson from '../data/investor-flow.json'
-import marketRegimeJson from '../data/market-regime.json'
-import wicsHeatmapJson from '../data/wics-heatmap.json'
-
-const dataMap: Record<string, unknown> = {
-  'meta.json': metaJson,
-  'index-kospi.json': kospiJson,
-  'index-kosdaq.json': kosdaqJson,
-  'market-summary.json': summaryJson,
-  'breadth.json': breadthJson,
-  'themes.json': themesJson,
-  'scanner-newhigh.json': newHighJson,
-  'scanner-newlow.json': newLowJson,
-  'investor-flow.json': investorFlowJson,
-  'market-regime.json': marketRegimeJson,
-  'wics-heatmap.json': wicsHeatmapJson,
+import { useEffect, useState } from 'react'
+
+interface ManifestEntry {
+  file: string
+  hash: string
+  size: number
+  rows: number
+}
+
+interface Meta {
+  dataDate: string
+  buildTime: string
+  files?: Record<string, ManifestEntry>
+}
+
+const DATA_URL = `${import.meta.env.BASE_URL}data/`
+
+// meta.json is revalidated on every load; the hashed files it lists never change
+let metaRequest: Promise<Meta> | null = null
+const requests = new Map<string, Promise<unknown>>()
+
+interface Columnar {
+  $cols: Record<string, unknown[]>
+  $dict?: Record<string, unknown[]>
+}
+
+function rowsOf({ $cols, $dict = {} }: Columnar): Record<string, unknown>[] {
+  const fields = Object.keys($cols)
+  const n = fields.length ? $cols[fields[0]].length : 0
+  const rows = new Array(n)
+  for (let i = 0; i < n; i++) {
+    const row: Record<string, unknown> = {}
+    for (const f of fields) {
+      const v = $cols[f][i]
+      row[f] = $dict[f] && v !== null ? $dict[f][v as number] : v
+    }
+    rows[i] = row
+  }
+  return rows
+}
+
+// Columnar tables ({"$cols": {field: [...]}, "$dict": {...}} from scripts/jsonout.py) back into row objects
+function expand(value: unknown): unknown {
+  if (value === null || typeof value !== 'object') return value
+  if (Array.isArray(value)) {
+    for (let i = 0; i < value.length; i++) {
+      if (typeof value[i] === 'object') value[i] = expand(value[i])
+    }
+    return value
+  }
+  if ('$cols' in value) return rowsOf(value as Columnar)
+  const obj = value as Record<string, unknown>
+  for (const key of Object.keys(obj)) obj[key] = expand(obj[key])
+  return obj
+}
+
+function fetchJson(url: string, init?: RequestInit): Promise<unknown> {
+  return fetch(url, init).then((res) => (res.ok ? res.json().then(expand) : null))
+}
+
+function loadMeta(): Promise<Meta> {
+  metaRequest ??= fetchJson(`${DATA_URL}meta.json`, { cache: 'no-cache' }) as Promise<Meta>
+  return metaRequest
+}
+
+function load(file: string): Promise<unknown> {
+  let req = requests.get(file)
+  if (!req) {
+    req = file === 'meta.json'
+      ? loadMeta()
+      : loadMeta().then((meta) => {
+          const entry = meta?.files?.[file]
+          // No manifest entry (older build): fall back to the plain, revalidated name
+          return entry
+            ? fetchJson(`${DATA_URL}${entry.file}`)
+            : fetchJson(`${DATA_URL}${file}`, { cache: 'no-cache' })
+        })
+    requests.set(file, req)
+  }
+  return req
+}
+
+// Hashed files referenced from another output (e.g. scanner pages) — immutable, fetched once
+function loadHashed(file: string): Promise<unknown> {
+  let req = requests.get(file)
+  if (!req) {
+    req = fetchJson(`${DATA_URL}${file}`)
+    requests.set(file, req)
+  }
+  return req
+}
+
+// Data is kept with the file it came from, so a changed ``file`` reads null until its own load lands
+function useLoaded<T>(file: string | null, loader: (file: string) => Promise<unknown>): T | null {
+  const [loaded, setLoaded] = useState<{ file: string; data: T | null } | null>(null)
+  useEffect(() => {
+    if (!file) return
+    let active = true
+    loader(file)
+      .then((value) => {
+        if (active) setLoaded({ file, data: value as T })
+      })
+      .catch(() => {
+        if (active) setLoaded({ file, data: null })
+      })
+    return () => {
+      active = false
+    }
+  }, [file, loader])
+  return loaded && loaded.file === file ? loaded.data : null
 }
 
 export function useData<T>(file: string): T | null {
-  return (dataMap[file] as T) ?? null
+  return useLoaded<T>(file, load)
+}
+
+/** A hashed file named inside another output; ``null`` fetches nothing. */
+export function useHashedData<T>(file: string | null): T | null {
+  return useLoaded<T>(file, loadHashed)
 }
@@ -38,6 +38,8 @@ export interface MarketSummary {
 export interface BreadthDay {
   date: string
   aboveMa20Pct: number
+  aboveMa50Pct?: number
+  aboveMa200Pct?: number
   newHighs: number
   newLows: number
   spread: number
@@ -93,6 +95,19 @@ export interface InvestorFlowData {
 }
 
 // Phase 3: Market Regime
+export interface RegimePoint {
+  date: string
+  composite: number
+  regime: string
+  label: string
+  adr: number
+  breadth: number
+  hlSpread: number
+  tradingValue: number
+  foreignFlow: number
+  volatility: number
+}
+
 export interface MarketRegimeData {
   date: string
   composite: number
@@ -100,6 +115,7 @@ export interface MarketRegimeData {
   label: string
   components: Record<string, number>
   weights: Record<string, number>
+  history?: RegimePoint[]   // last 60 trade dates, oldest first
 }
 
 // WICS Industry Classification
@@ -135,4 +151,17 @@ export interface ScannerStock {
   marketCap: number
   sector: string
   volRatio?: number | null  // Phase 2: 거래량 / 20일 평균
+  newHigh?: number  // 신고가: 돌파한 직전 52주 최고가
+  newLow?: number   // 신저가: 하회한 직전 52주 최저가
+  gapPct?: number | null  // 갭 스캐너: 시가 갭 %
+}
+
+// scanner-<name>.json: 요약 인덱스 + 정렬 키별 페이지 파일 (해시 파일명)
+export interface ScannerIndex {
+  count: number
+  pageSize: number
+  sectors: Record<string, number>        // 섹터 → 종목 수 (많은 순)
+  top: ScannerStock[]                    // 시총 상위 pageSize개 = marketCap 1페이지
+  order: Record<string, 'asc' | 'desc'>
+  pages: Record<string, string[]>        // 정렬 키 → 페이지 파일
 }
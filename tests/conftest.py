@@ -0,0 +1,50 @@
+import math, os, struct, sys
+from datetime import date
+import pytest
+
+# scripts/ modules import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+PG_EPOCH = date(2000, 1, 1)
+
+
+def pg_binary(rows, columns):
+    """``rows`` as a ``COPY ... TO STDOUT (FORMAT binary)`` stream after copyload's server-side casts."""
+    out = [b'PGCOPY\n\xff\r\n\x00', struct.pack('>ii', 0, 0)]
+    for row in rows:
+        out.append(struct.pack('>h', len(columns)))
+        for (_, kind), v in zip(columns, row):
+            if kind == 'f8':
+                payload = struct.pack('>d', math.nan if v is None else v)
+            elif kind == 'i8':
+                payload = struct.pack('>q', v or 0)
+            elif kind == 'date':
+                payload = struct.pack('>i', ((v or PG_EPOCH) - PG_EPOCH).days)
+            else:
+                n = int(kind[1:])
+                payload = (v or '').encode('utf-8')[:n].ljust(n, b'\0')
+            out.append(struct.pack('>i', len(payload)) + payload)
+    out.append(struct.pack('>h', -1))
+    return b''.join(out)
+
+
+class CopyCursor:
+    """Cursor stand-in for copy_columns: ``tables`` maps a table name found in the query to its rows."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.queries = []
+
+    def mogrify(self, sql, params):
+        return f"{sql} -- {params!r}".encode('utf-8')
+
+    def copy_expert(self, sql, buf):
+        self.queries.append(sql)
+        name = next(t for t in self.tables if t in sql)
+        rows, columns = self.tables[name]
+        buf.write(pg_binary(rows(sql) if callable(rows) else rows, columns))
+
+
+@pytest.fixture
+def copy_cursor():
+    return CopyCursor
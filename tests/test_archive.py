@@ -0,0 +1,31 @@
+"""Archive snapshots: trade date resolution and blob dedup."""
+import json
+from datetime import date
+import pytest
+from archive import Archive
+from jsonout import publish, update_meta
+
+
+def test_add_takes_explicit_date(tmp_path):
+    out, archive = tmp_path / 'out', Archive(str(tmp_path / 'archive'))
+    out.mkdir()
+    entry = publish(str(out), 'a.json', {'x': 1})
+    update_meta(str(out), {'a.json': entry}, dataDate='2025-01-02')
+
+    assert archive.add(str(out)) == ('2025-01-02', 2, 2)
+    assert archive.add(str(out), date(2025, 1, 3)) == ('2025-01-03', 2, 0)
+    assert archive.dates() == ['2025-01-02', '2025-01-03']
+    assert archive.load('a.json', '2025-01-03') == {'x': 1}
+    meta = archive.load('meta.json', '2025-01-03')
+    assert meta['dataDate'] == '2025-01-02' and meta['files']['a.json']['file'] == entry['file']
+    assert archive.series('a.json', 'x') == [('2025-01-02', 1), ('2025-01-03', 1)]
+
+
+def test_add_without_meta(tmp_path):
+    out, archive = tmp_path / 'out', Archive(str(tmp_path / 'archive'))
+    out.mkdir()
+    publish(str(out), 'a.json', [1])
+    with pytest.raises(ValueError):
+        archive.add(str(out))
+    assert archive.add(str(out), '2025-01-02') == ('2025-01-02', 1, 1)
+    assert json.loads((tmp_path / 'archive' / 'index.json').read_text())['2025-01-02']['buildTime'] is None
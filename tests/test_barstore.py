@@ -0,0 +1,163 @@
+"""BarStore appends, panels and DB sync against panels built straight from the rows."""
+import math, os
+from datetime import date, timedelta
+import numpy as np
+import pytest
+import barstore
+from barstore import CAP_COLUMNS, BarStore
+from conftest import CopyCursor
+from copyload import copy_columns
+from panel import PANEL_COLUMNS, Panel, from_columns
+
+DAYS = [date(2025, 1, 1) + timedelta(d) for d in range(12)]
+
+
+class Db(CopyCursor):
+    """market.daily_bars/market_caps rows; COPY returns every row, aggregates honour the date range."""
+
+    def __init__(self, bars, caps):
+        super().__init__({'market_caps': (lambda sql: self.caps, CAP_COLUMNS),
+                          'daily_bars': (lambda sql: self.bars, PANEL_COLUMNS)})
+        self.bars, self.caps = bars, caps
+
+    def execute(self, sql, params):
+        rows, k = (self.caps, 2) if 'market_caps' in sql else (self.bars, 5)
+        lo, hi = params
+        agg = {}
+        for r in rows:
+            if lo <= r[1] <= hi:
+                n, s = agg.get(r[1], (0, 0.0))
+                ok = r[k] is not None and not math.isnan(r[k])
+                agg[r[1]] = (n + ok, s + (r[k] if ok else 0))
+        self.result = sorted((d, n, s) for d, (n, s) in agg.items())
+
+    def fetchall(self):
+        return self.result
+
+
+def _rows(seed, days=DAYS, n_tickers=10):
+    rng = np.random.default_rng(seed)
+    bars, caps = [], []
+    for t in range(n_tickers):
+        listed = days[t % 4 * 2:]  # later tickers list later
+        for d in listed:
+            if rng.random() < .85:
+                o, h, l, c = (float(x) for x in rng.uniform(1, 100, 4))
+                bars.append((f'{t:06d}', d, o, h, l, None if rng.random() < .05 else c, float(rng.integers(0, 1000))))
+                caps.append((f'{t:06d}', d, float(rng.uniform(1e9, 1e12))))
+    return bars, caps
+
+
+def _cols(rows, columns):
+    return copy_columns(CopyCursor({'t': (rows, columns)}), 'SELECT * FROM t', (), columns)
+
+
+def _assert_panel(got, expected):
+    assert got.tickers.tolist() == expected.tickers.tolist() and got.dates == expected.dates
+    for f in Panel.FIELDS:
+        np.testing.assert_array_equal(getattr(got, f), getattr(expected, f))
+
+
+def _caps(caps, panel):
+    out = np.full((len(panel.tickers), len(panel.dates)), np.nan)
+    for t, d, v in caps:
+        if t in panel.row and d in panel.col:
+            out[panel.row[t], panel.col[d]] = v
+    return out
+
+
+@pytest.fixture(autouse=True)
+def small_slots(monkeypatch):
+    monkeypatch.setattr(barstore, 'SLOT_BLOCK', 4)  # force capacity growth between appends
+
+
+def test_append_in_batches_matches_from_columns(tmp_path):
+    bars, caps = _rows(1)
+    store = BarStore(str(tmp_path))
+    for lo, hi in ((0, 3), (3, 4), (4, 12)):
+        batch = [r for r in bars if DAYS[lo] <= r[1] <= DAYS[hi - 1]]
+        cap_batch = [r for r in caps if DAYS[lo] <= r[1] <= DAYS[hi - 1]]
+        assert store.append(_cols(batch, PANEL_COLUMNS), _cols(cap_batch, CAP_COLUMNS)) == hi - lo
+    assert store.append(_cols(bars, PANEL_COLUMNS), _cols(caps, CAP_COLUMNS)) == 0  # nothing newer
+
+    reopened = BarStore(str(tmp_path))
+    expected = from_columns(_cols(bars, PANEL_COLUMNS))
+    _assert_panel(reopened.panel(n_days=None), expected)
+    _assert_panel(reopened.panel(n_days=5, end=DAYS[7]), expected.as_of(DAYS[7], 5))
+    _assert_panel(reopened.panel(n_days=3), expected.as_of(DAYS[-1], 3))
+    np.testing.assert_array_equal(reopened.field('market_cap', expected), _caps(caps, expected))
+
+
+def test_update_rewrites_revised_dates(tmp_path):
+    bars, caps = _rows(2, DAYS[:8])
+    db = Db(list(bars), list(caps))
+    store = BarStore(str(tmp_path))
+    assert store.update(db) == 8 and store.revised(db) == []
+
+    new_bars, new_caps = _rows(3, DAYS[8:])
+    i = next(i for i, r in enumerate(db.bars) if r[1] == DAYS[2] and r[5] is not None)
+    db.bars[i] = db.bars[i][:5] + (db.bars[i][5] * 2, db.bars[i][6])
+    del db.bars[next(i for i, r in enumerate(db.bars) if r[1] == DAYS[4])]
+    db.bars.append(('999999', DAYS[4], 1.0, 1.0, 1.0, 1.0, 10.0))  # new ticker on a revised date
+    j = next(i for i, r in enumerate(db.caps) if r[1] == DAYS[6])
+    db.caps[j] = db.caps[j][:2] + (5.0,)
+    db.bars += new_bars
+    db.caps += new_caps
+    assert store.revised(db) == [DAYS[2], DAYS[4], DAYS[6]]
+
+    assert store.update(db) == 4 and store.revised(db) == []
+    expected = from_columns(_cols(db.bars, PANEL_COLUMNS))
+    reopened = BarStore(str(tmp_path))
+    _assert_panel(reopened.panel(n_days=None), expected)
+    np.testing.assert_array_equal(reopened.field('market_cap', expected), _caps(db.caps, expected))
+
+
+def test_update_rebuilds_when_dates_change(tmp_path):
+    bars, caps = _rows(4, DAYS[:6])
+    db = Db(list(bars), list(caps))
+    store = BarStore(str(tmp_path))
+    store.update(db)
+    db.bars = [r for r in db.bars if r[1] != DAYS[1]]
+    assert store.revised(db) is None
+    assert store.update(db) == 5
+    _assert_panel(BarStore(str(tmp_path)).panel(n_days=None), from_columns(_cols(db.bars, PANEL_COLUMNS)))
+
+
+def test_revision_check_widens_from_recent_window(tmp_path):
+    bars, caps = _rows(5, DAYS)
+    db = Db(list(bars), list(caps))
+    store = BarStore(str(tmp_path))
+    store.update(db)
+
+    def revise(day):
+        i = next(i for i, r in enumerate(db.bars) if r[1] == day and r[5] is not None)
+        db.bars[i] = db.bars[i][:5] + (db.bars[i][5] + 1, db.bars[i][6])
+
+    revise(DAYS[1])
+    assert store.revised(db, n_days=4) == [] and store.revised(db) == [DAYS[1]]
+    revise(DAYS[10])
+    assert store.revised(db, n_days=4) == [DAYS[1], DAYS[10]]
+
+
+def test_crash_while_growing_keeps_previous_store(tmp_path, monkeypatch):
+    bars, caps = _rows(6)
+    first = [r for r in bars if r[1] <= DAYS[5] and r[0] < '000004']
+    store = BarStore(str(tmp_path))
+    store.append(_cols(first, PANEL_COLUMNS), _cols([], CAP_COLUMNS))
+    before = BarStore(str(tmp_path)).panel(n_days=None)
+
+    def crash(*args):
+        raise OSError('disk full')
+    monkeypatch.setattr(barstore, 'write_json', crash)
+    with pytest.raises(OSError):
+        store.append(_cols(bars, PANEL_COLUMNS), _cols(caps, CAP_COLUMNS))  # new tickers: grows first
+    _assert_panel(BarStore(str(tmp_path)).panel(n_days=None), before)
+
+    monkeypatch.undo()
+    monkeypatch.setattr(barstore, 'SLOT_BLOCK', 4)
+    store = BarStore(str(tmp_path))
+    store.append(_cols(bars, PANEL_COLUMNS), _cols(caps, CAP_COLUMNS))
+    expected = first + [r for r in bars if r[1] > DAYS[5]]
+    _assert_panel(BarStore(str(tmp_path)).panel(n_days=None), from_columns(_cols(expected, PANEL_COLUMNS)))
+    assert sorted(f for f in os.listdir(tmp_path) if f.endswith('.f8')) == \
+        sorted(os.path.basename(store._path(f)) for f in barstore.FIELDS)  # one generation left
@@ -0,0 +1,55 @@
+"""copy_columns decoding and the panel built from it, against row-by-row references."""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from copyload import copy_columns
+from panel import PANEL_COLUMNS, from_columns
+
+COLUMNS = [('ticker', 'S12'), ('trade_date', 'date'), ('close', 'f8'), ('volume', 'i8'), ('name', 'S8')]
+
+
+def test_decodes_every_kind(copy_cursor):
+    rows = [
+        ('005930', date(2025, 1, 2), 53400.0, 1200, '삼성'),
+        ('000660', date(1999, 12, 31), None, None, None),
+        ('A' * 20, None, -0.5, 2 ** 40, 'abcdefghij'),
+    ]
+    cols = copy_columns(copy_cursor({'q': (rows, COLUMNS)}), 'SELECT * FROM q', (), COLUMNS)
+    assert [t.decode() for t in cols['ticker']] == ['005930', '000660', 'A' * 12]
+    assert cols['trade_date'].tolist() == [date(2025, 1, 2), date(1999, 12, 31), date(2000, 1, 1)]
+    assert cols['close'][0] == 53400.0 and np.isnan(cols['close'][1]) and cols['close'][2] == -0.5
+    assert cols['volume'].tolist() == [1200, 0, 2 ** 40] and cols['volume'].dtype == np.int64
+    assert cols['name'][0].decode('utf-8') == '삼성' and cols['name'][2] == b'abcdefgh'
+
+
+def test_empty_result(copy_cursor):
+    cols = copy_columns(copy_cursor({'q': ([], COLUMNS)}), 'SELECT * FROM q', (), COLUMNS)
+    assert all(len(v) == 0 for v in cols.values())
+
+
+def test_layout_mismatch_raises(copy_cursor):
+    rows = [('005930', date(2025, 1, 2), 1.0, 1, 'x')]
+    cur = copy_cursor({'q': (rows, COLUMNS)})
+    with pytest.raises(ValueError):
+        copy_columns(cur, 'SELECT * FROM q', (), COLUMNS[:-1] + [('name', 'S4')])
+
+
+def test_panel_matches_row_loop(copy_cursor):
+    rng = np.random.default_rng(3)
+    days = [date(2025, 1, 1) + timedelta(d) for d in range(30)]
+    rows = [(f'{t:06d}', d, *(None if rng.random() < .1 else float(x) for x in rng.uniform(1, 100, 4)),
+             float(rng.integers(0, 1000)))
+            for t in range(25) for d in days if rng.random() < .8]
+    rng.shuffle(rows)
+    panel = from_columns(copy_columns(copy_cursor({'daily_bars': (rows, PANEL_COLUMNS)}),
+                                      'SELECT * FROM market.daily_bars', (), PANEL_COLUMNS))
+
+    tickers = sorted({r[0] for r in rows})
+    dates = sorted({r[1] for r in rows})
+    assert panel.tickers.tolist() == tickers and panel.dates == dates
+    expected = {(r[0], r[1]): r[2:] for r in rows}
+    for i, t in enumerate(tickers):
+        for j, d in enumerate(dates):
+            bar = expected.get((t, d), (None,) * 5)
+            got = [getattr(panel, f)[i, j] for f in ('open', 'high', 'low', 'close', 'volume')]
+            assert all((v is None and np.isnan(g)) or g == v for v, g in zip(bar, got))
@@ -0,0 +1,44 @@
+"""daily_stats rollup rows on panels shorter and longer than the 52-week look-back."""
+from datetime import date, timedelta
+import numpy as np
+import daily_stats
+import regime
+from breadth import ma_breadth
+from panel import Panel
+
+
+def _panel(n_dates, n_tickers=20, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, .03, (n_tickers, n_dates)), axis=1))
+    high, low = close * rng.uniform(1, 1.03, close.shape), close * rng.uniform(.97, 1, close.shape)
+    volume = rng.integers(0, 1000, close.shape).astype(float)
+    missing = rng.random(close.shape) < .05
+    for m in (high, low, close, volume):
+        m[missing] = np.nan
+    dates = [date(2024, 1, 1) + timedelta(d) for d in range(n_dates)]
+    return Panel(np.array([f'{i:06d}' for i in range(n_tickers)]), dates, close.copy(), high, low, close, volume)
+
+
+def test_short_history_has_a_row_per_date():
+    panel = _panel(daily_stats.HISTORY - 1)
+    stats = daily_stats.compute(panel)
+    assert list(stats) == panel.dates
+    assert all(s['new_highs'] == s['new_lows'] == 0 for s in stats.values())
+    up, down, _ = panel.advance_decline
+    assert [s['up'] for s in stats.values()] == up.tolist() and [s['down'] for s in stats.values()] == down.tolist()
+
+    dates, comp = regime.components(panel, stats)
+    assert dates == panel.dates
+    scores = regime.matrix(comp)
+    assert scores.shape == (len(dates), len(regime.COMPONENTS)) and not np.isnan(regime.composite(scores)).any()
+
+
+def test_full_history_counts_extremes():
+    panel = _panel(daily_stats.HISTORY + 30)
+    stats = daily_stats.compute(panel)
+    assert list(stats) == panel.dates
+    highs = panel.extremes.high.sum(axis=0)
+    assert sum(s['new_highs'] for s in stats.values()) == highs.sum() > 0
+    above = ma_breadth(panel, windows=(20,), start=daily_stats.HISTORY)[20]
+    np.testing.assert_allclose([stats[d]['above_ma20_pct'] for d in panel.dates[daily_stats.HISTORY:]],
+                               np.round(above, 4))
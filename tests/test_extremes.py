@@ -0,0 +1,54 @@
+"""52-week extremes against a per-bar loop over the previous WINDOW - 1 bars."""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+import extremes
+from panel import Panel
+
+
+def _panel(n_tickers, n_dates, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, .03, (n_tickers, n_dates)), axis=1))
+    high, low = close * rng.uniform(1, 1.03, close.shape), close * rng.uniform(.97, 1, close.shape)
+    volume = rng.integers(0, 1000, close.shape).astype(float)
+    missing = rng.random(close.shape) < .1
+    missing[1, :n_dates // 2] = True   # listed halfway through
+    missing[2] = True                  # no bars at all
+    for m in (high, low, close, volume):
+        m[missing] = np.nan
+    dates = [date(2024, 1, 1) + timedelta(d) for d in range(n_dates)]
+    return Panel(np.array([f'{i:06d}' for i in range(n_tickers)]), dates, close.copy(), high, low, close, volume)
+
+
+def _loop(panel, window, min_history):
+    k, n = panel.close.shape
+    high, low = np.zeros((k, n), bool), np.zeros((k, n), bool)
+    for i in range(k):
+        for j in range(window - 1, n):
+            prior = slice(j - window + 1, j)
+            if not panel.volume[i, j] > 0 or np.sum(~np.isnan(panel.close[i, prior])) < min_history:
+                continue
+            h, l = panel.high[i, prior], panel.low[i, prior]
+            high[i, j] = panel.high[i, j] > np.nanmax(h)
+            low[i, j] = panel.low[i, j] < np.nanmin(l)
+    return high, low
+
+
+@pytest.mark.parametrize('window, min_history, n_dates', [(extremes.WINDOW, extremes.MIN_HISTORY, 300), (10, 3, 60)])
+def test_detect_matches_loop(monkeypatch, window, min_history, n_dates):
+    monkeypatch.setattr(extremes, 'WINDOW', window)
+    monkeypatch.setattr(extremes, 'MIN_HISTORY', min_history)
+    panel = _panel(8, n_dates, window)
+    got = extremes.detect(panel)
+    high, low = _loop(panel, window, min_history)
+    assert high.any() and low.any()
+    np.testing.assert_array_equal(got.high, high)
+    np.testing.assert_array_equal(got.low, low)
+    j = n_dates - 1
+    np.testing.assert_allclose(got.prior_high[0, j], np.nanmax(panel.high[0, j - window + 1:j]))
+    np.testing.assert_allclose(got.prior_low[0, j], np.nanmin(panel.low[0, j - window + 1:j]))
+
+
+def test_short_panel_never_flags():
+    got = extremes.detect(_panel(4, 100, 1))
+    assert not got.high.any() and not got.low.any()
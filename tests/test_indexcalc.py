@@ -0,0 +1,81 @@
+"""Cap-weighted index reconstruction against a per-date loop over each group's members."""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from indexcalc import BASE, MEMBER_COLUMNS, load_universes, reconstruct
+from panel import Panel
+
+
+def _panel(n_tickers=12, n_dates=40, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, .02, (n_tickers, n_dates)), axis=1))
+    open_ = close * rng.uniform(.98, 1.02, close.shape)
+    high = np.maximum(open_, close) * rng.uniform(1, 1.02, close.shape)
+    low = np.minimum(open_, close) * rng.uniform(.98, 1, close.shape)
+    volume = rng.integers(0, 1000, close.shape).astype(float)
+    missing = rng.random(close.shape) < .1
+    for m in (open_, high, low, close, volume):
+        m[missing] = np.nan
+    open_[rng.random(close.shape) < .05] = 0  # no open printed: the close stands in
+    caps = rng.uniform(1e9, 1e11, close.shape)
+    caps[rng.random(close.shape) < .05] = np.nan
+    dates = [date(2025, 1, 1) + timedelta(d) for d in range(n_dates)]
+    return Panel(np.array([f'{i:06d}' for i in range(n_tickers)]), dates, open_, high, low, close, volume), caps
+
+
+def _loop(panel, caps, members):
+    n = len(panel.dates)
+    out = {f: np.zeros((len(members), n)) for f in ('open', 'high', 'low', 'close', 'volume', 'count')}
+    for g, group in enumerate(members):
+        level = BASE
+        for j in range(n):
+            held = group[:, j] if group.ndim == 2 else group
+            ratio = dict.fromkeys(('open', 'high', 'low', 'close'), 0.0)
+            den = count = volume = 0
+            for i in np.nonzero(held)[0]:
+                if panel.volume[i, j] > 0:
+                    volume += panel.volume[i, j]
+                past = panel.close[i, :j][~np.isnan(panel.close[i, :j])]
+                prev, w = (past[-1] if len(past) else np.nan), (caps[i, j - 1] if j else np.nan)
+                if not (panel.volume[i, j] > 0 and prev > 0 and panel.close[i, j] > 0 and w > 0):
+                    continue
+                den, count = den + w, count + 1
+                for f in ratio:
+                    px = getattr(panel, f)[i, j]
+                    ratio[f] += w * (px if px > 0 else panel.close[i, j]) / prev
+            ratio = {f: r / den if den else 1.0 for f, r in ratio.items()}
+            close, open_ = level * ratio['close'], level * ratio['open']
+            out['open'][g, j], out['close'][g, j] = open_, close
+            out['high'][g, j] = max(level * ratio['high'], open_, close)
+            out['low'][g, j] = min(level * ratio['low'], open_, close)
+            out['volume'][g, j], out['count'][g, j] = volume, count
+            level = close
+    return out
+
+
+@pytest.mark.parametrize('dynamic', [False, True])
+def test_reconstruct_matches_loop(dynamic):
+    panel, caps = _panel()
+    rng = np.random.default_rng(8)
+    members = rng.random((3, len(panel.tickers))) < .6
+    if dynamic:  # membership changing over time (universe snapshots)
+        members = members[:, :, None] & (rng.random((3, len(panel.tickers), len(panel.dates))) < .9)
+    got = reconstruct(panel, caps, members)
+    expected = _loop(panel, caps, members)
+    for f, values in expected.items():
+        np.testing.assert_allclose(getattr(got, f), values, rtol=1e-12, err_msg=f)
+    assert (got.close[:, 0] == BASE).all() and (got.count[:, 0] == 0).all()
+
+
+def test_load_universes_uses_latest_snapshot(copy_cursor):
+    panel, _ = _panel(n_tickers=3, n_dates=10)
+    d = panel.dates
+    rows = [('000000', 'KOSPI', d[3]), ('000001', 'KOSPI', d[3]),
+            ('000001', 'KOSPI', d[6]), ('000002', 'KOSPI', d[6]),
+            ('000002', 'KOSDAQ', d[0]), ('999999', 'KOSDAQ', d[0])]
+    held = load_universes(copy_cursor({'universe_members': (rows, MEMBER_COLUMNS)}), panel)
+    assert held.shape == (2, 3, 10)
+    assert held[0, :, 0].tolist() == [True, True, False]   # before the first snapshot: the first one
+    assert held[0, :, 5].tolist() == [True, True, False]
+    assert held[0, :, 6].tolist() == [False, True, True]
+    assert held[1, :, 9].tolist() == [False, False, True]
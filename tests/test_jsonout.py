@@ -0,0 +1,73 @@
+"""Output writer: encoding rules and atomic, hash-aware writes."""
+import hashlib, json, os
+from datetime import date
+from decimal import Decimal
+import numpy as np
+import pytest
+import jsonout
+from jsonout import WRITE_CHUNK, columnar, dumps, expand, publish, write_json
+
+
+def test_dumps_plain_values():
+    data = {'nan': float('nan'), 'inf': [np.inf, -np.inf], 'np': [np.float64(1.5), np.int64(2), np.bool_(True)],
+            'dec': [Decimal('1.25'), Decimal('NaN')], 'day': date(2025, 1, 2), 'arr': np.array([1.0, np.nan]),
+            'text': '한글'}
+    assert json.loads(dumps(data)) == {'nan': None, 'inf': [None, None], 'np': [1.5, 2, True],
+                                       'dec': [1.25, None], 'day': '2025-01-02', 'arr': [1.0, None],
+                                       'text': '한글'}
+    assert dumps({'a': [1, 2]}) == '{"a": [1, 2]}'
+    with pytest.raises(TypeError):
+        dumps({'a': object()})
+
+
+def test_write_json_streams(tmp_path):
+    data = {'rows': [{'t': f'{i:06d}', '이름': '종목', 'c': i / 7, 'x': np.nan} for i in range(5000)]}
+    path = tmp_path / 'big.json'
+    digest, size, _ = write_json(str(path), data)
+    raw = path.read_bytes()
+    assert len(raw) > WRITE_CHUNK and size == len(raw) and digest == hashlib.sha256(raw).hexdigest()
+    plain = {'rows': [{**r, 'x': None} for r in data['rows']]}
+    assert raw.decode('utf-8') == dumps(data) == json.dumps(plain, ensure_ascii=False)
+
+
+def test_write_json_skips_unchanged(tmp_path):
+    path = tmp_path / 'x.json'
+    digest, size, changed = write_json(str(path), {'a': 1})
+    assert changed and size == os.path.getsize(path)
+    mtime = os.stat(path).st_mtime_ns
+    assert write_json(str(path), {'a': 1}) == (digest, size, False)
+    assert os.stat(path).st_mtime_ns == mtime
+    assert write_json(str(path), {'a': 2})[2]
+    assert os.listdir(tmp_path) == ['x.json']  # no temp files left behind
+
+
+def test_manifest_rows(tmp_path):
+    assert publish(str(tmp_path), 'a.json', [1, 2, 3])['rows'] == 3
+    index = {'count': 250, 'pageSize': 100, 'top': columnar([{'c': 1}] * 100), 'pages': {'marketCap': ['p0', 'p1', 'p2']}}
+    assert publish(str(tmp_path), 'scanner-x.json', index)['rows'] == 250
+
+
+def test_columnar_round_trip():
+    rows = [{'t': '005930', 's': '반도체', 'c': 1.23456, 'v': 10.4},
+            {'t': '000660', 's': '반도체', 'c': None, 'v': 3},
+            {'t': '035420', 's': None, 'c': 2.0, 'v': np.int64(7), 'x': True}]
+    data = json.loads(dumps(columnar(rows, {'c': 2, 'v': 0}, ('s',))))
+    assert data['$dict'] == {'s': ['반도체']}
+    assert expand(data) == [{'t': '005930', 's': '반도체', 'c': 1.23, 'v': 10, 'x': None},
+                            {'t': '000660', 's': '반도체', 'c': None, 'v': 3, 'x': None},
+                            {'t': '035420', 's': None, 'c': 2.0, 'v': 7, 'x': True}]
+    assert expand(columnar([])) == [] and expand(rows) is rows
+
+
+def test_columnar_non_finite():
+    rows = [{'c': np.inf, 'v': -np.inf}, {'c': np.nan, 'v': float('inf')}, {'c': Decimal('1.005'), 'v': 2.5}]
+    assert columnar(rows, {'c': 2, 'v': 0})['$cols'] == {'c': [None, None, 1.0], 'v': [None, None, 2]}
+
+
+def test_compress_warns_once_without_brotli(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(jsonout, 'brotli', None)
+    monkeypatch.setattr(jsonout, '_warned_brotli', False)
+    publish(str(tmp_path), 'a.json', [1])
+    publish(str(tmp_path), 'b.json', [2])
+    assert len(capsys.readouterr().err.splitlines()) == 1
+    assert not any(f.endswith('.br') for f in os.listdir(tmp_path))
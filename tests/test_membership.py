@@ -0,0 +1,69 @@
+"""Vectorized theme aggregation against the per-theme SQL it replaced, one theme at a time."""
+from datetime import date, timedelta
+import numpy as np
+from membership import build_membership, group_returns
+from panel import Panel
+
+
+def _panel(n_tickers=30, n_dates=3, seed=11):
+    rng = np.random.default_rng(seed)
+    close = rng.uniform(1, 100, (n_tickers, n_dates))
+    close[rng.random(close.shape) < .1] = np.nan          # no bar
+    close[rng.random(close.shape) < .05] = 0              # zero close: joins, no return
+    close[3, -1] = close[3, -2] = 50                      # flat
+    volume = rng.integers(0, 1000, close.shape).astype(float)
+    volume[rng.random(close.shape) < .15] = 0             # suspended
+    volume[np.isnan(close)] = np.nan
+    dates = [date(2025, 1, 1) + timedelta(d) for d in range(n_dates)]
+    return Panel(np.array([f'{i:06d}' for i in range(n_tickers)]), dates, close, close, close, close, volume)
+
+
+def _themes(panel, seed=12):
+    rng = np.random.default_rng(seed)
+    tickers = list(panel.tickers)
+    groups = {f'theme{g}': list(rng.choice(tickers, rng.integers(3, 10), replace=False)) for g in range(8)}
+    groups['unknown'] = ['999990', '999991', '999992']    # no panel tickers
+    groups['theme0'].append('999999')
+    return groups
+
+
+def _sql(panel, tickers, caps):
+    """One theme as the baseline queries computed it: prev-date join on traded bars."""
+    rets, up, total, tv, cap = [], 0, 0, 0.0, 0.0
+    for t in tickers:
+        if t not in panel.row:
+            continue
+        i = panel.row[t]
+        c, p, v = panel.close[i, -1], panel.close[i, -2], panel.volume[i, -1]
+        cap += 0 if np.isnan(caps[i]) else caps[i]
+        if not v > 0:
+            continue
+        tv += c * v if c > 0 else 0
+        if np.isnan(p):
+            continue
+        total += 1
+        up += c > p
+        rets.append(((c - p) / p * 100 if c > 0 and p > 0 else np.nan, t))
+    valid = [r for r, _ in rets if not np.isnan(r)]
+    avg = np.mean(valid) if valid else np.nan
+    top = [t for _, t in sorted(rets, key=lambda x: (-np.nan_to_num(x[0], nan=-np.inf), panel.row[x[1]]))[:3]]
+    return avg, up, total, top, tv, cap
+
+
+def test_group_returns_match_per_theme_sql():
+    panel = _panel()
+    groups = _themes(panel)
+    caps = np.random.default_rng(13).uniform(1e9, 1e12, len(panel.tickers))
+    caps[::7] = np.nan
+    members = build_membership(groups, panel.row)
+    ret, joined, avg, up, total = group_returns(members, panel.close[:, -1], panel.close[:, -2], panel.traded[:, -1])
+    top3 = members.top_k(ret, 3, joined)
+    tv = members.sum(panel.close[:, -1] * panel.volume[:, -1], panel.traded[:, -1])
+    cap = members.sum(caps)
+    for g, name in enumerate(members.names):
+        e_avg, e_up, e_total, e_top, e_tv, e_cap = _sql(panel, groups[name], caps)
+        np.testing.assert_allclose(avg[g], e_avg, rtol=1e-12, err_msg=name)
+        assert (up[g], total[g]) == (e_up, e_total), name
+        assert [panel.tickers[i] for i in top3[g]] == e_top, name
+        np.testing.assert_allclose([tv[g], cap[g]], [e_tv, e_cap], rtol=1e-12, err_msg=name)
+    assert np.isnan(avg[members.names.index('unknown')]) and total[members.names.index('unknown')] == 0
@@ -0,0 +1,72 @@
+"""Vectorized regime scores against the scalar per-date computation they replaced."""
+from datetime import date, timedelta
+import numpy as np
+import pytest
+import daily_stats
+import regime
+from panel import Panel
+
+
+def _panel(n_dates, n_tickers=30, seed=9):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, .02, (n_tickers, n_dates)) + rng.normal(0, .01, n_dates), axis=1))
+    high, low = close * rng.uniform(1, 1.03, close.shape), close * rng.uniform(.97, 1, close.shape)
+    volume = rng.integers(0, 1000, close.shape).astype(float)
+    missing = rng.random(close.shape) < .05
+    for m in (high, low, close, volume):
+        m[missing] = np.nan
+    days = np.cumsum(rng.choice([1, 1, 1, 1, 3], n_dates))  # weekends: calendar windows hold fewer dates
+    dates = [date(2024, 1, 1) + timedelta(int(d)) for d in days]
+    return Panel(np.array([f'{i:06d}' for i in range(n_tickers)]), dates, close.copy(), high, low, close, volume)
+
+
+def _scalar(panel, stats, foreign, latest):
+    """The pre-vectorization extract_market_regime for one date (rollup rows up to ``latest``)."""
+    rows = {d: s for d, s in stats.items() if d <= latest}
+    s = rows[latest]
+    adr_score = min(max((s['up'] / max(s['down'], 1) - 0.5) / 1.5 * 100, 0), 100)
+    breadth_score = min(max(round(s['above_ma20_pct'], 1), 0), 100)
+    hl_score = s['new_highs'] / max(s['new_highs'] + s['new_lows'], 1) * 100
+    tv_today = s['trading_value'] / 1e12
+    tv_avg = float(daily_stats.trailing(rows, 'trading_value', regime.TV_DAYS).mean()) / 1e12
+    tv_ratio = tv_today / max(tv_avg, 0.01) if tv_today and tv_avg else 1.0
+    tv_score = min(max((tv_ratio - 0.5) * 100, 0), 100)
+    foreign_score = 50
+    recent = [d for d in panel.dates if d <= latest][-regime.FLOW_DAYS:]
+    flows = [foreign[d] for d in recent if d in (foreign or {})]
+    if flows:
+        foreign_score = min(max((sum(flows) / 5000 + 1) * 50, 0), 100)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_close = np.nanmean(np.where(panel.traded, panel.close, np.nan), axis=0)[panel.window(latest, regime.VOL_DAYS)]
+        daily_ret = (avg_close[1:] - avg_close[:-1]) / np.where(avg_close[:-1] != 0, avg_close[:-1], np.nan) * 100
+    daily_ret = daily_ret[~np.isnan(daily_ret)]
+    volatility = (float(daily_ret.std(ddof=1)) if len(daily_ret) > 1 else 1) or 1
+    vol_score = min(max((3.0 - volatility) / 2.5 * 100, 0), 100)
+    components = {'adr': round(adr_score, 1), 'breadth': round(breadth_score, 1), 'hlSpread': round(hl_score, 1),
+                  'tradingValue': round(tv_score, 1), 'foreignFlow': round(foreign_score, 1),
+                  'volatility': round(vol_score, 1)}
+    composite = sum((components[k] or 50) * regime.WEIGHTS[k] for k in regime.WEIGHTS)
+    return components, composite, sum(composite < t for t in regime.THRESHOLDS)
+
+
+@pytest.mark.parametrize('n_dates, with_flow', [(daily_stats.HISTORY + 40, True), (daily_stats.HISTORY + 40, False),
+                                                (45, True)])
+def test_components_match_scalar(n_dates, with_flow):
+    panel = _panel(n_dates)
+    stats = daily_stats.compute(panel)
+    del stats[panel.dates[-3]]  # a date the rollup lacks is skipped
+    rng = np.random.default_rng(10)
+    foreign = {d: float(rng.normal(0, 2000)) for d in panel.dates if rng.random() < .8} if with_flow else None
+
+    dates, comp = regime.components(panel, stats, foreign)
+    assert dates == [d for d in panel.dates if d in stats]
+    scores = regime.matrix(comp)
+    composite = regime.composite(scores)
+    labels = regime.classify(composite)
+    for k, d in enumerate(dates):
+        components, expected, label = _scalar(panel, stats, foreign, d)
+        np.testing.assert_allclose(scores[k], [components[c] for c in regime.COMPONENTS], atol=1e-9, err_msg=str(d))
+        np.testing.assert_allclose(composite[k], expected, rtol=1e-12, err_msg=str(d))
+        assert labels[k] == label, d
+    if n_dates > daily_stats.HISTORY:
+        assert (scores[:, regime.COMPONENTS.index('hlSpread')] > 0).any()
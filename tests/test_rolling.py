@@ -0,0 +1,73 @@
+"""rolling indicators against per-window loops."""
+import numpy as np
+import pytest
+from rolling import atr, count, ema, rolling_max, rolling_min, rolling_std, sma, true_range
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(5)
+    x = rng.uniform(1, 100, (6, 40))
+    x[rng.random(x.shape) < .2] = np.nan
+    x[2, :15] = np.nan   # late listing
+    x[4] = np.nan        # never traded
+    return x
+
+
+def _loop(values, window, reduce):
+    out = np.full(values.shape, np.nan)
+    for i, row in enumerate(values):
+        for j in range(len(row)):
+            w = row[max(j - window + 1, 0):j + 1]
+            out[i, j] = reduce(w[~np.isnan(w)])
+    return out
+
+
+@pytest.mark.parametrize('window', [1, 3, 20, 60])
+def test_windows_match_loop(values, window):
+    np.testing.assert_array_equal(count(values, window), _loop(values, window, len))
+    np.testing.assert_allclose(sma(values, window, 2), _loop(values, window, lambda w: w.mean() if len(w) >= 2 else np.nan))
+    np.testing.assert_allclose(rolling_std(values, window),
+                               _loop(values, window, lambda w: w.std(ddof=1) if len(w) >= 2 else np.nan))
+    np.testing.assert_array_equal(rolling_max(values, window), _loop(values, window, lambda w: w.max() if len(w) else np.nan))
+    np.testing.assert_array_equal(rolling_min(values, window), _loop(values, window, lambda w: w.min() if len(w) else np.nan))
+
+
+def test_one_dimensional(values):
+    np.testing.assert_allclose(sma(values[0], 5), sma(values[:1], 5)[0])
+    np.testing.assert_array_equal(rolling_max(values[0], 5), rolling_max(values[:1], 5)[0])
+
+
+def test_ema_loop(values):
+    alpha = 2 / 11
+    expected = np.full(values.shape, np.nan)
+    for i, row in enumerate(values):
+        prev = np.nan
+        for j, x in enumerate(row):
+            if np.isnan(prev):
+                prev = x
+            elif not np.isnan(x):
+                prev += alpha * (x - prev)
+            expected[i, j] = prev
+    np.testing.assert_allclose(ema(values, span=10), expected)
+
+
+def test_atr_loop():
+    rng = np.random.default_rng(6)
+    close = rng.uniform(90, 110, (3, 30))
+    high, low = close + rng.uniform(0, 5, close.shape), close - rng.uniform(0, 5, close.shape)
+    tr = np.empty_like(close)
+    for i in range(3):
+        tr[i, 0] = high[i, 0] - low[i, 0]
+        for j in range(1, 30):
+            tr[i, j] = max(high[i, j], close[i, j - 1]) - min(low[i, j], close[i, j - 1])
+    np.testing.assert_allclose(true_range(high, low, close), tr)
+    expected = tr.copy()
+    for j in range(1, 30):
+        expected[:, j] = expected[:, j - 1] + (tr[:, j] - expected[:, j - 1]) / 14
+    np.testing.assert_allclose(atr(high, low, close), expected)
+
+
+def test_empty():
+    assert rolling_max(np.empty((2, 0)), 5).shape == (2, 0)
+    assert sma(np.empty((0, 3)), 5).shape == (0, 3)
@@ -0,0 +1,102 @@
+"""WicsClient against a local stub GetIndexComponets server."""
+import json, threading, time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import pytest
+from wics import TokenBucket, WicsClient
+
+
+@pytest.fixture
+def server():
+    """Stub server; ``server.script[code]`` lists per-attempt behaviours: a status, ('sleep', s) or 'ok'."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            code = parse_qs(urlsplit(self.path).query)['sec_cd'][0]
+            with srv.lock:
+                srv.hits.append((code, time.monotonic()))
+                steps = srv.script.get(code, [])
+                step = steps.pop(0) if steps else 'ok'
+            if isinstance(step, tuple):
+                time.sleep(step[1])
+                step = 'ok'
+            status = 200 if step == 'ok' else step
+            body = json.dumps({'code': code} if status == 200 else {}).encode()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    srv.lock, srv.hits, srv.script = threading.Lock(), [], {}
+    srv.url = f'http://127.0.0.1:{srv.server_address[1]}/Index/GetIndexComponets'
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def client(srv, **kwargs):
+    opts = dict(workers=4, rate=1000, burst=1000, retries=3, backoff=0.01, timeout=2)
+    opts.update(kwargs)
+    return WicsClient(srv.url, **opts)
+
+
+def attempts(srv, code):
+    return sum(1 for c, _ in srv.hits if c == code)
+
+
+def test_retries_5xx(server):
+    server.script['G1010'] = [503, 500]
+    assert client(server).fetch('G1010', '20250101') == {'code': 'G1010'}
+    assert attempts(server, 'G1010') == 3
+
+
+def test_client_error_not_retried(server):
+    server.script['G1010'] = [404]
+    with pytest.raises(RuntimeError, match='404'):
+        client(server).fetch('G1010', '20250101')
+    assert attempts(server, 'G1010') == 1
+
+
+def test_retries_timeout(server):
+    server.script['G1010'] = [('sleep', 0.5)]
+    assert client(server, timeout=0.2).fetch('G1010', '20250101') == {'code': 'G1010'}
+    assert attempts(server, 'G1010') == 2
+
+
+def test_gives_up_after_retries(server):
+    server.script['G1010'] = [502] * 3
+    out = client(server, retries=2).fetch_all(['G1010', 'G1510'], '20250101')
+    assert isinstance(out[0][1], RuntimeError) and out[1][1] == {'code': 'G1510'}
+    assert attempts(server, 'G1010') == 3
+
+
+def test_token_bucket_rate():
+    bucket = TokenBucket(rate=50, burst=5)
+    started = time.monotonic()
+    for _ in range(25):
+        bucket.acquire()
+    # the burst is free, the other 20 wait 1/50 s each
+    assert time.monotonic() - started >= 20 / 50 * 0.9
+
+
+def test_fetch_all_rate_limited(server):
+    codes = [f'G{i}' for i in range(12)]
+    client(server, workers=6, rate=40, burst=2).fetch_all(codes, '20250101')
+    stamps = sorted(t for _, t in server.hits)
+    assert len(stamps) == 12
+    assert stamps[-1] - stamps[0] >= (12 - 2) / 40 * 0.9
+
+
+def test_fetch_all_order_stable(server):
+    codes = [f'G{i:02d}' for i in range(16)]
+    for i, code in enumerate(codes):
+        server.script[code] = [('sleep', 0.01 * ((i * 7) % 5))]
+    out = client(server, workers=8).fetch_all(codes, '20250101')
+    assert [c for c, _ in out] == codes
+    assert [p['code'] for _, p in out] == codes